@@ -67,20 +67,19 @@ class ProfileAdmin(admin.ModelAdmin):
     def rescan_moderation(self, request, queryset):
         from django.utils import timezone
 
-        from tracks.services.moderation import scan_image_bytes
+        from tracks.services.moderation import scan_stored_image
 
         updated = 0
         for profile in queryset:
             if not profile.profile_picture:
                 continue
 
-            f = profile.profile_picture.open(
-                "rb"
-            )  # f = opens image file object in binary 'read mode'
             try:
-                allowed, labels, failed = scan_image_bytes(
-                    f.read()
-                )  # gets the raw bytes
+                # Answered from the verdict cache when possible
+                image = profile.profile_picture
+                allowed, labels, failed = scan_stored_image(
+                    image.storage, image.name
+                )
                 if failed:
                     profile.moderation_status = "PENDING"
                     profile.moderation_labels = None
@@ -92,8 +91,6 @@ class ProfileAdmin(admin.ModelAdmin):
             except Exception:
                 profile.moderation_status = "PENDING"
                 profile.moderation_labels = None
-            finally:
-                f.close()
 
             profile.moderated_at = timezone.now()
             profile.save(
@@ -12,7 +12,6 @@ from django.utils import timezone
 from ulid import ULID
 
 from core.utils import get_toxicity_score
-from tracks.services.moderation import scan_image_bytes
 
 from .models import CustomUser, Profile
 
@@ -245,19 +244,19 @@ class ProfileForm(forms.ModelForm):
         - Extension: jpg, jpeg, png, webp
         - MIME type: image/jpeg, image/png, image/webp
         - Filename sanitization with ULID for uniqueness
-        - AWS Rekognition content moderation
+        - AWS Rekognition content moderation, queued by save()
         """
         image = self.cleaned_data.get("profile_picture")
 
-        # Initialize moderation flags
-        self._moderation_failed = False
-        self._moderation_allowed = True
-        self._moderation_labels = []
+        # Initialize moderation flag for save()
+        self._image_uploaded = False
 
         # Only validate if a new file is uploaded
         if isinstance(image, (InMemoryUploadedFile, TemporaryUploadedFile)):
             # File size validation (20MB limit)
-            if image.size > 20 * 1024 * 1024:
+            if image.size > 20 * 1024 * 1024 or getattr(
+                image, "exceeds_limit", False
+            ):
                 raise ValidationError(
                     "Image file too large. Maximum size is 20MB."
                 )
@@ -272,9 +271,17 @@ class ProfileForm(forms.ModelForm):
                     "are allowed."
                 )
 
-            # MIME type validation
+            # Format validation on magic bytes sniffed by the upload
+            # handler, falling back to the client's content type
+            allowed_formats = ["jpeg", "png", "webp"]
             allowed_types = ["image/jpeg", "image/png", "image/webp"]
-            if (
+            if hasattr(image, "sniffed_format"):
+                if image.sniffed_format not in allowed_formats:
+                    raise ValidationError(
+                        "Invalid image format. Only JPG, PNG, and WebP "
+                        "are allowed."
+                    )
+            elif (
                 hasattr(image, "content_type")
                 and image.content_type not in allowed_types
             ):
@@ -287,26 +294,9 @@ class ProfileForm(forms.ModelForm):
             if ".." in filename or "/" in filename or "\\" in filename:
                 raise ValidationError("Invalid filename.")
 
-            # AWS Rekognition content moderation
-            try:
-                data = image.read()
-                image.seek(0)  # Reset file pointer for storage
-
-                allowed, labels, failed = scan_image_bytes(data)
-                self._moderation_allowed = allowed
-                self._moderation_labels = labels
-                self._moderation_failed = failed
-
-                if not allowed:
-                    raise ValidationError(
-                        "This image violates our community guidelines."
-                    )
-
-            except ValidationError:
-                raise  # Re-raise validation errors
-            except Exception:
-                # Fail-open: allow upload but mark as pending
-                self._moderation_failed = True
+            # Rekognition moderation runs after commit, off the request
+            # path (tracks.services.moderation.moderate_image)
+            self._image_uploaded = True
 
             # Generate unique filename with ULID
             name, ext = os.path.splitext(filename)
@@ -326,26 +316,20 @@ class ProfileForm(forms.ModelForm):
 
     def save(self, commit=True):
         """
-        Save profile with moderation status based on image scan results.
+        Save profile, marking a new picture PENDING until the background
+        moderation scan decides it.
         """
         profile = super().save(commit=False)
 
-        # Set moderation status if image was processed
-        if hasattr(self, "_moderation_failed") or hasattr(
-            self, "_moderation_allowed"
-        ):
-            if getattr(self, "_moderation_failed", False):
-                profile.moderation_status = "PENDING"
-                profile.moderation_labels = None
-            else:
-                profile.moderation_status = (
-                    "APPROVED"
-                    if getattr(self, "_moderation_allowed", True)
-                    else "REJECTED"
-                )
-                profile.moderation_labels = getattr(
-                    self, "_moderation_labels", []
-                )
+        # A new picture is hidden until the background scan approves
+        # it; profiles without a picture need no scan
+        if getattr(self, "_image_uploaded", False):
+            profile.moderation_status = "PENDING"
+            profile.moderation_labels = None
+            profile.moderated_at = None
+        elif not profile.profile_picture:
+            profile.moderation_status = "APPROVED"
+            profile.moderation_labels = []
             profile.moderated_at = timezone.now()
 
         if commit:
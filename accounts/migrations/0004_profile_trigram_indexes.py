@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+import core.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_profile_moderated_at_profile_moderation_labels_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="profile",
+            index=core.indexes.PortableGinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "username", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="profile_username_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=core.indexes.PortableGinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "display_name", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="profile_display_trgm_idx",
+            ),
+        ),
+    ]
@@ -4,11 +4,31 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
+from django.contrib.postgres.indexes import OpClass
 from django.core.files.uploadedfile import (
     InMemoryUploadedFile,
     TemporaryUploadedFile,
 )
 from django.db import models
+from django.db.models.functions import Cast, Upper
+
+from core.images import delete_variants, image_sources
+from core.indexes import PortableGinIndex
+
+
+def trigram_index(field_name, name):
+    """
+    GIN trigram index on UPPER(<field>::text), the exact expression
+    PostgreSQL lookups like istartswith/icontains compare against, so
+    the planner can use it for autocomplete LIKE queries.
+    """
+    return PortableGinIndex(
+        OpClass(
+            Upper(Cast(field_name, models.TextField())), name="gin_trgm_ops"
+        ),
+        name=name,
+    )
+
 
 # Create your models here.
 
@@ -46,6 +66,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         email: Unique email address for authentication and identification
         is_active: Boolean indicating if the user account is active
         is_staff: Boolean indicating if the user can access admin site
+        first_name, last_name: Unused; kept so the model matches the
+            columns created by 0001, which are NOT NULL. Display names
+            live on Profile.
 
     Related Models:
         Profile: OneToOneField relationship (user.profile)
@@ -62,6 +85,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     """
 
     email = models.EmailField(unique=True)
+    first_name = models.CharField(max_length=30, blank=True)
+    last_name = models.CharField(max_length=30, blank=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
@@ -89,6 +114,9 @@ class Profile(models.Model):
         bio: Optional biography text (max 500 chars, XSS protected in forms)
         pronouns: User's preferred pronouns (free text, max 50 chars)
         profile_picture: Optional profile image (uploaded to S3, moderated)
+        image_variants: Resized WebP/AVIF copies of the profile picture,
+            built in the background (see core.images)
+        image_blurhash: Blurhash placeholder for the profile picture
         moderation_status: PENDING/APPROVED/REJECTED status for profile images
         moderation_labels: AWS Rekognition labels if image rejected
         moderated_at: Timestamp of last moderation check
@@ -108,6 +136,7 @@ class Profile(models.Model):
 
     File Management:
         - Automatic cleanup of old profile pictures on replacement
+        - WebP/AVIF derivatives for responsive srcsets
         - ULID-based unique filenames for storage security
         - S3 storage with automatic deletion of unused files
         - Custom save() method handles file cleanup
@@ -143,6 +172,10 @@ class Profile(models.Model):
     profile_picture = models.ImageField(
         upload_to="profile_pictures/", blank=True, null=True
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_blurhash = models.CharField(
+        max_length=64, blank=True, default="", editable=False
+    )
 
     MOD_STATUS = (
         ("PENDING", "Pending"),
@@ -155,6 +188,13 @@ class Profile(models.Model):
     moderation_labels = models.JSONField(blank=True, null=True)
     moderated_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Typeahead lookups on username and display name
+            trigram_index("username", "profile_username_trgm_idx"),
+            trigram_index("display_name", "profile_display_trgm_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         """
         Custom save method to handle profile picture cleanup.
@@ -179,6 +219,10 @@ class Profile(models.Model):
             and old.profile_picture
             and old.profile_picture != self.profile_picture
         ):
+            # Derivatives never outlive the picture they were made from
+            delete_variants(
+                old.profile_picture.storage, old.profile_picture.name
+            )
             if not self.profile_picture:
                 # User cleared the image via the clear checkbox
                 old.profile_picture.delete(save=False)
@@ -189,5 +233,10 @@ class Profile(models.Model):
                 # User uploaded a new image, so remove the old file
                 old.profile_picture.delete(save=False)
 
+    @property
+    def image_sources(self):
+        """<source> type/srcset pairs for the picture derivatives."""
+        return image_sources(self.profile_picture.storage, self.image_variants)
+
     def __str__(self):
         return f"{self.username or self.user.email}'s Profile"
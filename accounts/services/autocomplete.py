@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+from django.urls import reverse
+
+from ..models import Profile
+
+# Suggestions returned per query
+AUTOCOMPLETE_LIMIT = 8
+# Longest query accepted; usernames are at most 30 characters
+AUTOCOMPLETE_MAX_LENGTH = 50
+# Below this length, match prefixes only; trigram substring matches on
+# one or two characters would hit most of the index
+SUBSTRING_MIN_LENGTH = 3
+
+# Columns the profile chip needs
+CHIP_VALUES = (
+    "username",
+    "display_name",
+    "profile_picture",
+    "moderation_status",
+)
+
+_URL_PLACEHOLDER = "__placeholder__"
+
+
+class PrefixCache:
+    """
+    Small thread-safe LRU cache with a per-entry TTL.
+
+    Keeps the hottest autocomplete prefixes in process memory. Entries
+    expire after `ttl` seconds, which bounds how long a renamed or
+    re-moderated profile can linger in suggestions on any worker.
+    """
+
+    def __init__(self, maxsize=512, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = PrefixCache()
+
+
+def _chip_serializer():
+    """Build a row -> chip dict function with URL prefixes resolved."""
+    profile_url = reverse("profile", args=[_URL_PLACEHOLDER])
+    storage = Profile._meta.get_field("profile_picture").storage
+
+    def serialize(row):
+        username = row["username"]
+        avatar = row["profile_picture"]
+        return {
+            "username": username,
+            "display_name": row["display_name"] or username,
+            "url": profile_url.replace(_URL_PLACEHOLDER, username),
+            # Same moderation rule as avatars in track_feed_api
+            "avatar": (
+                storage.url(avatar)
+                if (avatar and row["moderation_status"] == "APPROVED")
+                else None
+            ),
+        }
+
+    return serialize
+
+
+def _lookup(query):
+    if len(query) < SUBSTRING_MIN_LENGTH:
+        match = Q(username__istartswith=query) | Q(
+            display_name__istartswith=query
+        )
+    else:
+        match = Q(username__icontains=query) | Q(display_name__icontains=query)
+
+    # Prefix matches first, then shorter (closer) usernames
+    return (
+        Profile.objects.filter(match)
+        .annotate(
+            prefix_rank=Case(
+                When(username__istartswith=query, then=Value(0)),
+                When(display_name__istartswith=query, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("prefix_rank", Length("username"), "username")
+        .values(*CHIP_VALUES)[:AUTOCOMPLETE_LIMIT]
+    )
+
+
+def autocomplete_profiles(query):
+    """
+    Suggest profiles whose username or display name matches `query`.
+
+    Lookups compare UPPER(column::text), the expression the profile
+    trigram GIN indexes are built on, so they stay index scans at any
+    user count. Results for each normalized query are kept in an
+    in-process prefix cache.
+
+    Args:
+        query (str): Text typed so far
+
+    Returns:
+        list: Chip dicts with username, display_name, url and avatar
+    """
+    query = query.strip()[:AUTOCOMPLETE_MAX_LENGTH]
+    if not query:
+        return []
+
+    key = query.casefold()
+    results = _cache.get(key)
+    if results is None:
+        serialize = _chip_serializer()
+        results = [serialize(row) for row in _lookup(query)]
+        _cache.set(key, results)
+    return results
@@ -1 +1,34 @@
-# Create your tests here.
+from django.test import TestCase
+
+from .models import CustomUser, Profile
+from .services.autocomplete import _cache, autocomplete_profiles
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for username, display_name in (
+            ("sam_the_producer", "Sam P"),
+            ("samuel", "Samuel"),
+            ("sam", "Sam"),
+            ("basement_sam", "B"),
+            ("echo", "Samantha"),
+        ):
+            user = CustomUser.objects.create_user(
+                f"{username}@example.com", "pw"
+            )
+            Profile.objects.create(
+                user=user, username=username, display_name=display_name
+            )
+
+    def setUp(self):
+        _cache.clear()
+        self.addCleanup(_cache.clear)
+
+    def test_prefix_matches_first_then_shorter_usernames(self):
+        results = autocomplete_profiles("sam")
+
+        self.assertEqual(
+            [chip["username"] for chip in results],
+            ["sam", "samuel", "sam_the_producer", "echo", "basement_sam"],
+        )
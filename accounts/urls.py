@@ -14,6 +14,11 @@ urlpatterns = [
     path("profile/setup/", views.profile_setup, name="profile_setup"),
     path("custom-logout/", views.custom_logout, name="custom_logout"),
     path("profile/edit/", views.profile_edit, name="profile_edit"),
+    path(
+        "profiles/autocomplete/",
+        views.profile_autocomplete,
+        name="profile_autocomplete",
+    ),
     path("profile/<str:username>/", views.profile, name="profile"),
     path(
         "password-reset/",
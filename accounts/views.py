@@ -3,12 +3,14 @@ from django.contrib.auth import login, logout
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.core.mail import send_mail
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from tracks.models import Track
 
 from .forms import CustomUserCreationForm, ProfileForm
 from .models import Profile
+from .services.autocomplete import autocomplete_profiles
 
 
 # Create your views here.
@@ -185,6 +187,20 @@ def profile(request, username):
     return render(request, "accounts/profile.html", context)
 
 
+@login_required
+def profile_autocomplete(request):
+    """
+    JSON typeahead endpoint for finding profiles by username or
+    display name.
+
+    Returns up to eight matches for `?q=`, prefix matches first, with
+    only the fields needed to render a profile chip (username, display
+    name, profile URL and moderation-aware avatar URL).
+    """
+    results = autocomplete_profiles(request.GET.get("q", ""))
+    return JsonResponse({"results": results})
+
+
 class CustomPasswordResetView(auth_views.PasswordResetView):
     """Custom password reset view with branded from_email."""
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0004_comment_deleted"),
+        ("tracks", "0008_feed_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["track", "deleted", "created_at"],
+                name="comment_track_visible_idx",
+            ),
+        ),
+    ]
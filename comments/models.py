@@ -76,6 +76,13 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Track detail thread: visible comments in posting order
+            models.Index(
+                fields=["track", "deleted", "created_at"],
+                name="comment_track_visible_idx",
+            ),
+        ]
 
     def get_visible_replies(self):
         """Get non-deleted replies for this comment"""
@@ -2,6 +2,7 @@ from django.shortcuts import get_object_or_404, redirect
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
+from django.db import transaction
 from .models import Track
 from .models import Comment
 from .forms import CommentForm
@@ -70,17 +71,25 @@ def comment_delete(request, comment_id):
 
     # Check if this comment has replies
     has_replies = comment.replies.exists()
+    # Only a comment that is still visible counts towards the track total
+    was_visible = not comment.deleted
 
     if has_replies:
         # Soft delete: mark as deleted but keep replies visible
-        comment.deleted = True
-        comment.save()
+        with transaction.atomic():
+            comment.deleted = True
+            comment.save()
+            if was_visible:
+                comment.track.adjust_visible_comment_count(-1)
         delete_type = "soft"
         parent_cleanup = None
     else:
         # Hard delete: remove completely if no replies
         parent_comment = comment.parent
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            if was_visible:
+                comment.track.adjust_visible_comment_count(-1)
         delete_type = "hard"
 
         # Recursive cleanup of soft-deleted parents
@@ -145,7 +154,9 @@ def post_comment(request):
         comment = form.save(commit=False)
         comment.track = track
         comment.user = request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            track.adjust_visible_comment_count(1)
 
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             html = render_to_string(
@@ -0,0 +1,256 @@
+import io
+import math
+import posixpath
+
+import numpy as np
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Derivative widths in pixels. They cover 32-40px avatars and the
+# 100-240px feed artwork at 1x and 2x density, up to the track page.
+VARIANT_WIDTHS = (64, 128, 256, 512, 1024)
+
+# Encoder settings per derivative format, best compression first. AVIF
+# needs a Pillow build with libavif and is skipped without one.
+VARIANT_FORMATS = {
+    "avif": {"format": "AVIF", "quality": 55, "speed": 6},
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+}
+CONTENT_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+# Blurhash grid (x, y), swapped for portrait images. 4x3 components is
+# a 28 character string: enough for the colour layout of a cover.
+BLURHASH_COMPONENTS = (4, 3)
+# Longest side, in pixels, of the thumbnail a blurhash is computed from
+BLURHASH_SAMPLE_SIZE = 32
+_BASE83 = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+
+def variant_formats():
+    """Derivative formats the installed Pillow can encode."""
+    return [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+
+def variant_name(name, width, fmt):
+    """Storage name of one derivative, stored next to the original."""
+    stem = posixpath.splitext(name)[0]
+    return f"{stem}_{width}w.{fmt}"
+
+
+def _targets(width):
+    """
+    (nominal, actual) widths to produce for an image `width` wide.
+
+    Images are never upscaled: every nominal width below the original
+    is produced, plus the next one up at the original width.
+    """
+    targets = [(w, w) for w in VARIANT_WIDTHS if w < width]
+    larger = [w for w in VARIANT_WIDTHS if w >= width]
+    if larger:
+        targets.append((larger[0], width))
+    return targets
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    options = dict(VARIANT_FORMATS[fmt])
+    # EXIF (camera, GPS) and XMP are dropped: only pixels and the colour
+    # profile are written
+    image.save(
+        buffer,
+        options.pop("format"),
+        icc_profile=image.info.get("icc_profile"),
+        **options,
+    )
+    content = ContentFile(buffer.getvalue())
+    content.content_type = CONTENT_TYPES[fmt]
+    return content
+
+
+def build_variants(storage, name):
+    """
+    Write resized WebP (and AVIF, if supported) copies of the stored
+    image `name` next to it, at each of VARIANT_WIDTHS.
+
+    EXIF orientation is applied to the pixels before the metadata is
+    stripped. Derivatives that already exist are reused, so images
+    shared by content-addressed names are only encoded once.
+
+    Args:
+        storage (Storage): Storage holding the original
+        name (str): Storage name of the original image
+
+    Returns:
+        dict: {format: [[width, name], ...]} narrowest first, where
+        width is the derivative's real pixel width
+
+    Raises:
+        OSError: If the original cannot be read or decoded
+    """
+    formats = variant_formats()
+    with storage.open(name, "rb") as f:
+        image = Image.open(f)
+        # JPEG decoding can downscale by up to 8x for free
+        image.draft("RGB", (VARIANT_WIDTHS[-1], VARIANT_WIDTHS[-1]))
+        image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+    variants = {fmt: [] for fmt in formats}
+    for nominal, width in _targets(image.width):
+        resized = None
+        for fmt in formats:
+            target = variant_name(name, nominal, fmt)
+            if not storage.exists(target):
+                if resized is None:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image.resize(
+                        (width, height),
+                        Image.Resampling.LANCZOS,
+                        reducing_gap=3.0,
+                    )
+                target = storage.save(target, _encode(resized, fmt))
+            variants[fmt].append([width, target])
+    return variants
+
+
+def delete_variants(storage, name):
+    """Delete every derivative build_variants() could have made."""
+    if not name:
+        return
+    for fmt in VARIANT_FORMATS:
+        for width in VARIANT_WIDTHS:
+            storage.delete(variant_name(name, width, fmt))
+
+
+def image_sources(storage, variants):
+    """
+    <source> attributes for stored variants, best format first.
+
+    Returns:
+        list: [{"type": "image/avif", "srcset": "<url> 64w, ..."}, ...]
+    """
+    return [
+        {
+            "type": CONTENT_TYPES[fmt],
+            "srcset": ", ".join(
+                f"{storage.url(name)} {width}w" for width, name in entries
+            ),
+        }
+        for fmt in VARIANT_FORMATS
+        if (entries := (variants or {}).get(fmt))
+    ]
+
+
+def _base83(value, length):
+    return "".join(
+        _BASE83[value // 83 ** (length - 1 - i) % 83] for i in range(length)
+    )
+
+
+def _linear_to_srgb(value):
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def encode_blurhash(image, components=BLURHASH_COMPONENTS):
+    """
+    Encode a blurhash (https://blurha.sh) for a Pillow image.
+
+    The DCT over the downscaled, linear-light pixels is two matrix
+    products, so a hash costs well under a millisecond once decoded.
+
+    Returns:
+        str: The blurhash
+    """
+    image = image.convert("RGB")
+    image.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+    pixels = np.asarray(image, dtype=np.float64) / 255
+    # sRGB -> linear
+    pixels = np.where(
+        pixels <= 0.04045, pixels / 12.92, ((pixels + 0.055) / 1.055) ** 2.4
+    )
+    height, width, _ = pixels.shape
+    x_count, y_count = components
+    if height > width:
+        x_count, y_count = y_count, x_count
+
+    # Cosine basis per component and pixel column/row
+    basis_x = np.cos(
+        np.pi * np.outer(np.arange(x_count), np.arange(width)) / width
+    )
+    basis_y = np.cos(
+        np.pi * np.outer(np.arange(y_count), np.arange(height)) / height
+    )
+    factors = np.einsum("jy,ix,yxc->jic", basis_y, basis_x, pixels)
+    factors *= 2 / (width * height)
+    factors[0, 0] /= 2
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = _base83((x_count - 1) + (y_count - 1) * 9, 1)
+    if len(ac):
+        quantised = max(0, min(82, math.floor(np.abs(ac).max() * 166 - 0.5)))
+        maximum = (quantised + 1) / 166
+    else:
+        quantised, maximum = 0, 1
+    blurhash += _base83(quantised, 1)
+    r, g, b = (_linear_to_srgb(v) for v in dc)
+    blurhash += _base83((r << 16) + (g << 8) + b, 4)
+    levels = np.clip(
+        np.floor(np.sign(ac) * np.sqrt(np.abs(ac) / maximum) * 9 + 9.5), 0, 18
+    ).astype(int)
+    for r, g, b in levels:
+        blurhash += _base83(int(r * 19 * 19 + g * 19 + b), 2)
+    return blurhash
+
+
+def compute_blurhash(file):
+    """
+    Blurhash of an image file object, rewound afterwards so it can
+    still be saved.
+
+    Returns:
+        str: The blurhash, or "" if the file is not a readable image
+    """
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        image.draft("RGB", (BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+        return encode_blurhash(ImageOps.exif_transpose(image))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return ""
+    finally:
+        file.seek(0)
+
+
+def difference_hash(data):
+    """
+    64-bit difference hash (dHash) of encoded image bytes.
+
+    Each bit records whether a pixel of a 9x8 greyscale thumbnail is
+    brighter than its right-hand neighbour, so the hash survives
+    re-encoding, resizing and small colour changes. EXIF orientation
+    is applied first.
+
+    Returns:
+        int: Signed 64-bit hash (fits a BigIntegerField), or None if
+        the bytes are not a readable image
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("L", (64, 64))
+        image = ImageOps.exif_transpose(image).convert("L")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    pixels = np.asarray(
+        image.resize((9, 8), Image.Resampling.BOX), dtype=np.int16
+    )
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    value = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    return value - (1 << 64) if value >= 1 << 63 else value
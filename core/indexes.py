@@ -0,0 +1,36 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models
+
+
+class PortableGinIndex(GinIndex):
+    """
+    GIN index on PostgreSQL, plain index elsewhere.
+
+    Production runs on PostgreSQL, but local development and the test
+    suite may use SQLite, which has neither GIN nor operator classes.
+    There the same columns or expressions get an ordinary index under
+    the same name, so migrations (including SQLite's table rebuilds,
+    which recreate every index) run on both backends.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor == "postgresql":
+            return super().create_sql(model, schema_editor, using, **kwargs)
+        return self._fallback().create_sql(
+            model, schema_editor, using, **kwargs
+        )
+
+    def _fallback(self):
+        if not self.expressions:
+            return models.Index(fields=self.fields, name=self.name)
+        # Operator classes only exist on PostgreSQL; index the bare
+        # expression instead
+        expressions = [
+            (
+                expression.get_source_expressions()[0]
+                if isinstance(expression, OpClass)
+                else expression
+            )
+            for expression in self.expressions
+        ]
+        return models.Index(*expressions, name=self.name)
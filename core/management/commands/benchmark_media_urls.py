@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from core.storage import PublicMediaStorage
+
+SAMPLE_NAMES = [
+    "tracks/My First Bounce_01J8ZQ6Y3N4V7K2M5P8R1T4W6X.mp3",
+    "track_images/cover_01J8ZQ7A9B2C4D6E8F0G1H3J5K.jpg",
+    "profile_pictures/me (2)_01J8ZQ7Q1R3S5T7V9W0X2Y4Z6A.webp",
+]
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark media URL generation.
+
+    Compares the stock S3Boto3Storage.url with PublicMediaStorage.url
+    for the configured bucket settings, without any network access.
+
+    Usage:
+        python manage.py benchmark_media_urls --number 100000
+    """
+
+    help = "Benchmark per-URL cost of the media storage backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=100000)
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        stock = S3Boto3Storage()
+        fast = PublicMediaStorage()
+
+        for name in SAMPLE_NAMES:
+            if stock.url(name) != fast.url(name):
+                self.stderr.write(
+                    self.style.ERROR(f"URL mismatch for {name!r}")
+                )
+                return
+
+        results = {}
+        for label, storage in (("S3Boto3Storage", stock), ("Public", fast)):
+            seconds = timeit.timeit(
+                lambda: [storage.url(n) for n in SAMPLE_NAMES],
+                number=number,
+            )
+            results[label] = seconds * 1e9 / (number * len(SAMPLE_NAMES))
+            self.stdout.write(f"{label:<16}{results[label]:>10.0f} ns/url")
+
+        speedup = results["S3Boto3Storage"] / results["Public"]
+        self.stdout.write(self.style.SUCCESS(f"{speedup:.1f}x faster."))
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+from django.utils.encoding import filepath_to_uri
+from django.utils.functional import cached_property
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+@lru_cache(maxsize=4096)
+def _quoted_path(name):
+    """Percent-encode a storage name; hot names (avatars) repeat a lot."""
+    return filepath_to_uri(name)
+
+
+class PublicMediaStorage(S3Boto3Storage):
+    """
+    S3 storage with a fast path for public media URLs.
+
+    With AWS_QUERYSTRING_AUTH = False and AWS_S3_CUSTOM_DOMAIN set, a
+    media URL is just "https://<domain>/<location>/<name>". The parent
+    class rebuilds that string through name cleaning, path joining and
+    format() on every call, which adds up across feed items and comment
+    avatars. This class builds the prefix once per storage instance,
+    memoizes the percent-encoding of recently used names and only falls
+    back to the backend for signed or parameterised URLs.
+    """
+
+    @cached_property
+    def public_url_prefix(self):
+        """URL prefix for unsigned objects, or None if URLs are signed."""
+        if self.querystring_auth or not self.custom_domain:
+            return None
+        location = self.location.strip("/")
+        location = f"{location}/" if location else ""
+        return f"{self.url_protocol}//{self.custom_domain}/{location}"
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        prefix = self.public_url_prefix
+        if (
+            prefix is None
+            or parameters
+            or expire is not None
+            or http_method
+            # Leave anything needing normalisation to the backend
+            or name.startswith("/")
+            or "\\" in name
+            or ".." in name
+            or "./" in name
+        ):
+            return super().url(name, parameters, expire, http_method)
+        return prefix + _quoted_path(name)
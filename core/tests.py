@@ -1 +1,237 @@
-# Create your tests here.
+import hashlib
+import io
+import math
+
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from .images import _BASE83, compute_blurhash, encode_blurhash
+from .uploadhandlers import (
+    HEADER_BYTES,
+    InspectingMemoryFileUploadHandler,
+    InspectingTemporaryFileUploadHandler,
+    sniff_format,
+)
+
+
+def decode_base83(text):
+    value = 0
+    for char in text:
+        value = value * 83 + _BASE83.index(char)
+    return value
+
+
+def reference_blurhash(image, x_count, y_count):
+    """Per-pixel loops, as in the reference encoder (woltapp/blurhash)."""
+    width, height = image.size
+    pixels = [
+        [
+            tuple(
+                c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+                for c in (v / 255 for v in image.getpixel((x, y)))
+            )
+            for x in range(width)
+        ]
+        for y in range(height)
+    ]
+    factors = []
+    for j in range(y_count):
+        for i in range(x_count):
+            norm = 1 if i == j == 0 else 2
+            total = [0.0, 0.0, 0.0]
+            for y in range(height):
+                for x in range(width):
+                    basis = math.cos(math.pi * i * x / width) * math.cos(
+                        math.pi * j * y / height
+                    )
+                    for c in range(3):
+                        total[c] += basis * pixels[y][x][c]
+            factors.append([norm * t / (width * height) for t in total])
+    dc, ac = factors[0], factors[1:]
+
+    def base83(value, length):
+        return "".join(
+            _BASE83[value // 83 ** (length - 1 - k) % 83]
+            for k in range(length)
+        )
+
+    def to_srgb(value):
+        v = min(1.0, max(0.0, value))
+        if v <= 0.0031308:
+            return int(v * 12.92 * 255 + 0.5)
+        return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+    actual = max(abs(v) for factor in ac for v in factor)
+    quantised = max(0, min(82, math.floor(actual * 166 - 0.5)))
+    maximum = (quantised + 1) / 166
+    result = base83(x_count - 1 + (y_count - 1) * 9, 1)
+    result += base83(quantised, 1)
+    r, g, b = (to_srgb(v) for v in dc)
+    result += base83((r << 16) + (g << 8) + b, 4)
+    for factor in ac:
+        q = [
+            max(
+                0,
+                min(
+                    18,
+                    math.floor(
+                        math.copysign(math.sqrt(abs(v) / maximum), v) * 9 + 9.5
+                    ),
+                ),
+            )
+            for v in factor
+        ]
+        result += base83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return result
+
+
+class BlurhashTests(SimpleTestCase):
+    def test_matches_reference_encoder(self):
+        image = Image.new("RGB", (12, 9))
+        image.putdata(
+            [
+                (x * 20, y * 28, (x * y * 7) % 256)
+                for y in range(9)
+                for x in range(12)
+            ]
+        )
+
+        self.assertEqual(
+            encode_blurhash(image), reference_blurhash(image, 4, 3)
+        )
+
+    def test_solid_colour(self):
+        blurhash = encode_blurhash(Image.new("RGB", (64, 48), (200, 40, 90)))
+
+        # Size flag for 4x3 components, max AC, 4-char DC, then 11 ACs
+        self.assertEqual(len(blurhash), 1 + 1 + 4 + 2 * 11)
+        self.assertEqual(decode_base83(blurhash[0]), 3 + 2 * 9)
+        dc = decode_base83(blurhash[2:6])
+        self.assertEqual((dc >> 16, dc >> 8 & 255, dc & 255), (200, 40, 90))
+
+    def test_portrait_swaps_components(self):
+        blurhash = encode_blurhash(Image.new("RGB", (48, 64), "white"))
+
+        self.assertEqual(decode_base83(blurhash[0]), 2 + 3 * 9)
+
+    def test_detail_is_encoded(self):
+        image = Image.new("RGB", (64, 64), "black")
+        image.paste((255, 255, 255), (0, 0, 32, 64))
+
+        blurhash = encode_blurhash(image)
+
+        self.assertGreater(decode_base83(blurhash[1]), 0)
+        self.assertNotEqual(blurhash[6:], blurhash[6:8] * 11)
+
+    def test_compute_blurhash_rewinds_file(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (16, 16), "red").save(buffer, "PNG")
+        buffer.seek(5)
+
+        self.assertTrue(compute_blurhash(buffer))
+        self.assertEqual(buffer.tell(), 0)
+
+    def test_unreadable_image_gives_empty_hash(self):
+        buffer = io.BytesIO(b"not an image")
+
+        self.assertEqual(compute_blurhash(buffer), "")
+        self.assertEqual(buffer.tell(), 0)
+
+
+def mp4_header(brand, compatible=(), handlers=()):
+    """An ftyp box, then a moov box holding one hdlr box per handler."""
+    ftyp_body = brand + b"\0\0\0\0" + b"".join(compatible)
+    ftyp = (8 + len(ftyp_body)).to_bytes(4, "big") + b"ftyp" + ftyp_body
+    boxes = b"".join(
+        (32).to_bytes(4, "big") + b"hdlr" + b"\0" * 8 + handler + b"\0" * 12
+        for handler in handlers
+    )
+    moov = (8 + len(boxes)).to_bytes(4, "big") + b"moov" + boxes
+    return ftyp + moov
+
+
+class SniffFormatTests(SimpleTestCase):
+    def test_formats(self):
+        cases = {
+            b"\xff\xd8\xff\xe0": "jpeg",
+            b"\x89PNG\r\n\x1a\n": "png",
+            b"RIFF\0\0\0\0WEBPVP8 ": "webp",
+            b"RIFF\0\0\0\0WAVEfmt ": "wav",
+            b"fLaC\0\0\0\x22": "flac",
+            b"OggS\0\x02": "ogg",
+            b"\xff\xf1\x50\x80": "aac",
+            b"ID3\x04\0": "mp3",
+            b"\xff\xfb\x90\x64": "mp3",
+            b"%PDF-1.7": None,
+            b"": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(sniff_format(header), expected)
+
+    def test_mp4_brands(self):
+        cases = [
+            (mp4_header(b"M4A "), "m4a"),
+            (mp4_header(b"M4B "), "m4a"),
+            (mp4_header(b"mp42", compatible=[b"isom", b"M4A "]), "m4a"),
+            (mp4_header(b"isom", handlers=[b"soun"]), "m4a"),
+            (mp4_header(b"mp42", handlers=[b"vide", b"soun"]), None),
+            # moov after the header: a generic brand cannot be checked
+            (mp4_header(b"mp42"), None),
+            (mp4_header(b"qt  ", handlers=[b"soun"]), None),
+            (mp4_header(b"heic"), None),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header[:24]):
+                self.assertEqual(sniff_format(header), expected)
+
+
+class InspectingUploadHandlerTests(SimpleTestCase):
+    data = b"ID3\x04\0" + bytes(range(256)) * 400
+
+    def upload(self, handler_class, data=None, chunk_size=4096):
+        data = self.data if data is None else data
+        handler = handler_class()
+        handler.handle_raw_input(None, {}, len(data), "boundary")
+        try:
+            handler.new_file("audio_file", "song.mp3", "audio/mpeg", len(data))
+        except StopFutureHandlers:
+            # The memory handler claims uploads it will keep
+            pass
+        for start in range(0, len(data), chunk_size):
+            handler.receive_data_chunk(data[start:][:chunk_size], start)
+        return handler.file_complete(len(data))
+
+    def test_handlers_hash_and_sniff_in_one_pass(self):
+        for handler_class in (
+            InspectingMemoryFileUploadHandler,
+            InspectingTemporaryFileUploadHandler,
+        ):
+            with self.subTest(handler_class.__name__):
+                file = self.upload(handler_class)
+
+                self.assertEqual(
+                    file.sha256, hashlib.sha256(self.data).hexdigest()
+                )
+                self.assertEqual(file.sniffed_format, "mp3")
+                self.assertEqual(file.upload_header, self.data[:HEADER_BYTES])
+                self.assertFalse(file.exceeds_limit)
+                file.seek(0)
+                self.assertEqual(file.read(), self.data)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_large_upload_is_left_to_the_temporary_handler(self):
+        handler = InspectingMemoryFileUploadHandler()
+        handler.handle_raw_input(None, {}, len(self.data), "boundary")
+
+        self.assertFalse(handler._inspecting())
+
+    @override_settings(UPLOAD_MAX_SIZES={"audio_file": 10000})
+    def test_oversized_upload_stops_buffering(self):
+        file = self.upload(InspectingTemporaryFileUploadHandler)
+
+        self.assertTrue(file.exceeds_limit)
+        self.assertIsNone(file.sha256)
+        self.assertEqual(file.size, len(self.data))
+        self.assertLessEqual(file.file.tell(), 10000)
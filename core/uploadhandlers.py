@@ -0,0 +1,170 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+# Bytes kept from the start of each upload for format sniffing and
+# header-only metadata parsing (WAV/FLAC duration)
+HEADER_BYTES = 64 * 1024
+
+# Accepted audio formats (sniffed format names, which are also the file
+# extensions) and the Content-Type their stored objects are served with
+AUDIO_CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "m4a": "audio/mp4",
+    "aac": "audio/aac",
+    "ogg": "audio/ogg",
+}
+
+# ISO base media (MP4) major brands that always mean an audio-only file
+M4A_BRANDS = {b"M4A ", b"M4B ", b"M4P ", b"F4A ", b"F4B "}
+# Generic MP4 brands that may hold audio or video; accepted only when the
+# header shows an audio file (see _is_mp4_audio)
+GENERIC_MP4_BRANDS = {b"isom", b"iso2", b"mp41", b"mp42", b"dash"}
+
+
+def _is_mp4_audio(header):
+    """
+    Check an ISO base media header (`ftyp` box first) for an audio file.
+
+    Audio-only major brands are accepted outright. Generic brands are
+    accepted when an audio brand is listed as compatible, or when the
+    track handlers in the header include sound and no video.
+    """
+    brand = header[8:12]
+    if brand in M4A_BRANDS:
+        return True
+    if brand not in GENERIC_MP4_BRANDS:
+        return False
+    ftyp_size = int.from_bytes(header[:4], "big")
+    compatible = header[16:ftyp_size]
+    brands = {compatible[i:][:4] for i in range(0, len(compatible), 4)}
+    if brands & M4A_BRANDS:
+        return True
+    # hdlr payload: version/flags (4), pre_defined (4), handler type (4)
+    handlers = set()
+    start = header.find(b"hdlr")
+    while start != -1:
+        handlers.add(header[start:][12:16])
+        start = header.find(b"hdlr", start + 4)
+    return b"soun" in handlers and b"vide" not in handlers
+
+
+def sniff_format(header):
+    """
+    Identify an upload from its leading bytes instead of trusting the
+    client-supplied content type.
+
+    Args:
+        header (bytes): First bytes of the file
+
+    Returns:
+        str: One of "jpeg", "png", "webp", "wav", "flac", "ogg", "m4a",
+        "aac" or "mp3", or None if the format is not recognised
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header.startswith(b"fLaC"):
+        return "flac"
+    if header.startswith(b"OggS"):
+        return "ogg"
+    if header[4:8] == b"ftyp":
+        return "m4a" if _is_mp4_audio(header) else None
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xF6 == 0xF0:
+        # ADTS frame sync with layer bits 00
+        return "aac"
+    if header.startswith(b"ID3"):
+        return "mp3"
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        # MPEG audio frame sync
+        return "mp3"
+    return None
+
+
+class InspectingUploadMixin:
+    """
+    Inspect file uploads while Django streams them to memory or disk.
+
+    Each chunk is hashed and the first HEADER_BYTES are kept as it
+    arrives, so no caller has to read the file again. A per-field size
+    limit (settings.UPLOAD_MAX_SIZES) stops buffering as soon as it is
+    passed; the file's `size` still reports the full length received,
+    so the forms' size validation rejects it with their usual message.
+
+    The finished file object gains:
+        sha256 (str): Hex digest of the content (None if over limit)
+        sniffed_format (str): Result of sniff_format(), or None
+        upload_header (bytes): The first HEADER_BYTES of content
+        exceeds_limit (bool): True if the field's size limit was passed
+    """
+
+    def _inspecting(self):
+        return True
+
+    def new_file(self, field_name, *args, **kwargs):
+        # Reset state first: the memory handler's new_file() raises
+        # StopFutureHandlers once it takes the upload
+        self._sha256 = hashlib.sha256()
+        self._header = bytearray()
+        self._received = 0
+        self._limit = getattr(settings, "UPLOAD_MAX_SIZES", {}).get(field_name)
+        self._exceeds_limit = False
+        super().new_file(field_name, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._inspecting():
+            return super().receive_data_chunk(raw_data, start)
+
+        self._received += len(raw_data)
+        if self._exceeds_limit or (
+            self._limit is not None and self._received > self._limit
+        ):
+            # Swallow the rest rather than buffering an oversized file
+            self._exceeds_limit = True
+            return None
+
+        self._sha256.update(raw_data)
+        missing = HEADER_BYTES - len(self._header)
+        if missing > 0:
+            self._header += raw_data[:missing]
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            header = bytes(self._header)
+            file.sha256 = (
+                None if self._exceeds_limit else self._sha256.hexdigest()
+            )
+            file.sniffed_format = sniff_format(header)
+            file.upload_header = header
+            file.exceeds_limit = self._exceeds_limit
+        return file
+
+
+class InspectingMemoryFileUploadHandler(
+    InspectingUploadMixin, MemoryFileUploadHandler
+):
+    """MemoryFileUploadHandler with single-pass upload inspection."""
+
+    def _inspecting(self):
+        # Only inspect uploads this handler keeps; larger ones pass
+        # through to the temporary file handler, which inspects them
+        return self.activated
+
+
+class InspectingTemporaryFileUploadHandler(
+    InspectingUploadMixin, TemporaryFileUploadHandler
+):
+    """TemporaryFileUploadHandler with single-pass upload inspection."""
@@ -1,6 +1,8 @@
 import requests
 import os
 
+from ulid import ULID
+
 PERSPECTIVE_API_KEY = os.environ.get("PERSPECTIVE_API_KEY")
 PERSPECTIVE_API_URL = (
     "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
@@ -31,3 +33,25 @@ def get_toxicity_score(text):
     response.raise_for_status()
     result = response.json()
     return result["attributeScores"]["TOXICITY"]["summaryScore"]["value"]
+
+
+def sanitize_upload_name(filename, fallback):
+    """
+    Build a safe, unique storage filename following OWASP upload
+    guidance (prevents path traversal and filesystem attacks).
+
+    Keeps at most 30 alphanumeric/safe punctuation characters of the
+    original stem and appends a ULID for uniqueness.
+
+    Args:
+        filename (str): Client-supplied filename
+        fallback (str): Stem to use when nothing safe remains
+
+    Returns:
+        str: e.g. "My Song_01J9Z...Q.mp3"
+    """
+    name, ext = os.path.splitext(os.path.basename(filename))
+    # Allow only alphanumeric characters and safe punctuation
+    safe_name = "".join(c for c in name if c.isalnum() or c in " -_()[]")
+    safe_name = safe_name.strip()[:30] or fallback
+    return f"{safe_name}_{ULID()}{ext}"
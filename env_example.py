@@ -13,24 +13,62 @@ os.environ.setdefault("SECRET_KEY", "your-50-character-secret-key-here")
 os.environ.setdefault("DEBUG", "True")  # Set to False for production
 os.environ.setdefault("DATABASE_URL", "your-database-url-here")
 
+# Cache (optional - shared Redis cache for feed pages)
+os.environ.setdefault("REDIS_URL", "")  # e.g. redis://localhost:6379/0
+os.environ.setdefault("FEED_CACHE_TIMEOUT", "60")  # Seconds
+
+# Background processing (post-upload audio metadata extraction)
+os.environ.setdefault("BACKGROUND_WORKERS", "2")  # Threads per process
+os.environ.setdefault("BACKGROUND_TASKS_EAGER", "False")  # True = inline
+os.environ.setdefault("FFMPEG_BINARY", "ffmpeg")  # Waveform decoder
+
 # AWS S3 Storage Configuration
 os.environ.setdefault("AWS_ACCESS_KEY_ID", "your-aws-access-key-id")
 os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "your-aws-secret-access-key")
+# Optional local S3 stand-in, e.g. moto_server on http://localhost:5000
+os.environ.setdefault("AWS_S3_ENDPOINT_URL", "")
+# Audio above this size (bytes) uploads directly to S3 in parts
+os.environ.setdefault("DIRECT_UPLOAD_THRESHOLD", "10485760")
+# "direct" (S3 multipart) or "resumable" (chunked to the web server)
+os.environ.setdefault("LARGE_UPLOAD_METHOD", "direct")
+# Partial files for resumable uploads; defaults to the system temp dir
+os.environ.setdefault("UPLOAD_SESSION_DIR", "")
+# Disk cache for the audio stream endpoint; defaults to the temp dir
+os.environ.setdefault("AUDIO_CACHE_DIR", "")
+os.environ.setdefault("AUDIO_CACHE_MAX_BYTES", "1073741824")  # 1 GB
 
 # Email Configuration (Gmail SMTP)
 os.environ.setdefault("EMAIL_HOST_USER", "your-email@gmail.com")
 os.environ.setdefault("EMAIL_HOST_PASSWORD", "your-gmail-app-password")
 
 # Google OAuth Configuration
-os.environ.setdefault("SOCIAL_AUTH_GOOGLE_OAUTH2_KEY", "your-google-oauth-client-id")
-os.environ.setdefault("SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET", "your-google-oauth-client-secret")
+os.environ.setdefault(
+    "SOCIAL_AUTH_GOOGLE_OAUTH2_KEY", "your-google-oauth-client-id"
+)
+os.environ.setdefault(
+    "SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET", "your-google-oauth-client-secret"
+)
 
 # Google Perspective API (Content Moderation)
 os.environ.setdefault("PERSPECTIVE_API_KEY", "your-google-perspective-api-key")
 
 # AWS Rekognition Configuration
-os.environ.setdefault("AWS_REGION", "eu-west-1")  # Default fallback in settings
+os.environ.setdefault(
+    "AWS_REGION", "eu-west-1"
+)  # Default fallback in settings
 os.environ.setdefault("IMAGE_MODERATION_ENABLED", "true")  # true/false
-os.environ.setdefault("REKOG_MIN_CONFIDENCE", "80")  # Confidence threshold (0-100)
+os.environ.setdefault(
+    "REKOG_MIN_CONFIDENCE", "80"
+)  # Confidence threshold (0-100)
+os.environ.setdefault(
+    "IMAGE_MODERATION_CACHE", "true"
+)  # Reuse verdicts for previously scanned images
+os.environ.setdefault("IMAGE_MODERATION_RETRIES", "5")  # Failed scan retries
+os.environ.setdefault("IMAGE_MODERATION_RETRY_DELAY", "30")  # Seconds
+os.environ.setdefault("REKOG_CONNECT_TIMEOUT", "2")  # Seconds
+os.environ.setdefault("REKOG_READ_TIMEOUT", "10")  # Seconds
+os.environ.setdefault("REKOG_MAX_ATTEMPTS", "3")  # Including the first call
+os.environ.setdefault("REKOG_MAX_POOL_SIZE", "10")  # Connections per process
+os.environ.setdefault("REKOG_WARM_UP", "false")  # Build client at worker boot
 os.environ.setdefault("REKOGNITION_ACCESS_KEY", "your-rekognition-access-key")
-os.environ.setdefault("REKOGNITION_SECRET", "your-rekognition-secret")
\ No newline at end of file
+os.environ.setdefault("REKOGNITION_SECRET", "your-rekognition-secret")
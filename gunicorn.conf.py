@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration, loaded automatically from the working
+directory (see Procfile). Command-line flags and GUNICORN_CMD_ARGS
+still override it.
+"""
+
+import os
+
+# Threaded workers: audio is streamed through Django (track_stream,
+# track_hls), and a sync worker would be held by one listener for the
+# whole response
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+
+def post_worker_init(worker):
+    """
+    Runs in each worker once the app is loaded, with or without
+    --preload. Clients inherited over fork() are discarded by
+    os.register_at_fork hooks, so anything built here belongs to this
+    worker alone.
+    """
+    from django.conf import settings
+
+    if getattr(settings, "REKOG_WARM_UP", False):
+        from tracks.services.moderation import warm_up_client
+
+        warm_up_client()
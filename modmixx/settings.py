@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # Full-text search, trigram indexes
     "django.contrib.sites",  # Required for django-allauth
     "allauth",  # Django Allauth for authentication
     "allauth.account",  # Django Allauth for account management
@@ -110,6 +112,49 @@ AUTHENTICATION_BACKENDS = [
 
 DATABASES = {"default": dj_database_url.parse(os.environ.get("DATABASE_URL"))}
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared Redis cache when REDIS_URL is set so feed invalidation
+# reaches every dyno/worker; otherwise fall back to a per-process cache,
+# where FEED_CACHE_TIMEOUT bounds how stale other workers can get.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a serialized feed page stays cached
+FEED_CACHE_TIMEOUT = int(os.environ.get("FEED_CACHE_TIMEOUT", "60"))
+
+# In-process background tasks (post-upload audio processing)
+# Threads per worker process; eager mode runs tasks inline instead
+BACKGROUND_WORKERS = int(os.environ.get("BACKGROUND_WORKERS", "2"))
+BACKGROUND_TASKS_EAGER = os.environ.get("BACKGROUND_TASKS_EAGER") == "True"
+# Decoder for waveform extraction; on Heroku add an ffmpeg buildpack
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+# Uploads stream through handlers that hash, sniff and size-check each
+# file in a single pass (see core.uploadhandlers)
+FILE_UPLOAD_HANDLERS = [
+    "core.uploadhandlers.InspectingMemoryFileUploadHandler",
+    "core.uploadhandlers.InspectingTemporaryFileUploadHandler",
+]
+
+# Per-field upload limits; bytes past the limit are never buffered
+UPLOAD_MAX_SIZES = {
+    "audio_file": 100 * 1024 * 1024,
+    "track_image": 10 * 1024 * 1024,
+    "profile_picture": 20 * 1024 * 1024,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -244,10 +289,42 @@ AWS_S3_CUSTOM_DOMAIN = (
     f"{AWS_STORAGE_BUCKET_NAME}.s3.{AWS_S3_REGION_NAME}.amazonaws.com"
 )
 
+# Optional S3-compatible endpoint, e.g. a local moto server for testing
+AWS_S3_ENDPOINT_URL = os.environ.get("AWS_S3_ENDPOINT_URL") or None
+
 # AWS S3 settings
 AWS_DEFAULT_ACL = ""
 AWS_QUERYSTRING_AUTH = False  # Clean public URLs
 
+# How the browser sends audio above DIRECT_UPLOAD_THRESHOLD:
+# "direct" (presigned S3 multipart) or "resumable" (chunked to this
+# server, resumed after disconnects, then stored as a regular upload)
+LARGE_UPLOAD_METHOD = os.environ.get("LARGE_UPLOAD_METHOD", "direct")
+
+# Resumable upload sessions: chunk size hint for clients, and the local
+# directory partial files are written to. Sessions are tied to the
+# process's disk, so multi-instance deployments need session affinity.
+RESUMABLE_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_SESSION_DIR = os.environ.get("UPLOAD_SESSION_DIR") or os.path.join(
+    tempfile.gettempdir(), "modmixx-uploads"
+)
+
+# Local disk cache behind the /tracks/<slug>/stream/ endpoint. Bounded
+# by total size; least recently played files are evicted first.
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "modmixx-audio-cache"
+)
+AUDIO_CACHE_MAX_BYTES = int(
+    os.environ.get("AUDIO_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+
+# Audio files larger than this (bytes) are sent by the browser straight
+# to S3 as presigned multipart parts. The bucket's CORS rules must allow
+# PUT from the site origin and expose the ETag header.
+DIRECT_UPLOAD_THRESHOLD = int(
+    os.environ.get("DIRECT_UPLOAD_THRESHOLD", str(10 * 1024 * 1024))
+)
+
 # Use S3 for all media files
 DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
 
@@ -257,7 +334,8 @@ MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/"
 # Django 5 storage config
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        # S3Boto3Storage with a memoized prefix for public media URLs
+        "BACKEND": "core.storage.PublicMediaStorage",
     },
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
@@ -273,6 +351,25 @@ IMAGE_MODERATION_ENABLED = (
     os.environ.get("IMAGE_MODERATION_ENABLED", "true").lower() == "true"
 )
 REKOG_MIN_CONFIDENCE = int(os.environ.get("REKOG_MIN_CONFIDENCE", "80"))
+# Reuse stored verdicts for images scanned before (ModerationVerdict)
+IMAGE_MODERATION_CACHE = (
+    os.environ.get("IMAGE_MODERATION_CACHE", "true").lower() == "true"
+)
+
+# Uploaded images are scanned in the background; failed scans are
+# retried this many times, backing off from the delay (seconds)
+IMAGE_MODERATION_RETRIES = int(os.environ.get("IMAGE_MODERATION_RETRIES", "5"))
+IMAGE_MODERATION_RETRY_DELAY = int(
+    os.environ.get("IMAGE_MODERATION_RETRY_DELAY", "30")
+)
+# Rekognition client: timeouts in seconds, attempts include the first
+# call, and the pool is shared by every thread in a worker process
+REKOG_CONNECT_TIMEOUT = float(os.environ.get("REKOG_CONNECT_TIMEOUT", "2"))
+REKOG_READ_TIMEOUT = float(os.environ.get("REKOG_READ_TIMEOUT", "10"))
+REKOG_MAX_ATTEMPTS = int(os.environ.get("REKOG_MAX_ATTEMPTS", "3"))
+REKOG_MAX_POOL_SIZE = int(os.environ.get("REKOG_MAX_POOL_SIZE", "10"))
+# Build the client when a gunicorn worker boots (gunicorn.conf.py)
+REKOG_WARM_UP = os.environ.get("REKOG_WARM_UP", "false").lower() == "true"
 
 # Rekognition credentials
 REKOGNITION_ACCESS_KEY = os.environ.get("REKOGNITION_ACCESS_KEY")
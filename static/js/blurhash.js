@@ -0,0 +1,113 @@
+/* jshint esversion: 11, esnext: false */
+/**
+ * Blurhash placeholders
+ *
+ * Paints <img data-blurhash="..."> with a blurred preview of the image
+ * (https://blurha.sh) until the real file has loaded, so lazy-loaded
+ * artwork and avatars never flash in as blank boxes. Hashes are
+ * computed by the server on upload (core.images.encode_blurhash).
+ */
+(function () {
+  const DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+  // Decoded preview size; the browser scales it up smoothly
+  const PREVIEW_SIZE = 32;
+  const previews = new Map();  // hash -> data URL
+
+  function decode83(str) {
+    let value = 0;
+    for (const c of str) value = value * 83 + DIGITS.indexOf(c);
+    return value;
+  }
+
+  function srgbToLinear(value) {
+    const v = value / 255;
+    return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+  }
+
+  function linearToSrgb(value) {
+    const v = Math.max(0, Math.min(1, value));
+    return v <= 0.0031308
+      ? Math.trunc(v * 12.92 * 255 + 0.5)
+      : Math.trunc((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255 + 0.5);
+  }
+
+  function signPow(value, exp) {
+    return Math.sign(value) * Math.pow(Math.abs(value), exp);
+  }
+
+  /**
+   * Decode a blurhash into RGBA pixels of the given size
+   */
+  function decodeBlurhash(hash, width, height) {
+    const size = decode83(hash[0]);
+    const ny = Math.floor(size / 9) + 1;
+    const nx = (size % 9) + 1;
+    if (hash.length !== 4 + 2 * nx * ny) throw new Error('Invalid blurhash');
+
+    const maxValue = (decode83(hash[1]) + 1) / 166;
+    const colors = [];
+    const dc = decode83(hash.substring(2, 6));
+    colors.push([srgbToLinear(dc >> 16), srgbToLinear((dc >> 8) & 255), srgbToLinear(dc & 255)]);
+    for (let i = 1; i < nx * ny; i++) {
+      const ac = decode83(hash.substring(4 + i * 2, 6 + i * 2));
+      colors.push([Math.floor(ac / 361), Math.floor(ac / 19) % 19, ac % 19]
+        .map(q => signPow((q - 9) / 9, 2) * maxValue));
+    }
+
+    const pixels = new Uint8ClampedArray(width * height * 4);
+    for (let y = 0; y < height; y++) {
+      for (let x = 0; x < width; x++) {
+        let r = 0, g = 0, b = 0;
+        for (let j = 0; j < ny; j++) {
+          const basisY = Math.cos((Math.PI * y * j) / height);
+          for (let i = 0; i < nx; i++) {
+            const basis = Math.cos((Math.PI * x * i) / width) * basisY;
+            const color = colors[i + j * nx];
+            r += color[0] * basis;
+            g += color[1] * basis;
+            b += color[2] * basis;
+          }
+        }
+        const offset = 4 * (x + y * width);
+        pixels[offset] = linearToSrgb(r);
+        pixels[offset + 1] = linearToSrgb(g);
+        pixels[offset + 2] = linearToSrgb(b);
+        pixels[offset + 3] = 255;
+      }
+    }
+    return pixels;
+  }
+
+  function previewUrl(hash) {
+    if (!previews.has(hash)) {
+      const canvas = document.createElement('canvas');
+      canvas.width = canvas.height = PREVIEW_SIZE;
+      const ctx = canvas.getContext('2d');
+      const image = ctx.createImageData(PREVIEW_SIZE, PREVIEW_SIZE);
+      image.data.set(decodeBlurhash(hash, PREVIEW_SIZE, PREVIEW_SIZE));
+      ctx.putImageData(image, 0, 0);
+      previews.set(hash, canvas.toDataURL());
+    }
+    return previews.get(hash);
+  }
+
+  function initBlurhashes(root = document) {
+    root.querySelectorAll('img[data-blurhash]:not([data-blurhash-bound])').forEach(img => {
+      img.setAttribute('data-blurhash-bound', '1');
+      if (img.complete && img.naturalWidth) return;  // Already loaded
+      try {
+        img.style.backgroundImage = `url(${previewUrl(img.dataset.blurhash)})`;
+      } catch (err) {
+        return;  // Malformed hash: no placeholder
+      }
+      img.style.backgroundSize = 'cover';
+      img.addEventListener('load', () => {
+        img.style.backgroundImage = '';
+      }, { once: true });
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', () => initBlurhashes(document));
+  window.initBlurhashes = initBlurhashes;
+  window.decodeBlurhash = decodeBlurhash;
+})();
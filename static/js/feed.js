@@ -2,13 +2,14 @@
 /*
   Track Feed Infinite Scroll & Audio Management
 
-  - Loads more tracks from /tracks/feed-api/?page=N as you scroll (IntersectionObserver or scroll fallback)
+  - Loads more tracks from /tracks/feed-api/?cursor=C as you scroll (IntersectionObserver or scroll fallback)
   - Only one audio track plays at a time
   - Accessibility: screen reader announcements, "Back to top" button
-  - First page is server-side rendered (SSR); JS loads from page 2 onward
+  - First page is server-side rendered (SSR); JS continues from its next_cursor
 
   Backend API:
-    /tracks/feed-api/?page=N (returns { tracks: [...], has_next: boolean })
+    /tracks/feed-api/?cursor=C (returns { tracks: [...], has_next: boolean, next_cursor: string|null })
+    /tracks/feed-api/?page=N is still accepted for older clients
 
   Template requirements:
     track-feed, loading, feed-sentinel, sr-announcer, backToTop
@@ -30,7 +31,7 @@
  * - Accessibility features (screen reader announcements, back to top)
  * 
  * API Integration:
- * - Fetches from /tracks/feed-api/?page=N
+ * - Fetches from /tracks/feed-api/?cursor=C (keyset pagination)
  * - Seamless integration between server-rendered and dynamic content
  */
 
@@ -41,7 +42,7 @@ let currentTrackSlug = null; // Slug of the currently playing track
 // Get initial pagination info from the HTML template
 const feedEl = document.getElementById('track-feed');
 let hasNext = feedEl?.dataset.hasNext === 'true';  // Are there more pages to load?
-let page = parseInt(feedEl?.dataset.nextPage || '2', 10);  // Next page number to fetch
+let nextCursor = feedEl?.dataset.nextCursor || null;  // Opaque cursor for the next page
 let loading = false; // Prevent multiple API calls at once
 let ioRef = null; // Reference to the IntersectionObserver (for cleanup)
 
@@ -59,12 +60,32 @@ function escapeHtml(s) {
 }
 
 
+// Rendered artwork widths, matching the breakpoints in tracks.css
+const ARTWORK_SIZES = '(min-width: 1400px) 200px, (min-width: 1200px) 150px, (min-width: 768px) 180px, (min-width: 576px) 100px, 240px';
+
+/**
+ * Wrap an <img> in a <picture> offering the WebP/AVIF derivatives
+ * from the API (image_sources / avatar_sources)
+ */
+function buildPictureHTML(sources, sizes, img) {
+  if (!sources || !sources.length) return img;
+  const tags = sources.map(s => `<source type="${escapeHtml(s.type)}" srcset="${escapeHtml(s.srcset)}" sizes="${sizes}">`).join('');
+  return `<picture class="responsive-image">${tags}${img}</picture>`;
+}
+
+/**
+ * data-blurhash attribute for a placeholder painted by blurhash.js
+ */
+function blurhashAttr(hash) {
+  return hash ? ` data-blurhash="${escapeHtml(hash)}"` : '';
+}
+
 /**
  * Build the user avatar HTML (profile pic or initial badge)
  */
 function buildAvatarHTML(profile) {
   if (profile.avatar) {
-    return `<img src="${profile.avatar}" class="rounded-circle me-2" alt="${escapeHtml(profile.display_name)}" style="width:32px;height:32px;object-fit:cover">`;
+    return buildPictureHTML(profile.avatar_sources, '32px', `<img src="${profile.avatar}" class="rounded-circle me-2" alt="${escapeHtml(profile.display_name)}" style="width:32px;height:32px;object-fit:cover" loading="lazy"${blurhashAttr(profile.avatar_blurhash)}>`);
   }
   // Fallback: show first letter of display name in a circle
   const initial = (profile.display_name || profile.username || '?').trim().charAt(0).toUpperCase();
@@ -89,10 +110,25 @@ function truncateWords(text, wordCount = 10) {
  */
 function buildCard(t) {
   const avatar = buildAvatarHTML(t.profile);
-  const image = t.image_url ? `<img src="${t.image_url}" class="track-artwork" alt="Cover art for ${escapeHtml(t.title)}">` : `<div class="track-artwork-placeholder"><i class="fas fa-music"></i></div>`;
+  const image = t.image_url
+    ? buildPictureHTML(t.image_sources, ARTWORK_SIZES, `<img src="${t.image_url}" class="track-artwork" alt="Cover art for ${escapeHtml(t.title)}" loading="lazy"${blurhashAttr(t.image_blurhash)}>`)
+    : `<div class="track-artwork-placeholder"><i class="fas fa-music"></i></div>`;
 
   // t.comment_count (from API) not t.visible_comment_count!
   const commentCount = t.comment_count || 0;
+  // Duration and metadata are still being extracted in the background
+  const processing = (t.processing_status === 'PENDING' || t.processing_status === 'PROCESSING')
+    ? '<small class="text-muted d-block mt-1"><i class="fa fa-spinner fa-spin me-1"></i>Processing audio…</small>'
+    : '';
+  // Browsers with native HLS (Safari, mobile) pick the adaptive stream;
+  // the rest fall through to the original file via the stream endpoint
+  const hls = t.hls_url ? `<source src="${t.hls_url}" type="application/vnd.apple.mpegurl">\n                ` : '';
+  // Loudness normalization volume, applied by AudioManager on play
+  const gain = (t.gain !== null && t.gain !== undefined) ? ` data-gain="${t.gain}"` : '';
+  // Peaks are drawn by waveform.js; the audio itself loads on play
+  const waveform = t.waveform
+    ? `<canvas class="track-waveform" data-waveform="${t.waveform}" aria-hidden="true"></canvas>`
+    : '';
   const commentText = (commentCount === 0) ? 'No comments yet' : (commentCount === 1) ? '1 comment' : `${commentCount} comments`;
 
   return `
@@ -119,11 +155,13 @@ function buildCard(t) {
               ${t.description ? truncateWords(escapeHtml(t.description), 10) : ''}
             </p>
             <div class="track-audio-section">
-              <audio controls preload="metadata" class="w-100"
-                     data-track-slug="${t.slug}"
+              ${waveform}
+              <audio controls preload="${t.waveform ? 'none' : 'metadata'}" class="w-100"
+                     data-track-slug="${t.slug}"${gain}
                      aria-label="Play ${escapeHtml(t.title)} by ${escapeHtml(t.profile.display_name)}">
-                <source src="${t.audio_url}" type="audio/mpeg">
+                ${hls}<source src="${t.stream_url}" type="audio/mpeg">
               </audio>
+              ${processing}
               <div class="mt-2">
                 <a href="${t.detail_url}#comments" class="text-decoration-none text-muted">
                   <i class="fa fa-comment me-1"></i>${commentText}
@@ -168,7 +206,8 @@ async function loadMore() {
   if (loadingEl) loadingEl.style.display = 'block';
 
   try {
-    const res = await fetch(`/tracks/feed-api/?page=${page}`, { headers: { 'Accept': 'application/json' } });
+    const query = nextCursor ? `?cursor=${encodeURIComponent(nextCursor)}` : '';
+    const res = await fetch(`/tracks/feed-api/${query}`, { headers: { 'Accept': 'application/json' } });
     if (!res.ok) throw new Error('Network error');
     const data = await res.json();
 
@@ -184,12 +223,14 @@ async function loadMore() {
       seenSlugs.add(t.slug);  // Remember this track so it's not added again
     });
 
-    // Set up audio event listeners for the new tracks
+    // Set up audio event listeners, waveforms and placeholders for the new tracks
     bindAudioEvents(container);
+    window.initWaveforms?.(container);
+    window.initBlurhashes?.(container);
 
     // Update pagination state
-    hasNext = !!data.has_next;
-    page += 1;
+    hasNext = !!data.has_next && !!data.next_cursor;
+    nextCursor = data.next_cursor;
 
     // Announce to screen readers
     const announcer = document.getElementById('sr-announcer');
@@ -292,6 +333,8 @@ document.addEventListener('DOMContentLoaded', () => {
  */
 class AudioManager {
   static handlePlay(trackSlug, audioElement) {
+    this.applyGain(trackSlug, audioElement);
+
     // Stop whatever was playing before
     if (currentAudio && currentAudio !== audioElement) {
       currentAudio.pause();
@@ -305,6 +348,36 @@ class AudioManager {
     this.updatePlayButtonState(trackSlug, 'playing');
   }
 
+  /**
+   * Level-match tracks so listeners don't ride the volume between cards.
+   * The gain is a linear volume from the server's loudness analysis:
+   * read from data-gain, or fetched once from the track audio API for
+   * cards rendered without it. Applied on first play only, so a
+   * listener's own volume change afterwards sticks.
+   *
+   * HTMLMediaElement.volume cannot amplify, so the server caps the gain
+   * at 1.0 (gain_to_volume): quiet tracks play at full volume rather
+   * than being boosted. Anything above 1 is clamped here too.
+   */
+  static async applyGain(trackSlug, audioElement) {
+    if (audioElement.dataset.gainApplied) return;
+    audioElement.dataset.gainApplied = '1';
+
+    let gain = parseFloat(audioElement.dataset.gain);
+    if (Number.isNaN(gain)) {
+      if (!this.gains.has(trackSlug)) {
+        this.gains.set(trackSlug, fetch(`/tracks/api/${encodeURIComponent(trackSlug)}/audio/`, { headers: { 'Accept': 'application/json' } })
+          .then(res => (res.ok ? res.json() : {}))
+          .then(data => data.gain ?? null)
+          .catch(() => null));
+      }
+      gain = await this.gains.get(trackSlug);
+    }
+    if (typeof gain === 'number' && gain > 0) {
+      audioElement.volume = Math.min(gain, 1);
+    }
+  }
+
   static handlePause(trackSlug, audioElement) {
     // Only update UI if this is the track playing
     if (currentAudio === audioElement) {
@@ -319,5 +392,8 @@ class AudioManager {
   }
 }
 
+// Pending or settled gain lookups by track slug
+AudioManager.gains = new Map();
+
 // Make AudioManager available globally so the event handlers can find it
 window.AudioManager = AudioManager;
\ No newline at end of file
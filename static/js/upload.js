@@ -260,6 +260,237 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Large audio files skip the regular multipart POST. By default the
+    // browser uploads them straight to S3 in presigned multipart parts;
+    // with the "resumable" method they are sent to the server in
+    // sequential chunks that survive a dropped connection or reload.
+    // Either way the server validates the stored file and registers
+    // the track
+    const uploadForm = document.getElementById('uploadForm');
+    const DIRECT_PART_CONCURRENCY = 4;
+    const DIRECT_PART_RETRIES = 3;
+    const RESUMABLE_RETRIES = 5;
+
+    if (uploadForm) {
+        uploadForm.addEventListener('submit', function(e) {
+            const audioInput = document.getElementById('audioFileInput');
+            const file = audioInput && audioInput.files[0];
+            const threshold = parseInt(uploadForm.dataset.directThreshold, 10);
+            if (!file || !threshold || file.size <= threshold) {
+                return; // Regular multipart POST
+            }
+            e.preventDefault();
+            if (uploadForm.dataset.largeUploadMethod === 'resumable') {
+                resumableUpload(uploadForm, file);
+            } else {
+                directUpload(uploadForm, file);
+            }
+        });
+    }
+
+    function csrfForm(form) {
+        const data = new FormData();
+        data.append('csrfmiddlewaretoken', form.querySelector('[name="csrfmiddlewaretoken"]').value);
+        return data;
+    }
+
+    function showUploadError(form, message) {
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-danger';
+        alert.textContent = message;
+        form.querySelector('.modal-body').prepend(alert);
+    }
+
+    async function putPart(url, blob) {
+        for (let attempt = 1; ; attempt++) {
+            try {
+                const response = await fetch(url, { method: 'PUT', body: blob });
+                const etag = response.headers.get('ETag');
+                if (response.ok && etag) {
+                    return etag;
+                }
+                throw new Error(`Part upload failed (${response.status})`);
+            } catch (err) {
+                if (attempt >= DIRECT_PART_RETRIES) {
+                    throw err;
+                }
+            }
+        }
+    }
+
+    async function directUpload(form, file) {
+        const submitBtn = form.querySelector('button[type="submit"]');
+        const originalLabel = submitBtn.textContent;
+        submitBtn.disabled = true;
+        form.querySelectorAll('.alert-danger').forEach(alert => alert.remove());
+
+        let uploadId = null;
+        try {
+            const startData = csrfForm(form);
+            startData.append('filename', file.name);
+            startData.append('size', file.size);
+            const startResponse = await fetch(form.dataset.directStartUrl, { method: 'POST', body: startData });
+            const start = await startResponse.json();
+            if (!startResponse.ok) {
+                throw new Error(start.error || 'Could not start the upload.');
+            }
+            uploadId = start.upload_id;
+
+            // Upload parts with bounded concurrency
+            const done = [];
+            let next = 0;
+            let uploadedBytes = 0;
+            const worker = async () => {
+                while (next < start.parts.length) {
+                    const part = start.parts[next++];
+                    const offset = (part.part_number - 1) * start.part_size;
+                    const blob = file.slice(offset, offset + start.part_size);
+                    const etag = await putPart(part.url, blob);
+                    done.push({ part_number: part.part_number, etag: etag });
+                    uploadedBytes += blob.size;
+                    submitBtn.textContent = `Uploading ${Math.floor(uploadedBytes * 100 / file.size)}%`;
+                }
+            };
+            await Promise.all(Array.from({ length: DIRECT_PART_CONCURRENCY }, worker));
+
+            submitBtn.textContent = 'Finishing…';
+            const completeData = new FormData(form);
+            completeData.delete('audio_file');
+            completeData.append('upload_id', uploadId);
+            completeData.append('parts', JSON.stringify(done));
+            const completeResponse = await fetch(form.dataset.directCompleteUrl, { method: 'POST', body: completeData });
+            const result = await completeResponse.json();
+            uploadId = null; // Completed or discarded server-side
+            if (!completeResponse.ok) {
+                const errors = result.errors
+                    ? Object.values(result.errors).flat().join(' ')
+                    : result.error;
+                throw new Error(errors || 'Upload failed.');
+            }
+            window.location.href = result.redirect;
+        } catch (err) {
+            if (uploadId) {
+                const abortData = csrfForm(form);
+                abortData.append('upload_id', uploadId);
+                fetch(form.dataset.directAbortUrl, { method: 'POST', body: abortData });
+            }
+            showUploadError(form, err.message);
+            submitBtn.disabled = false;
+            submitBtn.textContent = originalLabel;
+        }
+    }
+
+    function csrfToken(form) {
+        return form.querySelector('[name="csrfmiddlewaretoken"]').value;
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // Session URLs are remembered per file, so picking the same file
+    // again after a reload resumes instead of starting over
+    function resumableKey(file) {
+        return `resumable-upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    async function resumableOffset(form, url) {
+        const response = await fetch(url, {
+            method: 'HEAD',
+            headers: { 'X-CSRFToken': csrfToken(form) },
+        });
+        if (!response.ok) {
+            return null;
+        }
+        return parseInt(response.headers.get('Upload-Offset'), 10);
+    }
+
+    async function resumableUpload(form, file) {
+        const submitBtn = form.querySelector('button[type="submit"]');
+        const originalLabel = submitBtn.textContent;
+        submitBtn.disabled = true;
+        form.querySelectorAll('.alert-danger').forEach(alert => alert.remove());
+
+        const key = resumableKey(file);
+        try {
+            let url = localStorage.getItem(key);
+            let offset = url ? await resumableOffset(form, url) : null;
+            let chunkSize = 5 * 1024 * 1024;
+            if (offset === null) {
+                const createData = csrfForm(form);
+                createData.append('filename', file.name);
+                createData.append('size', file.size);
+                const createResponse = await fetch(form.dataset.resumableUrl, { method: 'POST', body: createData });
+                const session = await createResponse.json();
+                if (!createResponse.ok) {
+                    throw new Error(session.error || 'Could not start the upload.');
+                }
+                url = session.url;
+                offset = session.offset;
+                chunkSize = session.chunk_size;
+                localStorage.setItem(key, url);
+            }
+
+            let failures = 0;
+            while (offset < file.size) {
+                submitBtn.textContent = `Uploading ${Math.floor(offset * 100 / file.size)}%`;
+                try {
+                    const response = await fetch(url, {
+                        method: 'PATCH',
+                        headers: {
+                            'X-CSRFToken': csrfToken(form),
+                            'Upload-Offset': String(offset),
+                            'Content-Type': 'application/offset+octet-stream',
+                        },
+                        body: file.slice(offset, offset + chunkSize),
+                    });
+                    if (response.status === 404 || response.status === 413) {
+                        const data = await response.json().catch(() => ({}));
+                        throw Object.assign(new Error(data.error || 'Upload failed.'), { fatal: true });
+                    }
+                    const serverOffset = parseInt(response.headers.get('Upload-Offset'), 10);
+                    if (response.ok || response.status === 409) {
+                        // On 409 the server reports where to continue from
+                        offset = serverOffset;
+                        failures = 0;
+                        continue;
+                    }
+                    throw new Error(`Chunk upload failed (${response.status})`);
+                } catch (err) {
+                    if (err.fatal || ++failures > RESUMABLE_RETRIES) {
+                        throw err;
+                    }
+                    // Back off, then ask the server how much it kept
+                    await sleep(1000 * 2 ** (failures - 1));
+                    const resumed = await resumableOffset(form, url).catch(() => null);
+                    if (resumed !== null) {
+                        offset = resumed;
+                    }
+                }
+            }
+
+            submitBtn.textContent = 'Finishing…';
+            const finishData = new FormData(form);
+            finishData.delete('audio_file');
+            const finishResponse = await fetch(`${url}finish/`, { method: 'POST', body: finishData });
+            const result = await finishResponse.json();
+            if (!finishResponse.ok) {
+                // The session is kept, so fixing the form and submitting
+                // again finishes without re-sending the audio
+                const errors = result.errors
+                    ? Object.values(result.errors).flat().join(' ')
+                    : result.error;
+                throw new Error(errors || 'Upload failed.');
+            }
+            localStorage.removeItem(key);
+            window.location.href = result.redirect;
+        } catch (err) {
+            showUploadError(form, err.message);
+            submitBtn.disabled = false;
+            submitBtn.textContent = originalLabel;
+        }
+    }
+
     // Clear validation errors when user types in text fields
     const titleInput = document.querySelector('[name="title"]');
     const descriptionInput = document.querySelector('[name="description"]');
@@ -0,0 +1,115 @@
+/* jshint esversion: 11, esnext: false */
+/**
+ * Waveform previews
+ *
+ * Draws the min/max peaks stored for each track onto
+ * <canvas class="track-waveform" data-waveform="..."> without fetching
+ * any audio. The canvas then shows playback progress of the <audio>
+ * element in the same .track-audio-section, and clicking it seeks
+ * (starting playback if the audio has not loaded yet).
+ *
+ * data-waveform is base64 of interleaved int8 pairs:
+ *   min0, max0, min1, max1, ... (full scale = +/-127)
+ */
+(function () {
+  const PLAYED_COLOR = '#F82170';   // --color-primary-pink
+  const UNPLAYED_COLOR = '#ced4da';
+
+  function decodePeaks(encoded) {
+    const binary = atob(encoded);
+    const peaks = new Int8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+      peaks[i] = (binary.charCodeAt(i) << 24) >> 24;  // Unsigned to signed byte
+    }
+    return peaks;
+  }
+
+  function draw(canvas) {
+    const peaks = canvas._peaks;
+    const audio = canvas._audio;
+    const ratio = window.devicePixelRatio || 1;
+    const width = Math.round(canvas.clientWidth * ratio);
+    const height = Math.round(canvas.clientHeight * ratio);
+    if (!width || !height) return;
+    if (canvas.width !== width || canvas.height !== height) {
+      canvas.width = width;
+      canvas.height = height;
+    }
+
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+
+    const pairs = peaks.length / 2;
+    // Scale to the loudest peak so quiet tracks still read clearly
+    let loudest = 1;
+    for (let i = 0; i < peaks.length; i++) {
+      loudest = Math.max(loudest, Math.abs(peaks[i]));
+    }
+    const middle = height / 2;
+    const scale = middle / loudest;
+    const progress = audio && audio.duration ? audio.currentTime / audio.duration : 0;
+    const barWidth = width / pairs;
+
+    for (let i = 0; i < pairs; i++) {
+      const top = middle - peaks[2 * i + 1] * scale;
+      const bottom = middle - peaks[2 * i] * scale;
+      ctx.fillStyle = i / pairs < progress ? PLAYED_COLOR : UNPLAYED_COLOR;
+      ctx.fillRect(i * barWidth, top, Math.max(barWidth - ratio, ratio), Math.max(bottom - top, ratio));
+    }
+  }
+
+  function seek(canvas, event) {
+    const audio = canvas._audio;
+    if (!audio) return;
+    const rect = canvas.getBoundingClientRect();
+    const fraction = Math.min(Math.max((event.clientX - rect.left) / rect.width, 0), 1);
+    if (audio.duration) {
+      audio.currentTime = fraction * audio.duration;
+      return;
+    }
+    // preload="none": fetch the audio now and seek once its length is known
+    audio.addEventListener('loadedmetadata', () => {
+      audio.currentTime = fraction * audio.duration;
+    }, { once: true });
+    const playing = audio.play();
+    if (playing) {
+      playing.catch(() => {
+        // Playback refused (autoplay policy) or interrupted: still fetch
+        // the metadata so the pending seek lands
+        audio.preload = 'metadata';
+        audio.load();
+      });
+    }
+  }
+
+  function initWaveforms(root = document) {
+    root.querySelectorAll('canvas.track-waveform[data-waveform]:not([data-waveform-bound])').forEach(canvas => {
+      try {
+        canvas._peaks = decodePeaks(canvas.dataset.waveform);
+      } catch (err) {
+        canvas.remove();  // Malformed data: leave the plain player
+        return;
+      }
+      canvas._audio = canvas.closest('.track-audio-section')?.querySelector('audio') || null;
+      if (canvas._audio) {
+        ['timeupdate', 'seeked', 'loadedmetadata', 'ended'].forEach(name => {
+          canvas._audio.addEventListener(name, () => draw(canvas));
+        });
+      }
+      canvas.addEventListener('click', event => seek(canvas, event));
+      canvas.setAttribute('data-waveform-bound', '1');
+      draw(canvas);
+    });
+  }
+
+  let resizeTimeout = null;
+  window.addEventListener('resize', () => {
+    clearTimeout(resizeTimeout);
+    resizeTimeout = setTimeout(() => {
+      document.querySelectorAll('canvas.track-waveform[data-waveform-bound]').forEach(draw);
+    }, 100);
+  });
+
+  document.addEventListener('DOMContentLoaded', () => initWaveforms(document));
+  window.initWaveforms = initWaveforms;
+})();
@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.db import connection
+from django.db.models import Q
 from django.utils import timezone
 
-from .models import Track
-from .services.moderation import scan_image_bytes
+from .models import ModerationVerdict, Track
+from .services.moderation import scan_stored_image
+from .services.search import track_search_query
 
 
 # Register your models here.
@@ -17,18 +20,34 @@ class TrackAdmin(admin.ModelAdmin):
 
     Features:
         - List view with moderation status filtering
-        - Search across track metadata and user information
+        - Full-text search across track metadata plus uploader lookup
         - Bulk re-scanning action for image moderation
         - Read-only moderation fields to preserve audit trail
     """
 
     list_display = ["title", "user", "created_at", "moderation_status"]
     list_filter = ["moderation_status", "created_at"]
-    search_fields = ["title", "description", "user__username"]
+    search_fields = ["title", "description", "user__profile__username"]
     readonly_fields = ["moderation_labels", "moderated_at"]
     ordering = ["-created_at"]
     actions = ["rescan_moderation"]
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search titles and descriptions through the GIN-indexed search
+        vector instead of icontains scans; the uploader's username is
+        still matched by substring. Falls back to search_fields on
+        backends without full-text search.
+        """
+        search_term = search_term.strip()
+        if not search_term or connection.vendor != "postgresql":
+            return super().get_search_results(request, queryset, search_term)
+        matches = queryset.filter(
+            Q(search_vector=track_search_query(search_term))
+            | Q(user__profile__username__icontains=search_term)
+        )
+        return matches, False
+
     @admin.action(description="Re-scan image moderation")
     def rescan_moderation(self, request, queryset):
         """
@@ -40,9 +59,12 @@ class TrackAdmin(admin.ModelAdmin):
             if not track.track_image:
                 continue
 
-            f = track.track_image.open("rb")
             try:
-                allowed, labels, failed = scan_image_bytes(f.read())
+                # Answered from the verdict cache when possible
+                image = track.track_image
+                allowed, labels, failed = scan_stored_image(
+                    image.storage, image.name
+                )
             except Exception:
                 # Fail-open on admin action: mark pending
                 track.moderation_status = "PENDING"
@@ -56,8 +78,6 @@ class TrackAdmin(admin.ModelAdmin):
                         "APPROVED" if allowed else "REJECTED"
                     )
                     track.moderation_labels = labels
-            finally:
-                f.close()
 
             track.moderated_at = timezone.now()
             track.save(
@@ -70,3 +90,40 @@ class TrackAdmin(admin.ModelAdmin):
             updated += 1
 
         self.message_user(request, f"Re-scanned {updated} track(s).")
+
+
+@admin.register(ModerationVerdict)
+class ModerationVerdictAdmin(admin.ModelAdmin):
+    """
+    Read-only view of cached Rekognition verdicts, titled with the
+    cache's hit rate and the AWS calls it has saved.
+    """
+
+    list_display = [
+        "sha256",
+        "allowed",
+        "config_version",
+        "hit_count",
+        "created_at",
+        "last_hit_at",
+    ]
+    list_filter = ["allowed", "config_version"]
+    search_fields = ["sha256"]
+    ordering = ["-created_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        stats = ModerationVerdict.objects.stats()
+        extra_context = {
+            **(extra_context or {}),
+            "title": (
+                f"Moderation verdicts: {stats['hit_rate']:.1%} hit rate, "
+                f"{stats['saved_calls']} Rekognition call(s) saved"
+            ),
+        }
+        return super().changelist_view(request, extra_context)
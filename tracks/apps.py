@@ -20,3 +20,8 @@ class TracksConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "tracks"
+
+    def ready(self):
+        # Import signals to ensure they are registered
+        # (noqa for false positive flake8 errors)
+        import tracks.signals  # noqa: F401
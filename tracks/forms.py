@@ -1,17 +1,19 @@
-import os
 import re
 
 from django import forms
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.utils import timezone
-from mutagen import File as MutagenFile
-from ulid import ULID
 
-from core.utils import get_toxicity_score
+from core.uploadhandlers import AUDIO_CONTENT_TYPES
+from core.utils import get_toxicity_score, sanitize_upload_name
 
 from .models import Track
-from .services.moderation import scan_image_bytes
+from .services.processing import duration_from_header, schedule_processing
+
+# Formats accepted by magic-byte sniffing (core.uploadhandlers)
+AUDIO_FORMATS = set(AUDIO_CONTENT_TYPES)
+IMAGE_FORMATS = {"jpeg", "png", "webp"}
 
 
 class TrackUploadForm(forms.ModelForm):
@@ -104,8 +106,13 @@ class TrackUploadForm(forms.ModelForm):
             ),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, stored_audio=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Audio uploaded straight to the bucket (StoredUpload from
+        # tracks.services.direct_upload) instead of in request.FILES
+        self.stored_audio = stored_audio
+        if stored_audio is not None:
+            self.fields["audio_file"].required = False
         # If this is an edit (instance exists), make file fields not required
         if self.instance and self.instance.pk:
             self.fields["audio_file"].required = False
@@ -146,6 +153,9 @@ class TrackUploadForm(forms.ModelForm):
               #user-uploaded-content-security
             - https://cwe.mitre.org/data/definitions/22.html
         """
+        if self.stored_audio is not None:
+            return self._clean_stored_audio()
+
         audio_file = self.cleaned_data.get("audio_file")
 
         # Check if this is an edit and the audio hasn't changed
@@ -160,10 +170,15 @@ class TrackUploadForm(forms.ModelForm):
         # Only validate if a new audio file was uploaded
         if audio_file and hasattr(audio_file, "file"):
             # File size validation - prevent resource exhaustion
-            if audio_file.size > 100 * 1024 * 1024:
+            # (exceeds_limit: the upload handler stopped buffering it)
+            if audio_file.size > 100 * 1024 * 1024 or getattr(
+                audio_file, "exceeds_limit", False
+            ):
                 raise forms.ValidationError("File size exceeds 100MB limit.")
 
-            # MIME type validation - prevent format spoofing attacks
+            # Format validation - prevent format spoofing attacks. The
+            # upload handler sniffs magic bytes as the file streams in;
+            # the client's content_type is only a fallback
             allowed_content_types = [
                 "audio/mpeg",
                 "audio/mp3",
@@ -175,7 +190,13 @@ class TrackUploadForm(forms.ModelForm):
                 "audio/ogg",
                 "audio/x-m4a",
             ]
-            if hasattr(audio_file, "content_type") and audio_file.content_type:
+            if hasattr(audio_file, "sniffed_format"):
+                if audio_file.sniffed_format not in AUDIO_FORMATS:
+                    raise forms.ValidationError(
+                        "Unrecognised audio file. "
+                        "Please upload MP3, WAV, FLAC, M4A, AAC, or OGG files."
+                    )
+            elif getattr(audio_file, "content_type", None):
                 if audio_file.content_type not in allowed_content_types:
                     raise forms.ValidationError(
                         f"Invalid audio file type: {audio_file.content_type}. "
@@ -185,37 +206,47 @@ class TrackUploadForm(forms.ModelForm):
             # Filename sanitization following OWASP recommendations
             # Prevents path traversal and filesystem attacks
             if hasattr(audio_file, "name") and audio_file.name:
-                name, ext = os.path.splitext(audio_file.name)
-                # Allow only alphanumeric characters and safe punctuation
-                safe_name = "".join(
-                    c for c in name if c.isalnum() or c in " -_()[]"
+                audio_file.name = sanitize_upload_name(
+                    audio_file.name, "track"
                 )
-                safe_name = safe_name.strip()[:30]
-                if safe_name:
-                    ulid = str(ULID())
-                    audio_file.name = f"{safe_name}_{ulid}{ext}"
-                else:
-                    ulid = str(ULID())
-                    audio_file.name = f"track_{ulid}{ext}"
 
             return audio_file
 
         return audio_file
 
+    def _clean_stored_audio(self):
+        """
+        Validate audio already in storage with the same size and format
+        rules as request uploads. Its name was sanitized when the
+        upload started.
+
+        Returns:
+            str: Storage name of the audio file
+        """
+        stored = self.stored_audio
+        if stored.exceeds_limit:
+            raise forms.ValidationError("File size exceeds 100MB limit.")
+        if stored.sniffed_format not in AUDIO_FORMATS:
+            raise forms.ValidationError(
+                "Unrecognised audio file. "
+                "Please upload MP3, WAV, FLAC, M4A, AAC, or OGG files."
+            )
+        return stored.name
+
     def clean_track_image(self):
         """
         Validate uploaded track images for security and format compliance.
 
         Implements comprehensive image validation to prevent malicious uploads
-        and ensure proper resource management. Now includes AWS Rekognition
-        content moderation.
+        and ensure proper resource management. New images are queued for
+        AWS Rekognition content moderation when the track is saved.
 
         Security measures:
             - File size validation (10MB limit)
             - Image format verification (JPG, PNG, WebP only)
             - Dimension limits (prevents resource exhaustion)
             - Filename sanitization (prevents path traversal attacks)
-            - AWS Rekognition content moderation (fail-open)
+            - AWS Rekognition content moderation (queued by save())
 
         Returns:
             ImageFile: Validated and sanitized image file, or existing file
@@ -226,10 +257,8 @@ class TrackUploadForm(forms.ModelForm):
         """
         track_image = self.cleaned_data.get("track_image")
 
-        # Initialize moderation flags for save() method
-        self._moderation_failed = False
-        self._moderation_allowed = True
-        self._moderation_labels = []
+        # Initialize moderation flag for save() method
+        self._image_uploaded = False
 
         # Check if this is an edit and the image hasn't changed
         if self.instance and self.instance.pk:
@@ -244,20 +273,26 @@ class TrackUploadForm(forms.ModelForm):
         # Only validate if a new image was uploaded
         if track_image and hasattr(track_image, "file"):
             # Image size validation - prevent resource exhaustion
-            if track_image.size > 10 * 1024 * 1024:  # 10MB limit
+            if track_image.size > 10 * 1024 * 1024 or getattr(
+                track_image, "exceeds_limit", False
+            ):  # 10MB limit
                 raise forms.ValidationError("Image too large (max 10MB)")
 
-            # MIME type validation - prevent format spoofing
+            # Format validation on sniffed magic bytes, falling back to
+            # the client's content_type - prevent format spoofing
             allowed_image_types = [
                 "image/jpeg",
                 "image/jpg",
                 "image/png",
                 "image/webp",
             ]
-            if (
-                hasattr(track_image, "content_type")
-                and track_image.content_type
-            ):
+            if hasattr(track_image, "sniffed_format"):
+                if track_image.sniffed_format not in IMAGE_FORMATS:
+                    raise forms.ValidationError(
+                        "Invalid image type. Please upload JPG, PNG, "
+                        "or WebP files."
+                    )
+            elif getattr(track_image, "content_type", None):
                 if track_image.content_type not in allowed_image_types:
                     raise forms.ValidationError(
                         "Invalid image type. Please upload JPG, PNG, "
@@ -273,44 +308,15 @@ class TrackUploadForm(forms.ModelForm):
                         "Image dimensions too large. Maximum 2000x2000 pixels."
                     )
 
-            # AWS Rekognition content moderation
-            try:
-                data = track_image.read()
-                track_image.seek(0)
-                allowed, labels, failed = scan_image_bytes(
-                    data
-                )  # receives 3 values
-
-                self._moderation_allowed = allowed
-                self._moderation_labels = labels
-                self._moderation_failed = (
-                    failed  # Set based on the failure flag
-                )
-
-                if not allowed:
-                    raise forms.ValidationError(
-                        "This image violates our community guidelines."
-                    )
-            except forms.ValidationError:
-                raise
-            except Exception:
-                # This shouldn't happen but keep as backup *
-                self._moderation_failed = True
+            # Rekognition moderation runs after commit, off the request
+            # path (tracks.services.moderation.moderate_image)
+            self._image_uploaded = True
 
             # Filename sanitization following OWASP recommendations
             if hasattr(track_image, "name") and track_image.name:
-                name, ext = os.path.splitext(track_image.name)
-                # Allow only alphanumeric characters and safe punctuation
-                safe_name = "".join(
-                    c for c in name if c.isalnum() or c in " -_()[]"
+                track_image.name = sanitize_upload_name(
+                    track_image.name, "image"
                 )
-                safe_name = safe_name.strip()[:30]
-                if safe_name:
-                    ulid = str(ULID())
-                    track_image.name = f"{safe_name}_{ulid}{ext}"
-                else:
-                    ulid = str(ULID())
-                    track_image.name = f"image_{ulid}{ext}"
 
         # return the image as-is
         return track_image
@@ -490,55 +496,49 @@ class TrackUploadForm(forms.ModelForm):
 
     def save(self, commit=True):
         """
-        Save the track with moderation status based on image scan results.
+        Save the track, marking new artwork PENDING until the background
+        moderation scan (tracks.services.moderation) decides it.
+
+        A new audio file resets duration and metadata and marks the track
+        PENDING for background processing. With commit=False the caller
+        must call schedule_processing(track) after saving.
         """
         track = super().save(commit=False)
 
-        # Detect audio duration if audio file is present
-        if self.cleaned_data.get("audio_file"):
-            try:
-                audio_file = self.cleaned_data["audio_file"]
-                # Reset file pointer
-                audio_file.seek(0)
-
-                # Create temporary file for mutagen
-                import tempfile
-
-                with tempfile.NamedTemporaryFile() as temp_file:
-                    for chunk in audio_file.chunks():
-                        temp_file.write(chunk)
-                    temp_file.flush()
-
-                    # Get duration using mutagen
-                    audio_info = MutagenFile(temp_file.name)
-                    if (
-                        audio_info
-                        and hasattr(audio_info, "info")
-                        and hasattr(audio_info.info, "length")
-                    ):
-                        track.duration = int(audio_info.info.length)
-
-                    # Reset file pointer for storage
-                    audio_file.seek(0)
-            except Exception:
-                # Fail silently - duration is optional
-                track.duration = None
-
-        # Set moderation status based on image scan (if image was uploaded)
-        if getattr(self, "_moderation_failed", False):
+        # Duration and technical metadata are extracted in the background
+        # after commit (tracks.services.processing), off the request path
+        self.audio_replaced = (
+            "audio_file" in self.changed_data or self.stored_audio is not None
+        )
+        if self.audio_replaced:
+            # WAV and FLAC headers state the exact duration, so those
+            # tracks show it straight away
+            track.duration = duration_from_header(
+                self.stored_audio or self.cleaned_data["audio_file"]
+            )
+            track.audio_metadata = None
+            track.waveform = None
+            track.hls_manifest = ""
+            track.loudness_lufs = None
+            track.true_peak_dbtp = None
+            track.gain_db = None
+            track.processing_status = "PENDING"
+
+        # New artwork is shown only to its owner until the background
+        # scan approves it; tracks without artwork need no scan
+        if getattr(self, "_image_uploaded", False):
             track.moderation_status = "PENDING"
             track.moderation_labels = None
-        else:
-            track.moderation_status = (
-                "APPROVED"
-                if getattr(self, "_moderation_allowed", True)
-                else "REJECTED"
-            )
-            track.moderation_labels = getattr(self, "_moderation_labels", [])
+            track.moderated_at = None
+        elif not track.track_image:
+            track.moderation_status = "APPROVED"
+            track.moderation_labels = []
+            track.moderated_at = timezone.now()
 
-        track.moderated_at = timezone.now()
         if commit:
             track.save()
+            if self.audio_replaced:
+                schedule_processing(track)
         return track
 
 
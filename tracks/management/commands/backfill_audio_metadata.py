@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from django.core.management.base import BaseCommand
+
+from tracks.models import Track
+from tracks.services.background import init_worker_process
+from tracks.services.feed_cache import bump_feed_version
+from tracks.services.processing import download_audio, extract_metadata
+
+
+def _extract(path):
+    """Read metadata from a downloaded file, then delete it (worker)."""
+    try:
+        return extract_metadata(None, path)
+    finally:
+        os.remove(path)
+
+
+class Command(BaseCommand):
+    """
+    Extract duration and technical metadata for tracks that never had
+    it: uploads from before background processing, or whose read
+    failed.
+
+    Tracks are streamed from the database in primary key order. Files
+    are downloaded on a thread pool with bounded concurrency, since
+    that is network-bound, and parsed on a process pool. Results are
+    written with bulk_update in batches.
+
+    The command only selects tracks with no stored metadata, so an
+    interrupted run resumes where it stopped; at most one unwritten
+    batch is repeated. Unreadable files are stored with empty metadata
+    so they are not retried unless --retry-failed is given.
+
+    PENDING tracks it reads are marked READY, or FAILED if their file
+    is unreadable, as process_track would; failed downloads are left
+    untouched for the next run. Waveforms, loudness and HLS
+    renditions are not built; use reprocess_pending_tracks for the full
+    pipeline.
+
+    Usage:
+        python manage.py backfill_audio_metadata --concurrency 8
+    """
+
+    help = "Backfill duration and audio metadata for existing tracks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Simultaneous downloads (default 8).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Metadata parsing processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Tracks per bulk_update (default 100).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Process at most this many tracks."
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry tracks whose files could not be read before.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = max(1, options["batch_size"])
+        concurrency = max(1, options["concurrency"])
+        workers = max(1, options["workers"])
+
+        missing = Track.objects.exclude(audio_file="").filter(
+            audio_metadata__isnull=True
+        )
+        if options["retry_failed"]:
+            missing |= Track.objects.exclude(audio_file="").filter(
+                audio_metadata={}
+            )
+        rows = missing.order_by("pk").values_list("pk", "audio_file")
+        if options["limit"]:
+            rows = rows[: options["limit"]]
+        rows = rows.iterator(chunk_size=self.batch_size)
+
+        self.started = time.monotonic()
+        self.done = self.failed = self.bytes = 0
+        batch = []
+        downloads = {}
+        extractions = {}
+        # Spawned workers share no database connection with the open
+        # streaming cursor in this process
+        context = multiprocessing.get_context("spawn")
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            ThreadPoolExecutor(concurrency) as io_pool,
+            ProcessPoolExecutor(
+                workers, mp_context=context, initializer=init_worker_process
+            ) as cpu_pool,
+        ):
+            exhausted = False
+            while True:
+                # Files on disk are bounded by the download slots plus
+                # two queued per parsing process
+                while (
+                    not exhausted
+                    and len(downloads) < concurrency
+                    and len(extractions) < workers * 2
+                ):
+                    row = next(rows, None)
+                    if row is None:
+                        exhausted = True
+                        break
+                    pk, name = row
+                    future = io_pool.submit(
+                        download_audio, name, directory, str(pk)
+                    )
+                    downloads[future] = row
+                if not downloads and not extractions:
+                    break
+
+                finished, _ = wait(
+                    [*downloads, *extractions], return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    if future in downloads:
+                        pk, name = downloads.pop(future)
+                        try:
+                            path = future.result()
+                        except Exception as e:
+                            self._fail(pk, f"download failed: {e}")
+                            continue
+                        self.bytes += os.path.getsize(path)
+                        extractions[cpu_pool.submit(_extract, path)] = (
+                            pk,
+                            name,
+                        )
+                        continue
+
+                    pk, name = extractions.pop(future)
+                    try:
+                        updates = future.result()
+                    except Exception as e:
+                        self._fail(pk, f"metadata read failed: {e}")
+                        updates = {"duration": None, "audio_metadata": None}
+                    batch.append((pk, name, updates))
+                    if len(batch) >= self.batch_size:
+                        self._write(batch)
+                        batch = []
+            if batch:
+                self._write(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {self.done} track(s), {self.failed} failed; "
+                + self._throughput()
+            )
+        )
+
+    def _fail(self, pk, message):
+        self.failed += 1
+        self.stderr.write(f"Track {pk}: {message}")
+
+    def _throughput(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return (
+            f"{self.done / elapsed:.1f} tracks/s, "
+            f"{self.bytes / elapsed / 1024 / 1024:.1f} MB/s "
+            f"over {elapsed:.1f}s"
+        )
+
+    def _write(self, batch):
+        # Skip tracks whose audio was replaced while this one was read
+        current = dict(
+            Track.objects.filter(
+                pk__in=[pk for pk, _, _ in batch]
+            ).values_list("pk", "audio_file")
+        )
+        tracks = [
+            Track(
+                pk=pk,
+                duration=updates["duration"],
+                # Empty metadata marks an unreadable file as attempted
+                audio_metadata=updates["audio_metadata"] or {},
+            )
+            for pk, name, updates in batch
+            if current.get(pk) == name
+        ]
+        Track.objects.bulk_update(
+            tracks, ["duration", "audio_metadata"], batch_size=self.batch_size
+        )
+        # Tracks whose processing task was lost would otherwise keep
+        # their "Processing audio" spinner. Rows PROCESSING right now
+        # belong to a live task and are left to it.
+        for status, pks in (
+            ("READY", [t.pk for t in tracks if t.audio_metadata]),
+            ("FAILED", [t.pk for t in tracks if not t.audio_metadata]),
+        ):
+            Track.objects.filter(
+                pk__in=pks, processing_status="PENDING"
+            ).update(processing_status=status)
+        bump_feed_version()
+        self.done += len(tracks)
+        self.stdout.write(
+            f"{self.done} track(s) written; {self._throughput()}"
+        )
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.models import Profile
+from tracks.models import Track
+from tracks.services.feed_cache import bump_feed_version
+from tracks.services.images import update_image_blurhash
+
+
+def _update(model, pk, field_name):
+    """Compute one row's blurhash on its own thread's connection."""
+    try:
+        return update_image_blurhash(model, pk, field_name)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    """
+    Compute blurhash placeholders for track artwork and profile
+    pictures uploaded before placeholders were computed on upload.
+
+    Rows are handled on a thread pool, since most of the time is spent
+    downloading the originals. Rows that already have a blurhash are
+    skipped, so the command can be interrupted and re-run.
+
+    Usage:
+        python manage.py backfill_blurhash --workers 8
+    """
+
+    help = "Backfill blurhash placeholders for tracks and profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Images processed at once (default 8).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Process at most this many images."
+        )
+
+    def handle(self, *args, **options):
+        pending = []
+        for model, field_name in (
+            (Track, "track_image"),
+            (Profile, "profile_picture"),
+        ):
+            rows = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .filter(image_blurhash="")
+                .order_by("pk")
+            )
+            pending += [
+                (model, pk, field_name)
+                for pk in rows.values_list("pk", flat=True)
+            ]
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+        if not pending:
+            self.stdout.write("No images to process.")
+            return
+
+        with ThreadPoolExecutor(max(1, options["workers"])) as pool:
+            done = sum(pool.map(lambda row: _update(*row), pending))
+
+        # Written with update(), which skips the feed cache signals
+        bump_feed_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Computed {done} blurhash(es); "
+                f"{len(pending) - done} failed."
+            )
+        )
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.models import Profile
+from tracks.models import Track
+from tracks.services.images import update_image_variants
+
+
+def _update(model, pk, field_name):
+    """Build one row's derivatives on its own thread's connection."""
+    try:
+        return update_image_variants(model, pk, field_name)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    """
+    Build WebP/AVIF derivatives for track artwork and profile pictures
+    uploaded before responsive images.
+
+    Rows are handled on a thread pool: downloads and uploads wait on
+    S3, and Pillow releases the GIL while resizing and encoding. Rows
+    that already have derivatives are skipped, so the command can be
+    interrupted and re-run.
+
+    Usage:
+        python manage.py backfill_image_variants --workers 4
+    """
+
+    help = "Backfill responsive image derivatives for tracks and profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Images processed at once (default 4).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Process at most this many images."
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild rows that already have derivatives.",
+        )
+
+    def handle(self, *args, **options):
+        pending = []
+        for model, field_name in (
+            (Track, "track_image"),
+            (Profile, "profile_picture"),
+        ):
+            rows = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .order_by("pk")
+            )
+            if not options["all"]:
+                rows = rows.filter(image_variants={})
+            pending += [
+                (model, pk, field_name)
+                for pk in rows.values_list("pk", flat=True)
+            ]
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+        if not pending:
+            self.stdout.write("No images to process.")
+            return
+
+        with ThreadPoolExecutor(max(1, options["workers"])) as pool:
+            built = sum(pool.map(lambda row: _update(*row), pending))
+
+        # Failures are logged by update_image_variants
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built derivatives for {built} image(s); "
+                f"{len(pending) - built} failed."
+            )
+        )
@@ -0,0 +1,104 @@
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tracks.models import Track
+from tracks.services.background import init_worker_process
+from tracks.services.feed_cache import bump_feed_version
+from tracks.services.loudness import loudness_updates, measure
+from tracks.services.processing import download_audio
+
+
+def _measure_stored(name):
+    """Download one stored audio file and measure it (worker process)."""
+    with tempfile.TemporaryDirectory() as directory:
+        return measure(download_audio(name, directory))
+
+
+class Command(BaseCommand):
+    """
+    Measure loudness for tracks uploaded before loudness analysis.
+
+    Files are downloaded and analysed in a process pool, since the
+    analysis is CPU-bound NumPy work; results are written from the
+    parent process. Tracks already measured are skipped, including
+    silent or very short ones that gave no value, so the command can be
+    interrupted and re-run.
+
+    Usage:
+        python manage.py backfill_loudness --workers 4
+    """
+
+    help = "Backfill loudness, true peak and playback gain for tracks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Analysis processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Process at most this many tracks."
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-measure tracks that were already measured.",
+        )
+
+    def handle(self, *args, **options):
+        tracks = Track.objects.exclude(audio_file="").order_by("pk")
+        if not options["all"]:
+            # Rows measured before loudness_measured_at was added are
+            # recognised by their value
+            tracks = tracks.filter(
+                loudness_lufs__isnull=True, loudness_measured_at__isnull=True
+            )
+        pending = tracks.values_list("pk", "audio_file")
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+        pending = list(pending)
+        if not pending:
+            self.stdout.write("No tracks to measure.")
+            return
+
+        workers = max(1, options["workers"])
+        done = failed = 0
+        # Connections must not be shared with forked workers
+        connections.close_all()
+        with ProcessPoolExecutor(
+            workers, initializer=init_worker_process
+        ) as pool:
+            queue = iter(pending)
+            running = {}
+            while True:
+                # Keep at most two files per worker in flight
+                for pk, name in queue:
+                    running[pool.submit(_measure_stored, name)] = (pk, name)
+                    if len(running) >= workers * 2:
+                        break
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pk, name = running.pop(future)
+                    try:
+                        loudness, true_peak = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"Track {pk}: {e}")
+                        continue
+                    # Scoped to the file measured, in case it was replaced
+                    Track.objects.filter(pk=pk, audio_file=name).update(
+                        **loudness_updates(loudness, true_peak)
+                    )
+                    done += 1
+
+        bump_feed_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Measured {done} track(s); {failed} failed.")
+        )
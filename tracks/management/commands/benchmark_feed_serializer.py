@@ -0,0 +1,152 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from tracks.models import Track
+from tracks.services.feed import (
+    FEED_PAGE_SIZE,
+    RowSerializer,
+    feed_values_queryset,
+)
+from tracks.services.pagination import keyset_page
+
+
+def legacy_serialize(track):
+    """The per-instance loop track_feed_api used before projections."""
+    return {
+        "id": track.id,
+        "title": track.title,
+        "slug": track.slug,
+        "description": track.description or "",
+        "audio_url": track.audio_file.url,
+        "image_url": (
+            track.track_image.url
+            if (track.track_image and track.moderation_status == "APPROVED")
+            else None
+        ),
+        "detail_url": reverse("track_detail", args=[track.slug]),
+        "created_at": track.created_at,
+        "comment_count": track.visible_comment_count,
+        "duration": getattr(track, "duration", None),
+        "duration_display": (
+            track.get_duration_display()
+            if hasattr(track, "get_duration_display") and track.duration
+            else None
+        ),
+        "profile": {
+            "username": track.user.profile.username,
+            "display_name": track.user.profile.display_name
+            or track.user.profile.username,
+            "url": reverse("profile", args=[track.user.profile.username]),
+            "avatar": (
+                track.user.profile.profile_picture.url
+                if (
+                    track.user.profile.profile_picture
+                    and track.user.profile.moderation_status == "APPROVED"
+                )
+                else None
+            ),
+        },
+    }
+
+
+def build_legacy_page(cursor):
+    # Full model instances, as the old loop loaded them
+    queryset = Track.objects.filter(
+        moderation_status="APPROVED"
+    ).select_related("user__profile")
+    page = keyset_page(queryset, cursor=cursor, page_size=FEED_PAGE_SIZE)
+    return [legacy_serialize(t) for t in page], page.next_cursor
+
+
+def build_projection_page(cursor):
+    page = keyset_page(
+        feed_values_queryset(), cursor=cursor, page_size=FEED_PAGE_SIZE
+    )
+    serialize = RowSerializer()
+    return [serialize(row) for row in page], page.next_cursor
+
+
+class Command(BaseCommand):
+    """
+    Compare the model-instance feed loop with the projection serializer.
+
+    Walks the first --pages feed pages with each strategy (bypassing the
+    page cache) and reports CPU time per page plus memory allocated
+    while building them. Run against a database with realistic data.
+
+    Usage:
+        python manage.py benchmark_feed_serializer --pages 20 --rounds 5
+    """
+
+    help = "Benchmark feed page serialization (CPU time and allocations)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=20)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def measure(self, build_page, pages, rounds):
+        cpu = 0.0
+        built = 0
+        for _ in range(rounds):
+            cursor = None
+            for _ in range(pages):
+                start = time.process_time()
+                _, cursor = build_page(cursor)
+                cpu += time.process_time() - start
+                built += 1
+                if cursor is None:
+                    break
+
+        # Allocation pass, separate so tracing overhead skews no timings
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        cursor = None
+        alloc_pages = 0
+        for _ in range(pages):
+            _, cursor = build_page(cursor)
+            alloc_pages += 1
+            if cursor is None:
+                break
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = after.compare_to(before, "filename")
+        blocks = sum(max(s.count_diff, 0) for s in stats)
+        return {
+            "cpu_ms_per_page": cpu * 1000 / max(built, 1),
+            "blocks_per_page": blocks / max(alloc_pages, 1),
+            "peak_kib": peak / 1024,
+        }
+
+    def handle(self, *args, **options):
+        pages, rounds = options["pages"], options["rounds"]
+
+        # Warm URL resolvers and storage objects before timing
+        build_legacy_page(None)
+        build_projection_page(None)
+
+        results = {
+            "legacy": self.measure(build_legacy_page, pages, rounds),
+            "projection": self.measure(build_projection_page, pages, rounds),
+        }
+
+        self.stdout.write(
+            f"{'strategy':<12}{'cpu ms/page':>14}"
+            f"{'blocks/page':>14}{'peak KiB':>12}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['cpu_ms_per_page']:>14.3f}"
+                f"{r['blocks_per_page']:>14.0f}{r['peak_kib']:>12.1f}"
+            )
+
+        legacy, projection = results["legacy"], results["projection"]
+        if projection["cpu_ms_per_page"]:
+            speedup = legacy["cpu_ms_per_page"] / projection["cpu_ms_per_page"]
+            self.stdout.write(
+                self.style.SUCCESS(f"Projection is {speedup:.2f}x faster.")
+            )
@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from comments.models import Comment
+from tracks.models import Track
+from tracks.services.feed import FEED_PAGE_SIZE, feed_values_queryset
+
+
+def _replies_index():
+    """Name Django generated for the Comment.parent foreign key index."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, Comment._meta.db_table
+        )
+    for name, info in constraints.items():
+        if info["index"] and info["columns"] == ["parent_id"]:
+            return name
+    return None
+
+
+def hot_queries():
+    """
+    Return (label, queryset, expected index) for each hot query path.
+
+    Querysets are built the way the views build them. Ids and the
+    cursor timestamp are placeholders, since only the plan shape
+    matters.
+    """
+    user_id = get_user_model().objects.values_list("id", flat=True).first()
+    track_id = Track.objects.values_list("id", flat=True).first()
+    user_id, track_id = user_id or 0, track_id or 0
+    limit = FEED_PAGE_SIZE + 1
+
+    feed = feed_values_queryset().order_by("-created_at", "-id")
+    # Same filter keyset_page() applies for every page after the first
+    after_cursor = feed.filter(
+        Q(created_at__lt=timezone.now())
+        | Q(created_at=timezone.now(), id__lt=track_id)
+    )
+    return [
+        ("feed first page", feed[:limit], "track_approved_feed_idx"),
+        ("feed next page", after_cursor[:limit], "track_approved_feed_idx"),
+        (
+            "profile tracks",
+            Track.objects.filter(user_id=user_id).order_by("-created_at"),
+            "track_user_created_idx",
+        ),
+        (
+            "visible comments",
+            Comment.objects.filter(track_id=track_id, deleted=False).order_by(
+                "created_at"
+            ),
+            "comment_track_visible_idx",
+        ),
+        (
+            "replies",
+            Comment.objects.filter(parent_id=track_id),
+            _replies_index(),
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Assert that the feed, profile and comment hot paths use their indexes.
+
+    Runs EXPLAIN for each hot query on PostgreSQL and fails if the plan
+    does not reference the expected index. Sequential scans are disabled
+    for the check (inside a rolled-back transaction) so the result does
+    not depend on table size: on a small development database the
+    planner would otherwise prefer a seq scan even with a usable index.
+
+    The test suite runs the same check (QueryPlanTests) when it is run
+    against PostgreSQL; this command is for checking a live database.
+
+    Usage:
+        python manage.py check_query_plans
+        python manage.py check_query_plans --verbose
+    """
+
+    help = "EXPLAIN the hot queries and check they use their indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Print the full plan for every query",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                "Query plan checks require PostgreSQL "
+                f"(current backend: {connection.vendor})."
+            )
+
+        failures = []
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, queryset, index in hot_queries():
+                plan = queryset.explain()
+                used = index is not None and index in plan
+                if options["verbose"]:
+                    self.stdout.write(f"-- {label}\n{plan}\n")
+                if used:
+                    self.stdout.write(f"{label}: uses {index}")
+                else:
+                    failures.append(label)
+                    self.stdout.write(
+                        self.style.ERROR(f"{label}: does not use {index}")
+                    )
+                    self.stdout.write(plan)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                f"Missing index usage for: {', '.join(failures)}"
+            )
+        self.stdout.write(self.style.SUCCESS("All hot queries use indexes."))
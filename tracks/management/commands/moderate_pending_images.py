@@ -0,0 +1,79 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.models import Profile
+from tracks.models import Track
+from tracks.services.moderation import moderate_image
+
+
+def _moderate(model, pk, field_name):
+    """Scan one row's image on its own thread's connection."""
+    try:
+        # No timers: retries are left to the next run of this command
+        return moderate_image(model, pk, field_name, retry=False)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    """
+    Scan track artwork and profile pictures still PENDING moderation.
+
+    Uploads are normally scanned by the in-process background pool
+    right after they are saved. Scans lost to a restart, or still
+    failing after every retry, stay PENDING; run this command (e.g.
+    from a scheduler) to pick them up. Verdicts cached for the same
+    image content answer without a Rekognition call.
+
+    Usage:
+        python manage.py moderate_pending_images --workers 4
+    """
+
+    help = "Scan images that are still pending moderation."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Images scanned at once (default 4).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Scan at most this many images."
+        )
+
+    def handle(self, *args, **options):
+        pending = []
+        for model, field_name in (
+            (Track, "track_image"),
+            (Profile, "profile_picture"),
+        ):
+            rows = (
+                model.objects.filter(moderation_status="PENDING")
+                .exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .order_by("pk")
+            )
+            pending += [
+                (model, pk, field_name)
+                for pk in rows.values_list("pk", flat=True)
+            ]
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+        if not pending:
+            self.stdout.write("No images pending moderation.")
+            return
+
+        with ThreadPoolExecutor(max(1, options["workers"])) as pool:
+            results = Counter(pool.map(lambda row: _moderate(*row), pending))
+
+        # Feed versions are bumped by moderate_image for each verdict
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Approved {results['APPROVED']}, rejected "
+                f"{results['REJECTED']}; {results[None]} still pending."
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from tracks.models import ModerationVerdict
+from tracks.services.moderation import config_version
+
+
+class Command(BaseCommand):
+    """
+    Report how much the moderation verdict cache saves: stored verdicts
+    (each one Rekognition call), hits answered from the cache, and the
+    resulting hit rate.
+
+    Usage:
+        python manage.py moderation_cache_stats
+    """
+
+    help = "Show moderation verdict cache hit rate and saved calls."
+
+    def handle(self, *args, **options):
+        stats = ModerationVerdict.objects.stats()
+        version = config_version()
+        current = ModerationVerdict.objects.filter(config_version=version)
+        self.stdout.write(
+            f"Verdicts stored: {stats['verdicts']}\n"
+            f"Calls saved:     {stats['saved_calls']}\n"
+            f"Hit rate:        {stats['hit_rate']:.1%}\n"
+            f"Current rules:   {version} "
+            f"({current.count()} verdict(s))"
+        )
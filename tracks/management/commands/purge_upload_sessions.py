@@ -0,0 +1,54 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracks.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Discard resumable upload sessions that have received no chunk "
+        "for a while, and any partial files left without a session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Expire sessions idle for this many hours (default 24).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+        expired = 0
+        for session in stale.iterator():
+            session.discard()
+            expired += 1
+
+        orphans = 0
+        directory = settings.UPLOAD_SESSION_DIR
+        if os.path.isdir(directory):
+            known = {
+                f"{pk}.part"
+                for pk in UploadSession.objects.values_list("pk", flat=True)
+            }
+            for entry in os.scandir(directory):
+                if (
+                    entry.name.endswith(".part")
+                    and entry.name not in known
+                    and entry.stat().st_mtime < cutoff.timestamp()
+                ):
+                    os.remove(entry.path)
+                    orphans += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Discarded {expired} stale session(s) and "
+                f"{orphans} orphaned file(s)."
+            )
+        )
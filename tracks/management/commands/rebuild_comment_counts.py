@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from comments.models import Comment
+from tracks.models import Track
+from tracks.services.feed_cache import bump_feed_version
+
+
+class Command(BaseCommand):
+    """
+    Recompute Track.visible_comment_count from the comments table.
+
+    The counter is kept up to date by the comment views; this command
+    repairs drift from admin deletes, raw SQL or restored backups.
+
+    Usage:
+        python manage.py rebuild_comment_counts
+    """
+
+    help = "Rebuild the denormalized visible comment counter on tracks."
+
+    def handle(self, *args, **options):
+        visible = (
+            Comment.objects.filter(track=OuterRef("pk"), deleted=False)
+            .order_by()
+            .values("track")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        with transaction.atomic():
+            updated = Track.objects.update(
+                visible_comment_count=Coalesce(Subquery(visible), 0)
+            )
+        bump_feed_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt comment counts for {updated} track(s)."
+            )
+        )
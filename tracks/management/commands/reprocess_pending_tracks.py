@@ -0,0 +1,87 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from tracks.models import Track
+from tracks.services.processing import process_track
+
+
+def _process(track_id):
+    """Process one track on its own thread's connection."""
+    try:
+        process_track(track_id)
+        return (
+            Track.objects.filter(pk=track_id)
+            .values_list("processing_status", flat=True)
+            .first()
+        )
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    """
+    Process tracks whose background processing never finished.
+
+    Uploads are processed by the in-process background pool, which
+    keeps nothing on disk: a track whose task was lost to a dyno
+    restart or a recycled worker stays PENDING (or PROCESSING) and its
+    page shows "Processing audio..." forever. Run this command from a
+    scheduler to pick such tracks up. Only tracks last saved more than
+    --min-age minutes ago are touched, so uploads still queued or
+    running normally are left alone.
+
+    Usage:
+        python manage.py reprocess_pending_tracks --min-age 30
+    """
+
+    help = "Re-run processing for tracks stuck in PENDING/PROCESSING."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=30,
+            help="Minutes since the track was saved (default 30).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Tracks processed at once (default 2).",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Process at most this many tracks."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options["min_age"])
+        pending = list(
+            Track.objects.filter(
+                processing_status__in=["PENDING", "PROCESSING"],
+                updated_at__lt=cutoff,
+            )
+            .exclude(audio_file="")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+        if not pending:
+            self.stdout.write("No stale tracks to process.")
+            return
+
+        with ThreadPoolExecutor(max(1, options["workers"])) as pool:
+            results = Counter(pool.map(_process, pending))
+
+        # process_track bumps the feed version for each track
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {results['READY']} track(s); "
+                f"{results['FAILED']} failed."
+            )
+        )
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_visible_comment_count(apps, schema_editor):
+    Track = apps.get_model("tracks", "Track")
+    Comment = apps.get_model("comments", "Comment")
+    visible = (
+        Comment.objects.filter(track=OuterRef("pk"), deleted=False)
+        .order_by()
+        .values("track")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    Track.objects.update(
+        visible_comment_count=Coalesce(Subquery(visible), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_comment_deleted'),
+        ('tracks', '0006_track_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='visible_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            populate_visible_comment_count, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0007_track_visible_comment_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                condition=models.Q(("moderation_status", "APPROVED")),
+                fields=["-created_at", "-id"],
+                name="track_approved_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                fields=["user", "-created_at"], name="track_user_created_idx"
+            ),
+        ),
+    ]
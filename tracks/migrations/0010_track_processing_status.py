@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0009_track_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="audio_metadata",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        # Existing tracks were processed inline at upload time
+        migrations.AddField(
+            model_name="track",
+            name="processing_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PROCESSING", "Processing"),
+                    ("READY", "Ready"),
+                    ("FAILED", "Failed"),
+                ],
+                default="READY",
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="track",
+            name="processing_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PROCESSING", "Processing"),
+                    ("READY", "Ready"),
+                    ("FAILED", "Failed"),
+                ],
+                default="PENDING",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0011_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="waveform",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:45
+
+import tracks.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0013_track_hls_manifest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("sha256", models.CharField(db_index=True, max_length=64)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=1)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="track",
+            name="audio_file",
+            field=tracks.models.ContentAddressedFileField(
+                blank=True, upload_to="tracks/"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="track",
+            name="track_image",
+            field=tracks.models.ContentAddressedImageField(
+                blank=True, null=True, upload_to="track_images/"
+            ),
+        ),
+    ]
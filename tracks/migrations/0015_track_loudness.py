@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0014_media_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="gain_db",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="track",
+            name="loudness_lufs",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="track",
+            name="true_peak_dbtp",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
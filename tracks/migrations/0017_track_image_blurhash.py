@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0016_track_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="image_blurhash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+    ]
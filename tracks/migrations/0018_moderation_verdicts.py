@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0017_track_image_blurhash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModerationVerdict",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64)),
+                ("dhash", models.BigIntegerField(blank=True, null=True)),
+                ("config_version", models.CharField(max_length=16)),
+                ("allowed", models.BooleanField()),
+                ("labels", models.JSONField(blank=True, default=list)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_hit_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("allowed", False)),
+                        fields=["config_version", "dhash"],
+                        name="moderation_blocked_dhash_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sha256", "config_version"),
+                        name="moderation_verdict_unique",
+                    )
+                ],
+            },
+        ),
+    ]
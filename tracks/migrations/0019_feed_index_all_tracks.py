@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0018_moderation_verdicts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="track",
+            name="track_approved_feed_idx",
+        ),
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="track_feed_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0019_feed_index_all_tracks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="loudness_measured_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
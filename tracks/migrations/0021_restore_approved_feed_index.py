@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0020_track_loudness_measured_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="track",
+            name="track_feed_idx",
+        ),
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                condition=models.Q(("moderation_status", "APPROVED")),
+                fields=["-created_at", "-id"],
+                name="track_approved_feed_idx",
+            ),
+        ),
+    ]
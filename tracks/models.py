@@ -1,11 +1,229 @@
+import base64
+import hashlib
 import os
+import re
+import uuid
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
+from django.urls import reverse
 from django.utils.text import slugify
 
+from core.images import delete_variants, image_sources
+
+from .services.loudness import gain_to_volume
+from .services.streaming import hls_url_path
+
+# Slug base length, leaving room for a "-<n>" suffix in the 50 char column
+SLUG_BASE_LENGTH = 40
+# Attempts at allocating a free slug before giving up on a save
+SLUG_SAVE_ATTEMPTS = 5
+# Marker for a title that was deferred when the row was loaded
+_NOT_LOADED = object()
+# Text search configuration for the stored search vector and queries
+SEARCH_CONFIG = "english"
+
+
+class MediaBlobManager(models.Manager):
+    def acquire(self, storage, name, content, sha256):
+        """
+        Take a reference to the blob stored as `name`, uploading
+        `content` only if no track references it yet.
+
+        The row lock serialises acquire() and release() for one name,
+        so a blob is never deleted while another upload is reusing it.
+
+        Returns:
+            str: The storage name
+        """
+        with transaction.atomic():
+            blob, created = self.select_for_update().get_or_create(
+                name=name,
+                defaults={"sha256": sha256, "size": content.size},
+            )
+            if not created:
+                self.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+            elif not storage.exists(name):
+                stored = storage.save(name, content)
+                if stored != name:
+                    raise IntegrityError(f"Storage renamed blob {name}")
+        return name
+
+    def release(self, storage, name):
+        """
+        Drop one reference to `name`, deleting the stored file with the
+        last one. Files saved before content addressing have no blob
+        row and belong to a single track, so they are deleted directly.
+
+        Returns:
+            bool: True if the stored file was deleted
+        """
+        if not name:
+            return False
+        with transaction.atomic():
+            blob = self.select_for_update().filter(name=name).first()
+            if blob is not None and blob.ref_count > 1:
+                self.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+                return False
+            if blob is not None:
+                blob.delete()
+            storage.delete(name)
+        return True
+
+
+class MediaBlob(models.Model):
+    """
+    A stored media file shared by every track that uploaded the same
+    bytes.
+
+    Content-addressed fields store new files under their SHA-256, so
+    re-uploading the same bounce or cover art adds a reference instead
+    of a second object. The file is deleted with its last reference.
+
+    Attributes:
+        name (str): Storage name, e.g. "tracks/<sha256>.wav".
+        sha256 (str): Hex digest of the content.
+        size (int): Size in bytes.
+        ref_count (int): Number of track fields pointing at the file.
+        created_at (DateTimeField): When the file was first stored.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = MediaBlobManager()
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class ModerationVerdictManager(models.Manager):
+    def stats(self):
+        """
+        Cache effectiveness across every stored verdict.
+
+        Each row cost one Rekognition call and each hit saved one, so
+        the hit rate is hits / (hits + rows).
+
+        Returns:
+            dict: {"verdicts": int, "saved_calls": int, "hit_rate": float}
+        """
+        totals = self.aggregate(
+            verdicts=Count("pk"), saved_calls=Sum("hit_count")
+        )
+        verdicts = totals["verdicts"]
+        saved = totals["saved_calls"] or 0
+        scans = verdicts + saved
+        return {
+            "verdicts": verdicts,
+            "saved_calls": saved,
+            "hit_rate": saved / scans if scans else 0.0,
+        }
+
+
+class ModerationVerdict(models.Model):
+    """
+    A Rekognition moderation verdict cached by image content, so the
+    same bytes are never sent to AWS twice under the same rules.
+
+    Attributes:
+        sha256 (str): Hex digest of the scanned bytes.
+        dhash (int): 64-bit difference hash of the image, used to reuse
+            blocking verdicts for near-duplicates (None if undecodable).
+        config_version (str): Fingerprint of the thresholds the verdict
+            was reached under (tracks.services.moderation).
+        allowed (bool): Whether the image passed.
+        labels (list): Moderation labels Rekognition returned.
+        hit_count (int): Scans answered from this row instead of AWS.
+        created_at (DateTimeField): When the image was scanned.
+        last_hit_at (DateTimeField): When the row last answered a scan.
+    """
+
+    sha256 = models.CharField(max_length=64)
+    dhash = models.BigIntegerField(blank=True, null=True)
+    config_version = models.CharField(max_length=16)
+    allowed = models.BooleanField()
+    labels = models.JSONField(default=list, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+
+    objects = ModerationVerdictManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sha256", "config_version"],
+                name="moderation_verdict_unique",
+            ),
+        ]
+        indexes = [
+            # Near-duplicate lookups only consider blocking verdicts
+            models.Index(
+                fields=["config_version", "dhash"],
+                name="moderation_blocked_dhash_idx",
+                condition=models.Q(allowed=False),
+            ),
+        ]
+
+    def __str__(self):
+        verdict = "allowed" if self.allowed else "blocked"
+        return f"{self.sha256[:12]} {verdict} ({self.hit_count} hits)"
+
+
+class ContentAddressedFileMixin:
+    """
+    Store new files as MediaBlobs named by their SHA-256.
+
+    The digest computed by the inspecting upload handlers is reused
+    when present; other files (admin, scripts) are hashed here. Release
+    references with MediaBlob.objects.release() rather than deleting
+    the file.
+    """
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            file.name = self._acquire_blob(model_instance, file)
+            file._committed = True
+        return super().pre_save(model_instance, add)
+
+    def _acquire_blob(self, model_instance, file):
+        content = file.file
+        sha256 = getattr(content, "sha256", None)
+        if not sha256:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+        ext = os.path.splitext(file.name)[1].lower()
+        name = self.generate_filename(model_instance, f"{sha256}{ext}")
+        return MediaBlob.objects.acquire(self.storage, name, content, sha256)
+
+
+class ContentAddressedFileField(ContentAddressedFileMixin, models.FileField):
+    pass
+
+
+class ContentAddressedImageField(ContentAddressedFileMixin, models.ImageField):
+    pass
+
+
+def track_search_vector():
+    """Weighted tsvector expression: title ranks above description."""
+    return SearchVector(
+        "title", weight="A", config=SEARCH_CONFIG
+    ) + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+
 
 # Create your models here.
 class Track(models.Model):
@@ -17,12 +235,36 @@ class Track(models.Model):
         description (str): A brief description of the track.
         audio_file (FileField): The audio file of the track.
         track_image (ImageField): An optional image associated with the track.
+        image_variants (dict): Resized WebP/AVIF copies of track_image
+            (see core.images), built in the background.
+        image_blurhash (str): Blurhash placeholder for track_image,
+            computed on upload.
         user (ForeignKey): The user who uploaded the track.
         tags (str): Comma-separated tags for the track.
         created_at (DateTimeField): Timestamp when the track was created.
         updated_at (DateTimeField): Timestamp when the track was last updated.
+        visible_comment_count (int): Denormalized count of non-deleted
+            comments, maintained by the comment views.
+        search_vector (tsvector): Stored full-text vector over title and
+            description, maintained by save() on PostgreSQL.
+        processing_status (str): Progress of background audio processing
+            (duration and technical metadata extraction).
+        audio_metadata (dict): Technical metadata found by processing.
+        waveform (bytes): Min/max peaks for drawing the waveform, as
+            interleaved int8 pairs (see tracks.services.waveform).
+        hls_manifest (str): Storage name of the HLS master playlist for
+            adaptive-bitrate playback, empty until transcoded.
+        loudness_lufs (float): Integrated loudness (ITU-R BS.1770).
+        true_peak_dbtp (float): True peak level.
+        gain_db (float): Playback gain that normalizes the track's
+            loudness (see tracks.services.loudness).
+        loudness_measured_at (datetime): When loudness was last
+            measured, set even if the audio was too short or silent
+            to give a value.
     Methods:
         save(): Auto-generates a slug from the title if not provided.
+        adjust_visible_comment_count(): Atomically shift the comment counter.
+        update_search_vector(): Recompute the stored full-text vector.
 
     """
 
@@ -32,10 +274,17 @@ class Track(models.Model):
     description = models.TextField(max_length=1000, blank=True, null=True)
 
     # File and image fields
-    audio_file = models.FileField(upload_to="tracks/", blank=True)
-    track_image = models.ImageField(
+    # Content-addressed: identical uploads share one stored MediaBlob
+    audio_file = ContentAddressedFileField(upload_to="tracks/", blank=True)
+    track_image = ContentAddressedImageField(
         upload_to="track_images/", blank=True, null=True
     )
+    # Responsive derivatives of track_image (see tracks.services.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Placeholder painted while the artwork loads (see core.images)
+    image_blurhash = models.CharField(
+        max_length=64, blank=True, default="", editable=False
+    )
 
     # User who uploaded the track
     user = models.ForeignKey(
@@ -65,46 +314,200 @@ class Track(models.Model):
         null=True, blank=True, help_text="Duration in seconds"
     )
 
+    # Denormalized counter so feed cards never aggregate comments
+    visible_comment_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+
+    # Background audio processing (see tracks.services.processing)
+    PROCESSING_STATUS = (
+        ("PENDING", "Pending"),
+        ("PROCESSING", "Processing"),
+        ("READY", "Ready"),
+        ("FAILED", "Failed"),
+    )
+    processing_status = models.CharField(
+        max_length=10, choices=PROCESSING_STATUS, default="PENDING"
+    )
+    audio_metadata = models.JSONField(blank=True, null=True, editable=False)
+    waveform = models.BinaryField(blank=True, null=True, editable=False)
+    hls_manifest = models.CharField(
+        max_length=255, blank=True, default="", editable=False
+    )
+    loudness_lufs = models.FloatField(blank=True, null=True, editable=False)
+    true_peak_dbtp = models.FloatField(blank=True, null=True, editable=False)
+    gain_db = models.FloatField(blank=True, null=True, editable=False)
+    loudness_measured_at = models.DateTimeField(
+        blank=True, null=True, editable=False
+    )
+
+    # Full-text search vector, kept in sync by save()
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ["-created_at"]  # Newest tracks first
+        indexes = [
+            # Feed: approved tracks, keyset-paginated on (created_at, id)
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="track_approved_feed_idx",
+                condition=models.Q(moderation_status="APPROVED"),
+            ),
+            # Profile pages: a user's tracks, newest first
+            models.Index(
+                fields=["user", "-created_at"],
+                name="track_user_created_idx",
+            ),
+            # Full-text search over title and description
+            GinIndex(fields=["search_vector"], name="track_search_idx"),
+        ]
 
     def __str__(self):
         display_name = self.user.profile.display_name
         username = self.user.profile.username
         return f"{self.title} by {display_name or username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the title as loaded so save() can detect edits."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_title = instance.__dict__.get("title", _NOT_LOADED)
+        return instance
+
+    def _title_changed(self):
+        """Compare against the loaded title, querying only if deferred."""
+        loaded = getattr(self, "_loaded_title", _NOT_LOADED)
+        if loaded is _NOT_LOADED:
+            loaded = (
+                Track.objects.filter(pk=self.pk)
+                .values_list("title", flat=True)
+                .first()
+            )
+        return loaded != self.title
+
+    def _allocate_slug(self):
+        """
+        Find the first free slug for this title in a single query.
+
+        Fetches only the existing "<base>" and "<base>-<n>" slugs, so a
+        short base such as "a" does not load every slug sharing its
+        prefix, and picks the lowest unused suffix, matching the old
+        one-query-per-counter loop without its O(n) round trips.
+        """
+        # Leave room for a "-<n>" suffix within the 50 character column
+        base_slug = slugify(self.title)[:SLUG_BASE_LENGTH].rstrip("-")
+        base_slug = base_slug or "track"
+        suffixed = rf"^{re.escape(base_slug)}-(\d+)$"
+        pattern = re.compile(rf"^{re.escape(base_slug)}(?:-(\d+))?$")
+
+        taken = set()
+        existing = (
+            Track.objects.filter(
+                # The prefix lookup can use the slug column's LIKE index
+                # and narrows the rows the regex is evaluated on
+                models.Q(slug=base_slug)
+                | models.Q(
+                    slug__startswith=f"{base_slug}-", slug__regex=suffixed
+                )
+            )
+            .exclude(pk=self.pk)
+            .values_list("slug", flat=True)
+        )
+        for slug in existing:
+            match = pattern.match(slug)
+            if match:
+                taken.add(int(match.group(1) or 0))
+
+        if 0 not in taken:
+            return base_slug
+        counter = 1
+        while counter in taken:
+            counter += 1
+        return f"{base_slug}-{counter}"
+
     def save(self, *args, **kwargs):
         # Generate slug from title if not provided OR if title has changed
-        if not self.slug or (self.pk and self.title):
-            # For existing tracks, check if title changed
-            if self.pk:
-                try:
-                    old_track = Track.objects.get(pk=self.pk)
-                    if old_track.title != self.title:
-                        # Title changed, regenerate slug
-                        base_slug = slugify(self.title)
-                        slug = base_slug
-                        counter = 1
-                        while (
-                            Track.objects.filter(slug=slug)
-                            .exclude(pk=self.pk)
-                            .exists()
-                        ):
-                            slug = f"{base_slug}-{counter}"
-                            counter += 1
-                        self.slug = slug
-                except Track.DoesNotExist:
-                    pass
-            else:
-                # New track, generate slug
-                base_slug = slugify(self.title)
-                slug = base_slug
-                counter = 1
-                while Track.objects.filter(slug=slug).exists():
-                    slug = f"{base_slug}-{counter}"
-                    counter += 1
-                self.slug = slug
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        title_saved = update_fields is None or "title" in update_fields
+        regenerate = not self.slug or (
+            self.pk and title_saved and self._title_changed()
+        )
+        if not regenerate:
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_new_slug(*args, **kwargs)
+        self._loaded_title = self.title
+
+        text_saved = update_fields is None or {"title", "description"} & set(
+            update_fields
+        )
+        if text_saved:
+            self.update_search_vector()
+
+    def _save_with_new_slug(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"slug"}
+
+        # New content-addressed files take their MediaBlob reference in
+        # pre_save, inside the savepoint below. A failed attempt rolls
+        # the reference back, so the retry must take it again.
+        new_files = [
+            file
+            for field in self._meta.concrete_fields
+            if isinstance(field, ContentAddressedFileMixin)
+            and (update_fields is None or field.name in update_fields)
+            and (file := getattr(self, field.attname))
+            and not file._committed
+        ]
+
+        # Another upload can claim the same slug between allocation and
+        # INSERT; re-allocate and retry when the unique constraint fires
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = self._allocate_slug()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                for file in new_files:
+                    file._committed = False
+                slug_taken = (
+                    Track.objects.filter(slug=self.slug)
+                    .exclude(pk=self.pk)
+                    .exists()
+                )
+                if not slug_taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+
+    def update_search_vector(self):
+        """
+        Recompute the stored search vector from the saved title and
+        description in one UPDATE.
+
+        Only PostgreSQL has tsvector support; other backends keep the
+        column NULL and search falls back to substring matching.
+        """
+        if connection.vendor != "postgresql":
+            return
+        Track.objects.filter(pk=self.pk).update(
+            search_vector=track_search_vector()
+        )
+
+    def adjust_visible_comment_count(self, delta):
+        """
+        Shift the visible comment counter by `delta` in a single UPDATE.
+
+        Uses an F() expression so concurrent comment posts cannot lose
+        increments; call inside the same transaction as the comment write.
+        Cached feed pages are left alone: the feed reads comment counts
+        fresh on every request (see get_feed_payload).
+        """
+        Track.objects.filter(pk=self.pk).update(
+            visible_comment_count=Greatest(
+                F("visible_comment_count") + delta, 0
+            )
+        )
 
     def get_audio_filename(self):
         """Return just the filename without path."""
@@ -118,6 +521,50 @@ class Track(models.Model):
             return os.path.basename(self.track_image.name)
         return "No image"
 
+    @property
+    def is_processing(self):
+        """True until background processing has finished or failed."""
+        return self.processing_status in ("PENDING", "PROCESSING")
+
+    @property
+    def hls_url(self):
+        """
+        Members-only URL of the HLS master playlist, or None if not
+        transcoded.
+        """
+        if not self.hls_manifest:
+            return None
+        return reverse(
+            "track_hls", args=[self.slug, hls_url_path(self.hls_manifest)]
+        )
+
+    @property
+    def stream_url(self):
+        """Members-only byte-range endpoint for the original audio."""
+        return reverse("track_stream", args=[self.slug])
+
+    @property
+    def playback_url(self):
+        """Preferred URL for players: HLS when available, else stream."""
+        return self.hls_url or self.stream_url
+
+    @property
+    def playback_gain(self):
+        """Linear player volume that applies gain_db, or None."""
+        return gain_to_volume(self.gain_db)
+
+    @property
+    def image_sources(self):
+        """<source> type/srcset pairs for the artwork derivatives."""
+        return image_sources(self.track_image.storage, self.image_variants)
+
+    @property
+    def waveform_base64(self):
+        """Stored waveform peaks as base64 text, for templates and JSON."""
+        if not self.waveform:
+            return None
+        return base64.b64encode(bytes(self.waveform)).decode("ascii")
+
     def get_duration_display(self):
         """Return duration in MM:SS format"""
         if not self.duration:
@@ -128,17 +575,82 @@ class Track(models.Model):
         return f"{minutes}:{seconds:02d}"
 
 
+class UploadSession(models.Model):
+    """
+    A resumable (tus-style) audio upload in progress.
+
+    Chunks are appended to a file on local disk at `offset`; once the
+    offset reaches `size` the file is handed to TrackUploadForm like
+    any other upload. Sessions live on the disk of the web process
+    that created them (see settings.UPLOAD_SESSION_DIR).
+
+    Attributes:
+        id (UUID): Session id used in upload URLs.
+        user (ForeignKey): The uploader; only they can write to it.
+        filename (str): Original client filename.
+        size (int): Declared total size in bytes.
+        offset (int): Bytes received so far.
+        created_at (DateTimeField): When the session was started.
+        updated_at (DateTimeField): Last chunk received, used by
+            purge_upload_sessions to expire abandoned uploads.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
+
+    @property
+    def path(self):
+        """Local file the received chunks are appended to."""
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{self.id}.part")
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    def discard(self):
+        """Delete the session and its partial file."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.delete()
+
+
 # Signal handler to delete files from S3 when a Track is deleted
 @receiver(post_delete, sender=Track)
 def delete_files_on_track_delete(sender, instance, **kwargs):
-    """Delete audio and image files from S3 when a Track instance is deleted.
+    """Release audio and image files when a Track instance is deleted.
+
+    Shared blobs are only deleted from S3 with their last reference,
+    and artwork derivatives go with the artwork.
     Args:
         sender (Model): The model class that sent the signal.
         instance (Track): The instance of the Track being deleted.
         **kwargs: Additional keyword arguments.
     """
-    # Check if the instance has audio_file and track_image, then delete them
+    from .services.hls import delete_renditions
+
+    # Check if the instance has audio_file and track_image, then release them
+    delete_renditions(instance.hls_manifest)
     if instance.audio_file:
-        instance.audio_file.delete(save=False)
-    if instance.track_image:
-        instance.track_image.delete(save=False)
+        MediaBlob.objects.release(
+            instance.audio_file.storage, instance.audio_file.name
+        )
+    if instance.track_image and MediaBlob.objects.release(
+        instance.track_image.storage, instance.track_image.name
+    ):
+        delete_variants(
+            instance.track_image.storage, instance.track_image.name
+        )
@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Worker threads do not survive fork(); a preforked gunicorn worker
+    # must start its own pool rather than inherit a dead one
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def init_worker_process():
+    """
+    ProcessPoolExecutor initializer for management commands that use
+    Django in worker processes. Works under any start method; forked
+    workers drop the database connections inherited from the parent.
+    """
+    import django
+
+    django.setup()
+    connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+                    thread_name_prefix="tracks-bg",
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    # Each task gets a fresh view of the connection state, as a request
+    # would, and never leaks its connection back to the pool thread
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", func.__name__)
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) on the in-process background pool.
+
+    Exceptions are logged, not raised. With BACKGROUND_TASKS_EAGER set
+    (useful for management commands and local debugging) the task runs
+    synchronously in the caller's thread instead.
+    """
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception("Background task %s failed", func.__name__)
+        return
+    _get_executor().submit(_run, func, args, kwargs)
+
+
+def submit_later(delay, func, *args, **kwargs):
+    """
+    Submit func(*args, **kwargs) to the background pool after `delay`
+    seconds, without holding a pool thread while waiting. Used for
+    retries with backoff; in eager mode the task runs immediately.
+    """
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        submit(func, *args, **kwargs)
+        return
+    timer = threading.Timer(delay, submit, (func, *args), kwargs)
+    timer.daemon = True
+    timer.start()
+
+
+def run_after_commit(func, *args, **kwargs):
+    """
+    Schedule a background task once the current transaction commits.
+
+    The task never sees uncommitted rows and is dropped if the
+    transaction rolls back. Outside a transaction it is submitted
+    immediately.
+    """
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
@@ -0,0 +1,230 @@
+import math
+import os
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from core.uploadhandlers import AUDIO_CONTENT_TYPES, HEADER_BYTES, sniff_format
+from core.utils import sanitize_upload_name
+
+from ..models import Track
+
+# S3 requires every part but the last to be at least 5 MiB
+PART_SIZE = 8 * 1024 * 1024
+# Lifetime of presigned part URLs, in seconds
+PART_URL_EXPIRES = 3600
+
+AUDIO_EXTENSIONS = {f".{ext}" for ext in AUDIO_CONTENT_TYPES}
+
+
+class DirectUploadError(ValueError):
+    """Raised when a direct upload request is invalid or S3 rejects it."""
+
+
+class StoredUpload:
+    """
+    An audio file already in the bucket, described with the same
+    attributes the inspecting upload handlers set on request files
+    (size, sniffed_format, upload_header, exceeds_limit), so
+    TrackUploadForm validates both kinds of upload the same way.
+    """
+
+    sha256 = None
+
+    def __init__(self, name, size, header):
+        self.name = name
+        self.size = size
+        self.upload_header = header
+        self.sniffed_format = sniff_format(header)
+        self.exceeds_limit = size > max_audio_size()
+
+
+def max_audio_size():
+    return settings.UPLOAD_MAX_SIZES["audio_file"]
+
+
+def _storage():
+    return Track._meta.get_field("audio_file").storage
+
+
+def _client(storage):
+    # The storage's boto3 client honours AWS_S3_ENDPOINT_URL, so the
+    # same code runs against a local S3 stand-in such as moto server
+    return storage.connection.meta.client
+
+
+def _key(storage, name):
+    return storage._normalize_name(name)
+
+
+def start_upload(filename, size):
+    """
+    Create a multipart upload and presign a URL for every part.
+
+    The object's Content-Type comes from the validated extension, never
+    from the client: the bucket serves media publicly, so a client
+    supplied text/html or image/svg+xml would be stored XSS.
+
+    Args:
+        filename (str): Client filename, used for the extension and a
+            sanitized ULID-suffixed storage name
+        size (int): Total file size in bytes
+
+    Returns:
+        dict: upload_id, name, part_size and parts [{part_number, url}]
+
+    Raises:
+        DirectUploadError: If the file is unacceptable or S3 fails
+    """
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if ext not in AUDIO_CONTENT_TYPES:
+        raise DirectUploadError(
+            "Please upload MP3, WAV, FLAC, M4A, AAC, or OGG files."
+        )
+    if not isinstance(size, int) or size <= 0:
+        raise DirectUploadError("Invalid file size.")
+    if size > max_audio_size():
+        raise DirectUploadError("File size exceeds 100MB limit.")
+
+    field = Track._meta.get_field("audio_file")
+    name = field.generate_filename(
+        None, sanitize_upload_name(filename, "track")
+    )
+    storage = _storage()
+    client = _client(storage)
+    key = _key(storage, name)
+    try:
+        upload = client.create_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=key,
+            ContentType=AUDIO_CONTENT_TYPES[ext],
+        )
+        parts = [
+            {
+                "part_number": number,
+                "url": client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": storage.bucket_name,
+                        "Key": key,
+                        "UploadId": upload["UploadId"],
+                        "PartNumber": number,
+                    },
+                    ExpiresIn=PART_URL_EXPIRES,
+                ),
+            }
+            for number in range(1, math.ceil(size / PART_SIZE) + 1)
+        ]
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError("Could not start the upload.") from e
+
+    return {
+        "upload_id": upload["UploadId"],
+        "name": name,
+        "part_size": PART_SIZE,
+        "parts": parts,
+    }
+
+
+def uploaded_size(client, bucket, key, upload_id):
+    """Total bytes stored so far in the parts of a multipart upload."""
+    pages = client.get_paginator("list_parts").paginate(
+        Bucket=bucket, Key=key, UploadId=upload_id
+    )
+    return sum(
+        part["Size"] for page in pages for part in page.get("Parts", [])
+    )
+
+
+def complete_upload(name, upload_id, parts):
+    """
+    Assemble the uploaded parts and describe the resulting object.
+
+    Presigned part URLs cannot cap how much a client PUTs, so the
+    stored parts are totalled first and an upload over the size limit
+    is aborted without being assembled. Only the object's size and its
+    first HEADER_BYTES are fetched, so the server never downloads the
+    audio itself.
+
+    The object is not registered as a content-addressed MediaBlob: its
+    SHA-256 is unknown without downloading it, and S3's multipart
+    checksums are computed per part, so they cannot be matched against
+    blob names. Like files stored before content addressing, it belongs
+    to one track and MediaBlob.objects.release() deletes it directly.
+
+    Args:
+        name (str): Storage name returned by start_upload()
+        upload_id (str): Multipart upload id
+        parts (list): [{"part_number": int, "etag": str}, ...]
+
+    Returns:
+        StoredUpload: The assembled file
+
+    Raises:
+        DirectUploadError: If the part list is invalid, the parts exceed
+        the size limit, or S3 fails
+    """
+    try:
+        part_list = sorted(
+            (
+                {"PartNumber": int(p["part_number"]), "ETag": str(p["etag"])}
+                for p in parts
+            ),
+            key=lambda p: p["PartNumber"],
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise DirectUploadError("Invalid part list.") from e
+    if not part_list:
+        raise DirectUploadError("Invalid part list.")
+
+    storage = _storage()
+    client = _client(storage)
+    key = _key(storage, name)
+    try:
+        too_large = (
+            uploaded_size(client, storage.bucket_name, key, upload_id)
+            > max_audio_size()
+        )
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError("Could not complete the upload.") from e
+    if too_large:
+        raise DirectUploadError("File size exceeds 100MB limit.")
+
+    try:
+        client.complete_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": part_list},
+        )
+        size = client.head_object(Bucket=storage.bucket_name, Key=key)[
+            "ContentLength"
+        ]
+        header = client.get_object(
+            Bucket=storage.bucket_name,
+            Key=key,
+            Range=f"bytes=0-{HEADER_BYTES - 1}",
+        )["Body"].read()
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError("Could not complete the upload.") from e
+    return StoredUpload(name, size, header)
+
+
+def abort_upload(name, upload_id):
+    """Abandon a multipart upload so S3 frees the stored parts."""
+    storage = _storage()
+    try:
+        _client(storage).abort_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=_key(storage, name),
+            UploadId=upload_id,
+        )
+    except (BotoCoreError, ClientError):
+        # Already completed or aborted; a bucket lifecycle rule
+        # cleans up anything left behind
+        pass
+
+
+def discard_upload(name):
+    """Delete an assembled object that failed validation."""
+    _storage().delete(name)
@@ -0,0 +1,303 @@
+from django.urls import reverse
+from django.utils.timesince import timesince
+
+from accounts.models import Profile
+from core.images import image_sources
+
+from ..models import Track
+from .feed_cache import get_cached_page, set_cached_page
+from .loudness import gain_to_volume
+from .pagination import keyset_page, offset_page, parse_page_number
+from .streaming import hls_url_path
+from .waveform import encode_peaks
+
+# Tracks per feed page (SSR first page and each infinite-scroll request)
+FEED_PAGE_SIZE = 5
+
+# Columns the feed cards and the JSON API actually read
+FEED_FIELDS = (
+    "id",
+    "title",
+    "slug",
+    "description",
+    "audio_file",
+    "track_image",
+    "image_variants",
+    "image_blurhash",
+    "created_at",
+    "duration",
+    "visible_comment_count",
+    "moderation_status",
+    "processing_status",
+    "waveform",
+    "hls_manifest",
+    "gain_db",
+    "user__id",
+    "user__profile__id",
+    "user__profile__username",
+    "user__profile__display_name",
+    "user__profile__profile_picture",
+    "user__profile__image_variants",
+    "user__profile__image_blurhash",
+    "user__profile__moderation_status",
+)
+
+
+def feed_queryset():
+    """
+    Build the single queryset behind every feed surface.
+
+    Only APPROVED tracks are listed, uploader profiles are joined in the
+    same query and only the columns the feed renders are selected, so a
+    page costs exactly one query whether it is rendered by the template
+    or serialized for the API.
+    """
+    return (
+        Track.objects.filter(moderation_status="APPROVED")
+        .select_related("user__profile")
+        .only(*FEED_FIELDS)
+    )
+
+
+def get_feed_page(cursor=None, page=None, page_size=FEED_PAGE_SIZE):
+    """
+    Return one KeysetPage of the feed.
+
+    Args:
+        cursor (str): Opaque cursor from a previous page
+        page (str|int): Legacy page number, used only without a cursor
+        page_size (int): Tracks per page
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+    """
+    if page and not cursor:
+        return offset_page(feed_queryset(), page, page_size=page_size)
+    return keyset_page(feed_queryset(), cursor=cursor, page_size=page_size)
+
+
+# Columns the JSON API projects with .values(); no model instances or
+# FieldFile descriptors are built for API pages. The key columns that
+# only select_related() needs are left out.
+FEED_VALUES = tuple(
+    f for f in FEED_FIELDS if f not in {"user__id", "user__profile__id"}
+)
+
+# Top-level keys clients may request with ?fields=
+FEED_API_FIELDS = frozenset(
+    {
+        "id",
+        "title",
+        "slug",
+        "description",
+        "hls_url",
+        "stream_url",
+        "playback_url",
+        "image_url",
+        "image_sources",
+        "image_blurhash",
+        "detail_url",
+        "created_at",
+        "created_ago",
+        "comment_count",
+        "duration",
+        "duration_display",
+        "processing_status",
+        "waveform",
+        "gain",
+        "profile",
+    }
+)
+
+# Slug-safe placeholders substituted into reversed URL templates
+_URL_PLACEHOLDER = "__placeholder__"
+_PATH_PLACEHOLDER = "__path__"
+
+
+def feed_values_queryset():
+    """
+    Return feed_queryset() as dicts of FEED_VALUES for the JSON API.
+
+    values() replaces the only() column list and the profile join is
+    done by the user__profile__ lookups, so this keeps the same filter
+    and ordering index as the template feed.
+    """
+    return feed_queryset().values(*FEED_VALUES)
+
+
+def parse_fields(value):
+    """
+    Parse a sparse fieldset (?fields=title,stream_url,...).
+
+    Returns:
+        frozenset: Requested top-level keys (always including "id"),
+        or None when all fields are wanted
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not value:
+        return None
+    fields = {f.strip() for f in value.split(",") if f.strip()}
+    unknown = fields - FEED_API_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(fields | {"id"})
+
+
+class RowSerializer:
+    """
+    Serialize feed rows from FEED_VALUES projections.
+
+    URL prefixes are resolved once per serializer instead of calling
+    reverse() and FieldFile.url for every item.
+    """
+
+    def __init__(self):
+        self.detail_url = reverse("track_detail", args=[_URL_PLACEHOLDER])
+        self.stream_url = reverse("track_stream", args=[_URL_PLACEHOLDER])
+        self.hls_url = reverse(
+            "track_hls", args=[_URL_PLACEHOLDER, _PATH_PLACEHOLDER]
+        )
+        self.profile_url = reverse("profile", args=[_URL_PLACEHOLDER])
+        self.image_storage = Track._meta.get_field("track_image").storage
+        self.avatar_storage = Profile._meta.get_field(
+            "profile_picture"
+        ).storage
+
+    def __call__(self, row):
+        username = row["user__profile__username"]
+        duration = row["duration"]
+        approved = row["moderation_status"] == "APPROVED"
+        avatar = row["user__profile__profile_picture"]
+        avatar_approved = row["user__profile__moderation_status"] == "APPROVED"
+        # Audio is only ever served through the members-only views
+        stream_url = self.stream_url.replace(_URL_PLACEHOLDER, row["slug"])
+        hls_url = (
+            self.hls_url.replace(_URL_PLACEHOLDER, row["slug"], 1).replace(
+                _PATH_PLACEHOLDER, hls_url_path(row["hls_manifest"]), 1
+            )
+            if row["hls_manifest"]
+            else None
+        )
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "slug": row["slug"],
+            "description": row["description"] or "",
+            "hls_url": hls_url,
+            "stream_url": stream_url,
+            "playback_url": hls_url or stream_url,
+            "image_url": (
+                self.image_storage.url(row["track_image"])
+                if (row["track_image"] and approved)
+                else None
+            ),
+            # WebP/AVIF srcsets; image_url stays the <img> fallback
+            "image_sources": (
+                image_sources(self.image_storage, row["image_variants"])
+                if (row["track_image"] and approved)
+                else []
+            ),
+            # Placeholder painted until the artwork loads
+            "image_blurhash": (
+                row["image_blurhash"]
+                if (row["track_image"] and approved)
+                else ""
+            ),
+            "detail_url": self.detail_url.replace(
+                _URL_PLACEHOLDER, row["slug"]
+            ),
+            "created_at": row["created_at"],
+            "comment_count": row["visible_comment_count"],
+            "duration": duration,
+            "duration_display": (
+                f"{duration // 60}:{duration % 60:02d}" if duration else None
+            ),
+            "processing_status": row["processing_status"],
+            "waveform": encode_peaks(row["waveform"]),
+            "gain": gain_to_volume(row["gain_db"]),
+            "profile": {
+                "username": username,
+                "display_name": row["user__profile__display_name"] or username,
+                "url": self.profile_url.replace(_URL_PLACEHOLDER, username),
+                "avatar": (
+                    self.avatar_storage.url(avatar)
+                    if (avatar and avatar_approved)
+                    else None
+                ),
+                "avatar_sources": (
+                    image_sources(
+                        self.avatar_storage,
+                        row["user__profile__image_variants"],
+                    )
+                    if (avatar and avatar_approved)
+                    else []
+                ),
+                "avatar_blurhash": (
+                    row["user__profile__image_blurhash"]
+                    if (avatar and avatar_approved)
+                    else ""
+                ),
+            },
+        }
+
+
+def get_feed_payload(cursor=None, page=None, fields=None):
+    """
+    Return the JSON payload for one feed page, served from the page
+    cache when possible.
+
+    Args:
+        cursor (str): Opaque cursor from a previous page
+        page (str|int): Legacy page number, used only without a cursor
+        fields (frozenset): Sparse fieldset from parse_fields(), or None
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+    """
+    if cursor:
+        page = None
+    elif page:
+        # One cache entry per page, however the number was spelled
+        page = parse_page_number(page)
+
+    payload = get_cached_page(cursor=cursor, page=page)
+    if payload is None:
+        if page:
+            page_obj = offset_page(
+                feed_values_queryset(), page, page_size=FEED_PAGE_SIZE
+            )
+        else:
+            page_obj = keyset_page(
+                feed_values_queryset(), cursor=cursor, page_size=FEED_PAGE_SIZE
+            )
+        serialize = RowSerializer()
+        payload = {
+            "tracks": [serialize(row) for row in page_obj],
+            "has_next": page_obj.has_next(),
+            "next_cursor": page_obj.next_cursor,
+            "page": page_obj.number,
+        }
+        set_cached_page(payload, cursor=cursor, page=page)
+
+    # Comment counts change with every post, so they are read fresh (one
+    # primary-key lookup) instead of invalidating every cached page
+    if fields is None or "comment_count" in fields:
+        comment_counts = dict(
+            Track.objects.filter(
+                pk__in=[item["id"] for item in payload["tracks"]]
+            ).values_list("id", "visible_comment_count")
+        )
+    # Per-request fields: relative timestamps and comment counts
+    items = []
+    for item in payload["tracks"]:
+        if fields is None or "created_ago" in fields:
+            item["created_ago"] = timesince(item["created_at"]) + " ago"
+        if fields is None or "comment_count" in fields:
+            item["comment_count"] = comment_counts.get(item["id"], 0)
+        if fields is not None:
+            item = {k: v for k, v in item.items() if k in fields}
+        items.append(item)
+    payload["tracks"] = items
+    return payload
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Cache key holding the current feed version. Every page key embeds the
+# version, so bumping it invalidates all cached pages at once.
+FEED_VERSION_KEY = "tracks:feed:version"
+
+
+def _timeout():
+    return getattr(settings, "FEED_CACHE_TIMEOUT", 300)
+
+
+def get_feed_version():
+    """
+    Return the current feed version, initialising it if missing.
+
+    The initial value is a millisecond timestamp rather than 1, so a
+    version key lost to eviction or a cache restart can never collide
+    with page keys written under an older version.
+    """
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        # Key missing: start a fresh version instead of incrementing
+        get_feed_version()
+
+
+def bump_feed_version():
+    """
+    Invalidate every cached feed page once the current transaction
+    commits (immediately outside a transaction).
+
+    Bumping before the commit would let a concurrent request read the
+    old rows and cache them under the new version; bumped afterwards,
+    anything rendered from the old rows is stored under a version that
+    is already stale.
+    """
+    transaction.on_commit(_bump)
+
+
+def _page_key(cursor=None, page=None):
+    if cursor:
+        position = f"c:{cursor}"
+    elif page:
+        position = f"p:{page}"
+    else:
+        position = "first"
+    return f"tracks:feed:v{get_feed_version()}:{position}"
+
+
+def get_cached_page(cursor=None, page=None):
+    """
+    Return the serialized feed page for this position, or None on a miss.
+
+    Cached payloads hold everything except request-relative fields
+    (such as "created_ago") and comment counts, which the caller adds
+    per request.
+    """
+    return cache.get(_page_key(cursor, page))
+
+
+def set_cached_page(payload, cursor=None, page=None):
+    """Store a serialized feed page under the current feed version."""
+    cache.set(_page_key(cursor, page), payload, timeout=_timeout())
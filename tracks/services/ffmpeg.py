@@ -0,0 +1,69 @@
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+
+class DecodeError(RuntimeError):
+    """Raised when ffmpeg cannot decode the audio."""
+
+
+def iter_pcm(path, sample_rate, channels, sample_format, read_size):
+    """
+    Decode the first audio stream of `path` with ffmpeg and yield raw
+    interleaved PCM from its stdout.
+
+    Every piece is exactly `read_size` bytes except the last, so callers
+    that pick a read_size of whole frames get frame-aligned pieces
+    without buffering.
+
+    Args:
+        path (str): Local audio file
+        sample_rate (int): Output rate in Hz
+        channels (int): Output channel count
+        sample_format (str): ffmpeg raw format, e.g. "s16le" or "f32le"
+        read_size (int): Bytes per yielded piece
+
+    Raises:
+        FileNotFoundError: If the ffmpeg binary is not installed
+        DecodeError: If ffmpeg cannot decode the file
+    """
+    codec = {"s16le": "pcm_s16le", "f32le": "pcm_f32le"}[sample_format]
+    command = [
+        settings.FFMPEG_BINARY,
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0:a:0",
+        "-ac",
+        str(channels),
+        "-ar",
+        str(sample_rate),
+        "-f",
+        sample_format,
+        "-acodec",
+        codec,
+        "pipe:1",
+    ]
+    # stderr goes to a file: a chatty decoder must not fill a pipe
+    # nobody is reading and stall the stdout reads
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=errors
+        )
+        try:
+            with process.stdout:
+                while data := process.stdout.read(read_size):
+                    yield data
+        finally:
+            # The consumer may stop early; never leave a decoder behind
+            if process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+        if returncode != 0:
+            errors.seek(0)
+            message = errors.read().decode(errors="replace").strip()
+            raise DecodeError(message or "ffmpeg could not decode audio")
@@ -0,0 +1,165 @@
+import logging
+import os
+import posixpath
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from mutagen import File as MutagenFile
+from ulid import ULID
+
+from ..models import Track
+
+logger = logging.getLogger(__name__)
+
+# AAC rendition bitrates in kbit/s, lowest first. Renditions above the
+# source bitrate are skipped, but the lowest is always produced.
+HLS_BITRATES = (64, 128, 192)
+HLS_SEGMENT_SECONDS = 6
+MASTER_PLAYLIST = "master.m3u8"
+
+# S3 would guess ".ts" as a Qt translation file
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+class TranscodeError(RuntimeError):
+    """Raised when ffmpeg cannot produce the renditions."""
+
+
+def _storage():
+    return Track._meta.get_field("audio_file").storage
+
+
+def rendition_bitrates(path):
+    """Bitrates worth producing for the audio at `path`."""
+    try:
+        audio = MutagenFile(path)
+        source = audio.info.bitrate // 1000 if audio is not None else 0
+    except Exception:
+        source = 0
+    if not source:
+        return list(HLS_BITRATES)
+    return [HLS_BITRATES[0]] + [b for b in HLS_BITRATES[1:] if b <= source]
+
+
+def transcode(path, directory, bitrates):
+    """
+    Write a VOD HLS master playlist and one segmented AAC rendition per
+    bitrate into `directory` with a single ffmpeg run.
+
+    Layout: master.m3u8 plus <bitrate>k/playlist.m3u8 and
+    <bitrate>k/segment_NNN.ts; playlists use relative URIs.
+
+    Raises:
+        FileNotFoundError: If the ffmpeg binary is not installed
+        TranscodeError: If ffmpeg fails
+    """
+    command = [settings.FFMPEG_BINARY, "-nostdin", "-v", "error", "-i", path]
+    for _ in bitrates:
+        command += ["-map", "0:a:0"]
+    command += ["-vn", "-c:a", "aac", "-ac", "2"]
+    for index, bitrate in enumerate(bitrates):
+        command += [f"-b:a:{index}", f"{bitrate}k"]
+    command += [
+        "-f",
+        "hls",
+        "-hls_time",
+        str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_type",
+        "mpegts",
+        "-hls_segment_filename",
+        os.path.join(directory, "%v", "segment_%03d.ts"),
+        "-master_pl_name",
+        MASTER_PLAYLIST,
+        "-var_stream_map",
+        " ".join(
+            f"a:{index},name:{bitrate}k"
+            for index, bitrate in enumerate(bitrates)
+        ),
+        os.path.join(directory, "%v", "playlist.m3u8"),
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode(errors="replace").strip()
+        raise TranscodeError(message or "ffmpeg could not transcode audio")
+
+
+def upload_renditions(track, directory):
+    """
+    Copy a transcoded rendition tree into storage.
+
+    Every run gets its own ULID prefix, so playlists and segments are
+    never overwritten and can be cached indefinitely.
+
+    Returns:
+        str: Storage name of the master playlist
+    """
+    storage = _storage()
+    prefix = f"tracks/hls/{track.pk}/{ULID()}"
+    saved = []
+    try:
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                local = os.path.join(root, filename)
+                relative = os.path.relpath(local, directory)
+                name = posixpath.join(prefix, *relative.split(os.sep))
+                with open(local, "rb") as f:
+                    content = File(f)
+                    content.content_type = CONTENT_TYPES.get(
+                        os.path.splitext(filename)[1]
+                    )
+                    stored = storage.save(name, content)
+                saved.append(stored)
+                if stored != name:
+                    # Playlists reference segments by exact relative name
+                    raise TranscodeError(f"Storage renamed {name}")
+    except Exception:
+        for name in saved:
+            storage.delete(name)
+        raise
+    return posixpath.join(prefix, MASTER_PLAYLIST)
+
+
+def delete_renditions(manifest):
+    """Delete the rendition tree around a stored master playlist."""
+    if not manifest:
+        return
+    storage = _storage()
+    pending = [posixpath.dirname(manifest)]
+    while pending:
+        directory = pending.pop()
+        try:
+            subdirectories, files = storage.listdir(directory)
+        except FileNotFoundError:
+            continue
+        for filename in files:
+            storage.delete(posixpath.join(directory, filename))
+        pending.extend(posixpath.join(directory, d) for d in subdirectories)
+
+
+def build_hls(track, path):
+    """
+    Processing stage: transcode adaptive-bitrate HLS renditions.
+
+    A missing ffmpeg binary is logged and skipped, so playback falls
+    back to the original file.
+
+    Returns:
+        dict: Field updates for the track
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            transcode(path, directory, rendition_bitrates(path))
+        except FileNotFoundError:
+            logger.warning(
+                "ffmpeg not found (FFMPEG_BINARY=%s); skipping HLS",
+                settings.FFMPEG_BINARY,
+            )
+            return {}
+        return {"hls_manifest": upload_renditions(track, directory)}
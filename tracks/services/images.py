@@ -0,0 +1,87 @@
+import logging
+
+from core.images import build_variants, compute_blurhash, delete_variants
+
+from .background import run_after_commit
+from .feed_cache import bump_feed_version
+
+logger = logging.getLogger(__name__)
+
+
+def update_image_variants(model, pk, field_name):
+    """
+    Build responsive derivatives for one image field and store them in
+    the row's image_variants.
+
+    The write is scoped to the image name that was processed, so an
+    image replaced mid-run is left to its own run.
+
+    Args:
+        model (type): Track or Profile
+        pk (int): Primary key of the row
+        field_name (str): Name of the image field on `model`
+
+    Returns:
+        bool: True if derivatives were stored
+    """
+    name = (
+        model.objects.filter(pk=pk).values_list(field_name, flat=True).first()
+    )
+    if not name:
+        return False
+    storage = model._meta.get_field(field_name).storage
+    try:
+        variants = build_variants(storage, name)
+    except Exception:
+        logger.exception(
+            "Could not build image variants for %s %s",
+            model.__name__,
+            pk,
+        )
+        return False
+
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(
+        image_variants=variants
+    )
+    if not updated and not storage.exists(name):
+        # The original was replaced and deleted while this ran
+        delete_variants(storage, name)
+    # update() skips post_save, so invalidate cached feed pages here
+    bump_feed_version()
+    return bool(updated)
+
+
+def update_image_blurhash(model, pk, field_name):
+    """
+    Compute the blurhash placeholder for one stored image, for images
+    uploaded before placeholders were computed on upload.
+
+    Returns:
+        bool: True if a blurhash was stored
+    """
+    name = (
+        model.objects.filter(pk=pk).values_list(field_name, flat=True).first()
+    )
+    if not name:
+        return False
+    storage = model._meta.get_field(field_name).storage
+    try:
+        with storage.open(name, "rb") as f:
+            blurhash = compute_blurhash(f)
+    except OSError:
+        logger.exception("Could not read image for %s %s", model.__name__, pk)
+        return False
+    if not blurhash:
+        return False
+    return bool(
+        model.objects.filter(pk=pk, **{field_name: name}).update(
+            image_blurhash=blurhash
+        )
+    )
+
+
+def schedule_image_variants(instance, field_name):
+    """Build derivatives for `instance` once its row is committed."""
+    run_after_commit(
+        update_image_variants, type(instance), instance.pk, field_name
+    )
@@ -0,0 +1,204 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from mutagen import File as MutagenFile
+
+from .ffmpeg import iter_pcm
+
+logger = logging.getLogger(__name__)
+
+# ITU-R BS.1770-4 loudness is defined at 48 kHz; decoding at that rate
+# lets the published K-weighting coefficients apply unchanged
+SAMPLE_RATE = 48000
+# Gating sub-blocks: 100 ms, four to a 400 ms block (75% overlap)
+SUB_BLOCK_FRAMES = SAMPLE_RATE // 10
+# Sub-blocks decoded per pipe read (5 s of audio)
+READ_SUB_BLOCKS = 50
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+# True peak from 4x oversampling; edge frames discarded per chunk
+OVERSAMPLE = 4
+TRUE_PEAK_MARGIN = 32
+
+# Playback normalization: loud masters are turned down to this level,
+# never pushed past the true-peak ceiling
+TARGET_LUFS = -14.0
+TRUE_PEAK_CEILING_DBTP = -1.0
+
+# K-weighting at 48 kHz: high-shelf pre-filter, then RLB high-pass
+K_WEIGHTING = (
+    (
+        np.array([1.53512485958697, -2.69169618940638, 1.19839281085285]),
+        np.array([1.0, -1.69065929318241, 0.73248077421585]),
+    ),
+    (
+        np.array([1.0, -2.0, 1.0]),
+        np.array([1.0, -1.99004745483398, 0.99007225036621]),
+    ),
+)
+
+
+def _channels(path):
+    """Analyse mono as mono; everything else is folded to stereo."""
+    try:
+        audio = MutagenFile(path)
+        channels = getattr(audio.info, "channels", 2) if audio else 2
+    except Exception:
+        channels = 2
+    return 1 if channels == 1 else 2
+
+
+class _TruePeakMeter:
+    """Streaming 4x-oversampled peak over chunks of frames."""
+
+    def __init__(self, channels):
+        # Silence before the first frame, so it is measured accurately
+        self.tail = np.zeros((2 * TRUE_PEAK_MARGIN, channels), np.float32)
+        self.peak = 0.0
+
+    def feed(self, frames):
+        from scipy.signal import resample_poly
+
+        buffer = np.concatenate((self.tail, frames))
+        upsampled = resample_poly(buffer, OVERSAMPLE, 1, axis=0)
+        # Samples near either edge of the buffer are distorted by the
+        # filter running off the end; each chunk only trusts its middle
+        # and the next chunk re-measures the overlap
+        margin = TRUE_PEAK_MARGIN * OVERSAMPLE
+        valid = upsampled[margin:-margin]
+        if valid.size:
+            self.peak = max(self.peak, float(np.abs(valid).max()))
+        keep = len(buffer) - 2 * TRUE_PEAK_MARGIN
+        self.tail = buffer[keep:]
+
+    def finish(self):
+        self.feed(np.zeros_like(self.tail))
+        return self.peak
+
+
+def measure(path):
+    """
+    Integrated loudness (LUFS) and true peak (dBTP) of an audio file.
+
+    Follows ITU-R BS.1770-4 / EBU R128: K-weighted mean square per
+    100 ms sub-block, 400 ms gating blocks, an absolute gate at -70 LUFS
+    and a relative gate 10 LU below the ungated level. PCM streams from
+    ffmpeg in 5 s slices that are filtered with carried-over filter
+    state, so memory does not grow with track length.
+
+    Returns:
+        tuple: (integrated LUFS or None if too short or silent,
+        true peak dBTP or None if silent)
+
+    Raises:
+        FileNotFoundError: If the ffmpeg binary is not installed
+        DecodeError: If ffmpeg cannot decode the file
+    """
+    # scipy.signal takes over a second to import; keep it out of every
+    # process that only loads the models (gain_to_volume lives here)
+    from scipy.signal import lfilter
+
+    channels = _channels(path)
+    # Filter state carried between slices (biquads: two values each)
+    states = [np.zeros((2, channels)) for _ in K_WEIGHTING]
+    meter = _TruePeakMeter(channels)
+    powers = []  # Per sub-block, per channel mean square
+
+    read_size = SUB_BLOCK_FRAMES * READ_SUB_BLOCKS * channels * 4
+    for data in iter_pcm(path, SAMPLE_RATE, channels, "f32le", read_size):
+        frames = np.frombuffer(
+            data[: len(data) - len(data) % (channels * 4)], dtype="<f4"
+        ).reshape(-1, channels)
+        meter.feed(frames)
+
+        weighted = frames.astype(np.float64)
+        for index, (b, a) in enumerate(K_WEIGHTING):
+            weighted, states[index] = lfilter(
+                b, a, weighted, axis=0, zi=states[index]
+            )
+        # Reads are whole sub-blocks except the last, whose partial
+        # sub-block cannot complete a gating block and is dropped
+        whole = len(weighted) // SUB_BLOCK_FRAMES * SUB_BLOCK_FRAMES
+        squares = weighted[:whole].reshape(-1, SUB_BLOCK_FRAMES, channels)
+        powers.append(np.mean(squares**2, axis=1))
+
+    peak = meter.finish()
+    true_peak = float(20 * np.log10(peak)) if peak > 0 else None
+
+    powers = np.concatenate(powers) if powers else np.zeros((0, channels))
+    if len(powers) < 4:
+        return None, true_peak
+    # 400 ms blocks: mean of four consecutive sub-blocks; stereo
+    # channel weights are all 1.0, so the sum over channels is direct
+    sums = np.cumsum(np.vstack((np.zeros(channels), powers)), axis=0)
+    blocks = ((sums[4:] - sums[:-4]) / 4).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(blocks)
+
+    gated = blocks[levels > ABSOLUTE_GATE_LUFS]
+    if not gated.size:
+        return None, true_peak
+    relative = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = blocks[(levels > ABSOLUTE_GATE_LUFS) & (levels > relative)]
+    integrated = -0.691 + 10 * np.log10(gated.mean())
+    return float(integrated), true_peak
+
+
+def playback_gain_db(loudness, true_peak):
+    """
+    Gain that brings a track to TARGET_LUFS without its true peak
+    exceeding TRUE_PEAK_CEILING_DBTP, or None without a measurement.
+    """
+    if loudness is None:
+        return None
+    gain = TARGET_LUFS - loudness
+    if true_peak is not None:
+        gain = min(gain, TRUE_PEAK_CEILING_DBTP - true_peak)
+    return round(gain, 2)
+
+
+def loudness_updates(loudness, true_peak):
+    """
+    Track field updates for a measure() result. loudness_measured_at
+    is set even when nothing could be measured (silent or very short
+    audio), so backfill_loudness does not measure those tracks again.
+    """
+    return {
+        "loudness_lufs": None if loudness is None else round(loudness, 2),
+        "true_peak_dbtp": None if true_peak is None else round(true_peak, 2),
+        "gain_db": playback_gain_db(loudness, true_peak),
+        "loudness_measured_at": timezone.now(),
+    }
+
+
+def gain_to_volume(gain_db):
+    """
+    Linear volume factor for HTMLMediaElement.volume, which can only
+    turn audio down: quiet tracks play at full volume.
+    """
+    if gain_db is None:
+        return None
+    return round(min(1.0, 10 ** (gain_db / 20)), 4)
+
+
+def analyze_loudness(track, path):
+    """
+    Processing stage: measure loudness and derive the playback gain.
+
+    A missing ffmpeg binary is logged and skipped, so the rest of the
+    processing still succeeds.
+
+    Returns:
+        dict: Field updates for the track
+    """
+    try:
+        loudness, true_peak = measure(path)
+    except FileNotFoundError:
+        logger.warning(
+            "ffmpeg not found (FFMPEG_BINARY=%s); skipping loudness",
+            settings.FFMPEG_BINARY,
+        )
+        return {}
+    return loudness_updates(loudness, true_peak)
@@ -1,7 +1,23 @@
+import hashlib
+import json
 import logging
+import os
+import random
+import threading
 
 import boto3
+import numpy as np
+from botocore.config import Config
 from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import F
+from django.utils import timezone
+
+from core.images import difference_hash
+
+from ..models import MediaBlob, ModerationVerdict, Track
+from .background import run_after_commit, submit_later
+from .feed_cache import bump_feed_version
 
 logger = logging.getLogger(__name__)
 
@@ -17,29 +33,199 @@ BLOCK_LABELS = {
     "Smoking",
 }
 
+# Drug-related labels only block at near-certain confidence, to avoid
+# false positives on product shots
+DRUG_LABELS = ("Pills", "Products", "Drugs & Tobacco")
+DRUG_CONFIDENCE = 99
+# Other serious content blocks at a lower confidence
+SERIOUS_LABELS = (
+    "Explicit Nudity",
+    "Sexual Activity",
+    "Violence",
+    "Hate Symbols",
+    "Smoking",
+)
+SERIOUS_CONFIDENCE = 85
+
+# A blocked image's verdict is reused for images whose difference hash
+# differs in at most this many of 64 bits (re-encodes, resizes, small
+# edits). Approvals are only reused for identical bytes, so a look-alike
+# can never inherit a pass.
+NEAR_DUPLICATE_DISTANCE = 4
+# Upper bound, in seconds, on the backoff between failed scans
+MAX_RETRY_DELAY = 15 * 60
+# Flat images hash to (almost) all zeros or ones, which would match each
+# other; hashes with fewer differing bits than this are not compared
+MIN_HASH_DETAIL = 8
 
-def _client():
-    """Create Rekognition client with separate credentials if available."""
-    rekog_key = getattr(settings, "REKOGNITION_ACCESS_KEY", None)
-    rekog_secret = getattr(settings, "REKOGNITION_SECRET", None)
 
-    print(
-        f"DEBUG: Using Rekog key: {rekog_key[:10] if rekog_key else 'None'}..."
-    )
+def _reset_client():
+    # A forked worker must open its own connections rather than share
+    # the parent's sockets (gunicorn --preload)
+    global _cached_client, _client_lock
+    _cached_client = None
+    _client_lock = threading.Lock()
+
+
+_cached_client = None
+_client_lock = threading.Lock()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client)
 
+
+def _build_client():
+    """
+    Create the Rekognition client, with separate credentials if
+    available, explicit timeouts, bounded retries, and a connection
+    pool sized for the threads that share it.
+    """
+    config = Config(
+        connect_timeout=getattr(settings, "REKOG_CONNECT_TIMEOUT", 2),
+        read_timeout=getattr(settings, "REKOG_READ_TIMEOUT", 10),
+        retries={
+            "total_max_attempts": getattr(settings, "REKOG_MAX_ATTEMPTS", 3),
+            "mode": "standard",
+        },
+        max_pool_connections=getattr(settings, "REKOG_MAX_POOL_SIZE", 10),
+    )
+    rekog_key = getattr(settings, "REKOGNITION_ACCESS_KEY", None)
+    rekog_secret = getattr(settings, "REKOGNITION_SECRET", None)
+    # Sessions are not thread-safe, so the client gets a private one
+    session = boto3.session.Session()
     if rekog_key and rekog_secret:
-        return boto3.client(
+        return session.client(
             "rekognition",
             region_name=settings.AWS_REGION,
             aws_access_key_id=rekog_key,
             aws_secret_access_key=rekog_secret,
+            config=config,
+        )
+    logger.info("Rekognition: falling back to default AWS credentials")
+    return session.client(
+        "rekognition", region_name=settings.AWS_REGION, config=config
+    )
+
+
+def _client():
+    """
+    The process-wide Rekognition client, built on first use.
+
+    boto3 clients are thread-safe, so every request and background
+    thread shares one client and its pool of open TLS connections.
+    """
+    global _cached_client
+    if _cached_client is None:
+        with _client_lock:
+            if _cached_client is None:
+                _cached_client = _build_client()
+    return _cached_client
+
+
+def warm_up_client():
+    """
+    Build the client ahead of the first upload, so loading the service
+    model and resolving credentials is not paid by a user request.
+    Called from gunicorn's post_worker_init hook when REKOG_WARM_UP is
+    set. Errors are logged; the first scan will retry.
+    """
+    if not getattr(settings, "IMAGE_MODERATION_ENABLED", True):
+        return
+    try:
+        _client()
+    except Exception:
+        logger.exception("Could not warm up the Rekognition client")
+
+
+def config_version():
+    """
+    Fingerprint of the thresholds that decide a verdict.
+
+    Cached verdicts are keyed by it, so changing REKOG_MIN_CONFIDENCE or
+    the label rules makes every image go back to Rekognition once.
+
+    Returns:
+        str: 16 hex characters
+    """
+    rules = [
+        getattr(settings, "REKOG_MIN_CONFIDENCE", 80),
+        [sorted(DRUG_LABELS), DRUG_CONFIDENCE],
+        [sorted(SERIOUS_LABELS), SERIOUS_CONFIDENCE],
+    ]
+    return hashlib.sha256(json.dumps(rules).encode()).hexdigest()[:16]
+
+
+def _is_blocked(labels):
+    """Whether Rekognition labels cross any blocking threshold."""
+    for lbl in labels:
+        name = lbl.get("Name", "")
+        confidence = lbl.get("Confidence", 0)
+        if name in DRUG_LABELS and confidence >= DRUG_CONFIDENCE:
+            return True
+        if name in SERIOUS_LABELS and confidence >= SERIOUS_CONFIDENCE:
+            return True
+    return False
+
+
+def _rekognition_scan(image_bytes):
+    """Call Rekognition; returns (allowed, labels, failed)."""
+    try:
+        resp = _client().detect_moderation_labels(
+            Image={"Bytes": image_bytes},
+            MinConfidence=getattr(settings, "REKOG_MIN_CONFIDENCE", 80),
         )
-    else:
-        print("DEBUG: Falling back to default AWS credentials")
-        return boto3.client("rekognition", region_name=settings.AWS_REGION)
+        labels = resp.get("ModerationLabels", [])
+        return (not _is_blocked(labels)), labels, False
+    except Exception as e:
+        logger.warning("Rekognition scan failed (fail-open): %s", e)
+        return True, [], True  # Fail-open: allowed but mark as failed
+
+
+def _cache_enabled():
+    return getattr(settings, "IMAGE_MODERATION_CACHE", True)
+
 
+def _cached_verdict(sha256, version):
+    return ModerationVerdict.objects.filter(
+        sha256=sha256, config_version=version
+    ).first()
 
-def scan_image_bytes(image_bytes: bytes):
+
+def _near_duplicate_verdict(dhash, version):
+    """
+    Closest blocking verdict within NEAR_DUPLICATE_DISTANCE bits of
+    `dhash`, or None. Blocked images are rare, so their hashes are
+    compared in one vectorised pass.
+    """
+    if dhash is None:
+        return None
+    detail = (dhash & 0xFFFFFFFFFFFFFFFF).bit_count()  # Stored signed
+    if not MIN_HASH_DETAIL <= detail <= 64 - MIN_HASH_DETAIL:
+        return None
+    candidates = list(
+        ModerationVerdict.objects.filter(
+            config_version=version, allowed=False, dhash__isnull=False
+        ).values_list("pk", "dhash")
+    )
+    if not candidates:
+        return None
+    pks, hashes = zip(*candidates)
+    distances = np.bitwise_count(
+        (np.array(hashes, dtype=np.int64) ^ np.int64(dhash)).view(np.uint64)
+    )
+    best = int(distances.argmin())
+    if distances[best] > NEAR_DUPLICATE_DISTANCE:
+        return None
+    return ModerationVerdict.objects.filter(pk=pks[best]).first()
+
+
+def _record_hit(verdict):
+    ModerationVerdict.objects.filter(pk=verdict.pk).update(
+        hit_count=F("hit_count") + 1, last_hit_at=timezone.now()
+    )
+    return verdict.allowed, verdict.labels, False
+
+
+def scan_image_bytes(image_bytes: bytes, sha256=None):
     """
     Scan image content using AWS Rekognition for moderation.
 
@@ -47,8 +233,15 @@ def scan_image_bytes(image_bytes: bytes):
     violence, hate symbols, and drug-related content. Implements
     confidence-based thresholds for different content types.
 
+    Verdicts are cached in ModerationVerdict by SHA-256 and threshold
+    version, so bytes scanned before never reach AWS again, and near
+    duplicates of a blocked image are blocked without a call. Failed
+    scans are not cached.
+
     Args:
         image_bytes (bytes): Raw image data to analyze
+        sha256 (str): Hex digest of image_bytes, if already known
+            (uploads carry one from core.uploadhandlers)
 
     Returns:
         tuple: (allowed: bool, labels: list, failed: bool)
@@ -63,42 +256,163 @@ def scan_image_bytes(image_bytes: bytes):
     """
     if not getattr(settings, "IMAGE_MODERATION_ENABLED", True):
         return True, [], False
-    try:
-        resp = _client().detect_moderation_labels(
-            Image={"Bytes": image_bytes},
-            MinConfidence=getattr(settings, "REKOG_MIN_CONFIDENCE", 80),
+    if not _cache_enabled():
+        return _rekognition_scan(image_bytes)
+
+    sha256 = sha256 or hashlib.sha256(image_bytes).hexdigest()
+    version = config_version()
+    verdict = _cached_verdict(sha256, version)
+    dhash = None
+    if verdict is None:
+        dhash = difference_hash(image_bytes)
+        verdict = _near_duplicate_verdict(dhash, version)
+    if verdict is not None:
+        return _record_hit(verdict)
+
+    allowed, labels, failed = _rekognition_scan(image_bytes)
+    if not failed:
+        ModerationVerdict.objects.get_or_create(
+            sha256=sha256,
+            config_version=version,
+            defaults={"dhash": dhash, "allowed": allowed, "labels": labels},
         )
-        labels = resp.get("ModerationLabels", [])
+    return allowed, labels, failed
 
-        # Custom logic for different label types
-        blocked = False
-        for lbl in labels:
-            name = lbl.get("Name", "")
-            confidence = lbl.get("Confidence", 0)
-
-            # Drug-related: require 99% confidence (avoid false positives)
-            if (
-                name in ["Pills", "Products", "Drugs & Tobacco"]
-                and confidence >= 99
-            ):
-                blocked = True
-                break
-            # Other serious content: 85% confidence
-            elif (
-                name
-                in [
-                    "Explicit Nudity",
-                    "Sexual Activity",
-                    "Violence",
-                    "Hate Symbols",
-                    "Smoking",
-                ]
-                and confidence >= 85
-            ):
-                blocked = True
-                break
-
-        return (not blocked), labels, False  # Success, no failure
-    except Exception as e:
-        logger.warning("Rekognition scan failed (fail-open): %s", e)
-        return True, [], True  # Fail-open: allowed but mark as failed
+
+def scan_stored_image(storage, name):
+    """
+    Scan an image that is already in storage, as the moderation queue
+    and the admin re-scan actions do.
+
+    Content-addressed files have a MediaBlob holding their digest, so a
+    cached verdict answers without downloading the file.
+
+    Args:
+        storage (Storage): Storage holding the image
+        name (str): Storage name of the image
+
+    Returns:
+        tuple: (allowed, labels, failed) as for scan_image_bytes()
+    """
+    if not getattr(settings, "IMAGE_MODERATION_ENABLED", True):
+        return True, [], False
+    sha256 = (
+        MediaBlob.objects.filter(name=name)
+        .values_list("sha256", flat=True)
+        .first()
+    )
+    if sha256 and _cache_enabled():
+        verdict = _cached_verdict(sha256, config_version())
+        if verdict is not None:
+            return _record_hit(verdict)
+    with storage.open(name, "rb") as f:
+        data = f.read()
+    return scan_image_bytes(data, sha256=sha256)
+
+
+def _retry_delay(attempt):
+    """Exponential backoff with jitter before retry number `attempt`."""
+    base = getattr(settings, "IMAGE_MODERATION_RETRY_DELAY", 30)
+    delay = min(MAX_RETRY_DELAY, base * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def moderate_image(model, pk, field_name, attempt=1, retry=True):
+    """
+    Scan one PENDING image and store the verdict on its row.
+
+    Failed scans (Rekognition or storage errors) are retried after an
+    exponential backoff, up to IMAGE_MODERATION_RETRIES times; the row
+    then stays PENDING for moderate_pending_images or the admin. The
+    write is scoped to the image that was scanned, so an image replaced
+    in the meantime keeps its own PENDING status and scan.
+
+    Args:
+        model (type): Track or Profile
+        pk (int): Primary key of the row
+        field_name (str): Name of the image field on `model`
+        attempt (int): 1 for the first scan, counting up on retries
+        retry (bool): Schedule retries for failed scans
+
+    Returns:
+        str: The stored status, or None if nothing was stored
+    """
+    name = (
+        model.objects.filter(pk=pk, moderation_status="PENDING")
+        .values_list(field_name, flat=True)
+        .first()
+    )
+    if not name:
+        return None
+    try:
+        storage = model._meta.get_field(field_name).storage
+        allowed, labels, failed = scan_stored_image(storage, name)
+    except Exception:
+        logger.exception("Could not read image for %s %s", model.__name__, pk)
+        failed = True
+
+    if failed:
+        retries = getattr(settings, "IMAGE_MODERATION_RETRIES", 5)
+        if retry and attempt <= retries:
+            submit_later(
+                _retry_delay(attempt),
+                moderate_image,
+                model,
+                pk,
+                field_name,
+                attempt=attempt + 1,
+            )
+        else:
+            logger.warning(
+                "Moderation of %s %s failed %d time(s); left PENDING",
+                model.__name__,
+                pk,
+                attempt,
+            )
+        return None
+
+    status = "APPROVED" if allowed else "REJECTED"
+    updated = model.objects.filter(
+        pk=pk, moderation_status="PENDING", **{field_name: name}
+    ).update(
+        moderation_status=status,
+        moderation_labels=labels,
+        moderated_at=timezone.now(),
+    )
+    if not updated:
+        return None
+    # update() skips post_save, so invalidate cached feed pages here
+    bump_feed_version()
+    if status == "REJECTED" and model is Track:
+        notify_track_hidden(pk)
+    return status
+
+
+def notify_track_hidden(pk):
+    """
+    Email a track's owner that its artwork was rejected.
+
+    Tracks with rejected artwork are left out of the feed and search,
+    so the owner is told why, and how to get the track listed again.
+    """
+    track = Track.objects.select_related("user").filter(pk=pk).first()
+    if not track or not track.user.email:
+        return
+    send_mail(
+        subject="Your track artwork was flagged",
+        message=(
+            f'The artwork for your track "{track.title}" was flagged '
+            "during moderation, so the track is hidden from the feed "
+            "and search.\n\n"
+            "Replace the artwork from the track's edit page and it will "
+            "be listed again once the new image is approved."
+        ),
+        from_email="modmixx <modmixx.platform@gmail.com>",
+        recipient_list=[track.user.email],
+        fail_silently=True,
+    )
+
+
+def schedule_moderation(instance, field_name):
+    """Scan `instance`'s new image once its row is committed."""
+    run_after_commit(moderate_image, type(instance), instance.pk, field_name)
@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we cannot decode."""
+
+
+def _pack(values):
+    """Encode a JSON-serializable position as an opaque cursor string."""
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _unpack(cursor):
+    """Inverse of _pack(); raises InvalidCursor on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def encode_cursor(created_at, pk):
+    """
+    Encode a (created_at, id) position as an opaque URL-safe string.
+
+    The cursor points at the last item the client has already seen,
+    so the next page starts strictly after it.
+    """
+    return _pack([created_at.isoformat(), pk])
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Returns:
+        tuple: (created_at: datetime, pk: int)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or tampered with
+    """
+    try:
+        created_at, pk = _unpack(cursor)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from e
+    if created_at is None:
+        raise InvalidCursor("Invalid cursor timestamp")
+    return created_at, pk
+
+
+def encode_rank_cursor(rank, pk):
+    """Encode a (rank, id) position for relevance-ordered results."""
+    return _pack([rank, pk])
+
+
+def decode_rank_cursor(cursor):
+    """
+    Decode a cursor produced by encode_rank_cursor().
+
+    Returns:
+        tuple: (rank: float, pk: int)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or tampered with
+    """
+    try:
+        rank, pk = _unpack(cursor)
+        return float(rank), int(pk)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _row_cursor(row):
+    """Cursor pointing at `row`, a model instance or a .values() dict."""
+    if isinstance(row, dict):
+        return encode_cursor(row["created_at"], row["id"])
+    return encode_cursor(row.created_at, row.id)
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+
+    Mirrors the parts of django.core.paginator.Page the templates use
+    (iteration, len(), has_next()) so it can be dropped into existing
+    template contexts.
+    """
+
+    def __init__(self, object_list, has_next, next_cursor, number=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self.next_cursor = next_cursor
+        self.number = number
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+
+def keyset_page(queryset, cursor=None, page_size=5):
+    """
+    Return the page of `queryset` that follows `cursor`.
+
+    Orders newest first on (created_at, id) and fetches page_size + 1
+    rows to detect whether another page exists, so no COUNT(*) or
+    OFFSET scan is needed however deep the client scrolls.
+
+    Args:
+        queryset: QuerySet (models or .values()) with created_at and id
+        cursor (str): Opaque cursor from a previous page, or None
+        page_size (int): Number of items per page
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+    """
+    queryset = queryset.order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    rows = list(queryset[: page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = _row_cursor(rows[-1]) if has_next else None
+    return KeysetPage(rows, has_next, next_cursor)
+
+
+def parse_page_number(value):
+    """Legacy ?page= value as a page number; junk means page 1."""
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def offset_page(queryset, page_number, page_size=5):
+    """
+    Legacy ?page=N pagination without the COUNT(*) query.
+
+    Kept for existing clients; returns a next_cursor so they can switch
+    to keyset pagination from the next request onwards.
+    """
+    page_number = parse_page_number(page_number)
+
+    start = (page_number - 1) * page_size
+    end = start + page_size + 1
+    queryset = queryset.order_by("-created_at", "-id")
+    rows = list(queryset[start:end])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = _row_cursor(rows[-1]) if has_next else None
+    return KeysetPage(rows, has_next, next_cursor, number=page_number)
@@ -0,0 +1,148 @@
+import io
+import logging
+import os
+import shutil
+import tempfile
+
+from django.utils import timezone
+from mutagen import File as MutagenFile
+
+from ..models import Track
+from .background import run_after_commit
+from .feed_cache import bump_feed_version
+from .hls import build_hls, delete_renditions
+from .loudness import analyze_loudness
+from .waveform import extract_waveform
+
+logger = logging.getLogger(__name__)
+
+# Bytes per read when copying the stored audio to local disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def extract_metadata(track, path):
+    """
+    Read duration and technical metadata with mutagen.
+
+    Returns:
+        dict: Field updates for the track
+    """
+    audio = MutagenFile(path)
+    if audio is None or not hasattr(audio, "info"):
+        return {"duration": None, "audio_metadata": None}
+
+    info = audio.info
+    metadata = {
+        "format": type(audio).__name__,
+        "mime": (audio.mime or [None])[0],
+        "length": getattr(info, "length", None),
+        "bitrate": getattr(info, "bitrate", None),
+        "sample_rate": getattr(info, "sample_rate", None),
+        "channels": getattr(info, "channels", None),
+        "bits_per_sample": getattr(info, "bits_per_sample", None),
+        # Set by MP4/M4A (e.g. "mp4a.40.2"); other formats imply theirs
+        "codec": getattr(info, "codec", None),
+    }
+    length = metadata["length"]
+    return {
+        "duration": int(length) if length else None,
+        "audio_metadata": {k: v for k, v in metadata.items() if v is not None},
+    }
+
+
+# Formats whose header alone states the exact duration
+HEADER_DURATION_FORMATS = {"wav", "flac"}
+
+
+def duration_from_header(upload):
+    """
+    Duration in whole seconds from the header bytes captured by the
+    upload handler, or None when the format needs the whole file.
+
+    WAV and FLAC carry exact sample counts up front; MP3, AAC, M4A and
+    Ogg durations are left to the background extract_metadata stage.
+    """
+    if getattr(upload, "sniffed_format", None) not in HEADER_DURATION_FORMATS:
+        return None
+    try:
+        audio = MutagenFile(io.BytesIO(upload.upload_header))
+        length = audio.info.length if audio is not None else None
+    except Exception:
+        return None
+    return int(length) if length else None
+
+
+# Stages run in order on a local copy of the audio. Each takes
+# (track, local_path) and returns a dict of Track field updates.
+PROCESSING_STAGES = [
+    extract_metadata,
+    extract_waveform,
+    analyze_loudness,
+    build_hls,
+]
+
+
+def download_audio(name, directory, filename="audio"):
+    """
+    Copy the stored audio file `name` into `directory` in
+    DOWNLOAD_CHUNK_SIZE pieces and return the local path.
+    """
+    _, ext = os.path.splitext(name)
+    path = os.path.join(directory, f"{filename}{ext}")
+    storage = Track._meta.get_field("audio_file").storage
+    with storage.open(name, "rb") as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+    return path
+
+
+def process_track(track_id):
+    """
+    Run every processing stage for one track and store the results.
+
+    Status moves PENDING -> PROCESSING -> READY, or FAILED if the audio
+    cannot be read. Results are written with update() so a concurrent
+    edit of the title or description is never overwritten. update()
+    skips auto_now, so updated_at is stamped explicitly: it tells
+    reprocess_pending_tracks a run is alive.
+
+    Args:
+        track_id (int): Primary key of the track to process
+    """
+    track = Track.objects.filter(pk=track_id).first()
+    if track is None or not track.audio_file:
+        return
+
+    # Scoped to this audio file: if the owner replaces it mid-run, the
+    # newer upload's own processing run owns the row
+    current = Track.objects.filter(
+        pk=track_id, audio_file=track.audio_file.name
+    )
+    current.update(processing_status="PROCESSING", updated_at=timezone.now())
+    updates = {}
+    status = "READY"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = download_audio(track.audio_file.name, directory)
+            for stage in PROCESSING_STAGES:
+                updates.update(stage(track, path))
+    except Exception:
+        logger.exception("Processing failed for track %s", track_id)
+        status = "FAILED"
+
+    manifest = updates.get("hls_manifest")
+    if current.update(
+        processing_status=status, updated_at=timezone.now(), **updates
+    ):
+        # A re-run of the same audio supersedes its old renditions
+        if manifest and track.hls_manifest != manifest:
+            delete_renditions(track.hls_manifest)
+    elif manifest:
+        # The audio was replaced mid-run; nothing references these
+        delete_renditions(manifest)
+    # update() skips post_save, so invalidate cached feed pages here
+    bump_feed_version()
+
+
+def schedule_processing(track):
+    """Process `track` in the background once its row is committed."""
+    run_after_commit(process_track, track.pk)
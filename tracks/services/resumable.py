@@ -0,0 +1,157 @@
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from core.uploadhandlers import HEADER_BYTES, sniff_format
+
+from ..models import UploadSession
+from .direct_upload import AUDIO_EXTENSIONS, max_audio_size
+
+# Bytes read from the request per write, bounding memory per session
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+class ResumableUploadError(ValueError):
+    """Base class for rejected resumable upload requests."""
+
+    status = 400
+
+
+class OffsetMismatch(ResumableUploadError):
+    """The client's Upload-Offset is not where the file ends."""
+
+    status = 409
+
+
+class ChunkInProgress(ResumableUploadError):
+    """Another request is already writing to this session."""
+
+    status = 409
+
+
+class UploadTooLarge(ResumableUploadError):
+    """The chunk would grow the file past its declared size."""
+
+    status = 413
+
+
+def create_session(user, filename, size):
+    """
+    Start a resumable upload and create its empty partial file.
+
+    Raises:
+        ResumableUploadError: If the file type or size is unacceptable
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in AUDIO_EXTENSIONS:
+        raise ResumableUploadError(
+            "Please upload MP3, WAV, FLAC, M4A, AAC, or OGG files."
+        )
+    if size <= 0:
+        raise ResumableUploadError("Invalid file size.")
+    if size > max_audio_size():
+        raise UploadTooLarge("File size exceeds 100MB limit.")
+
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    session = UploadSession.objects.create(
+        user=user, filename=os.path.basename(filename), size=size
+    )
+    open(session.path, "wb").close()
+    return session
+
+
+def current_offset(session):
+    """
+    Bytes persisted for `session`.
+
+    The partial file on disk is authoritative: a chunk interrupted by a
+    disconnect keeps whatever reached the disk, and the client resumes
+    from there.
+    """
+    try:
+        return os.path.getsize(session.path)
+    except FileNotFoundError:
+        return 0
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Stream one chunk from `stream` onto the end of the partial file.
+
+    Reads at most WRITE_BUFFER_SIZE bytes at a time, so memory use does
+    not depend on the chunk size. An exclusive file lock rejects
+    concurrent writers rather than holding a database lock for the
+    duration of a slow upload.
+
+    Args:
+        session (UploadSession): Session to write to
+        offset (int): Client's Upload-Offset; must equal the file size
+        stream: File-like request body
+        length (int): Chunk length (Content-Length)
+
+    Returns:
+        int: New offset
+
+    Raises:
+        ResumableUploadError: On offset mismatch, concurrent writes or
+            a chunk that overruns the declared size
+    """
+    with open(session.path, "r+b") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            raise ChunkInProgress("Another chunk is being written.") from e
+
+        f.seek(0, os.SEEK_END)
+        if offset != f.tell():
+            raise OffsetMismatch("Upload-Offset does not match.")
+        if offset + length > session.size:
+            raise UploadTooLarge("Chunk exceeds the declared upload size.")
+
+        remaining = length
+        try:
+            while remaining:
+                data = stream.read(min(WRITE_BUFFER_SIZE, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+        finally:
+            f.flush()
+            new_offset = f.tell()
+            # update() skips auto_now, so stamp updated_at explicitly
+            UploadSession.objects.filter(pk=session.pk).update(
+                offset=new_offset, updated_at=timezone.now()
+            )
+    return new_offset
+
+
+def assembled_file(session):
+    """
+    Wrap a completed session's file as an UploadedFile for
+    TrackUploadForm, with the attributes the inspecting upload handlers
+    set (sha256, sniffed_format, upload_header, exceeds_limit).
+
+    The caller must close the returned file.
+    """
+    digest = hashlib.sha256()
+    with open(session.path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+        digest.update(header)
+        for block in iter(lambda: f.read(WRITE_BUFFER_SIZE * 16), b""):
+            digest.update(block)
+
+    upload = UploadedFile(
+        file=open(session.path, "rb"),
+        name=session.filename,
+        size=session.size,
+    )
+    upload.sha256 = digest.hexdigest()
+    upload.sniffed_format = sniff_format(header)
+    upload.upload_header = header
+    upload.exceeds_limit = session.size > max_audio_size()
+    return upload
@@ -0,0 +1,84 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from ..models import SEARCH_CONFIG, Track
+from .feed import FEED_VALUES, RowSerializer
+from .pagination import KeysetPage, decode_rank_cursor, encode_rank_cursor
+
+# Results per search page
+SEARCH_PAGE_SIZE = 10
+
+
+def track_search_query(text):
+    """
+    Parse user input as a web-style search query ("quoted phrases",
+    -exclusions, or), matching the stored vector's configuration.
+    """
+    return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def search_queryset(text):
+    """
+    Approved tracks matching `text`, annotated with a float "rank".
+
+    On PostgreSQL this is a GIN-indexed match against the stored search
+    vector, ranked with ts_rank. The rank is cast to double precision
+    so the value round-tripped through a cursor compares exactly. Other
+    backends fall back to a substring match with a constant rank, so
+    results are ordered newest id first.
+    """
+    # Same moderation rule as the feed
+    queryset = Track.objects.filter(moderation_status="APPROVED")
+    if connection.vendor == "postgresql":
+        query = track_search_query(text)
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+        )
+    return queryset.filter(
+        Q(title__icontains=text) | Q(description__icontains=text)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def search_tracks(text, cursor=None, page_size=SEARCH_PAGE_SIZE):
+    """
+    Return one KeysetPage of serialized search results.
+
+    Results are ordered by (rank, id) descending and paginated on that
+    pair, so deep pages cost the same as the first and a track can
+    never repeat or disappear between pages.
+
+    Args:
+        text (str): User search input
+        cursor (str): Opaque cursor from a previous page, or None
+        page_size (int): Results per page
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+    """
+    queryset = (
+        search_queryset(text)
+        .order_by("-rank", "-id")
+        .values(*FEED_VALUES, "rank")
+    )
+    if cursor:
+        rank, pk = decode_rank_cursor(cursor)
+        queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+    rows = list(queryset[: page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = (
+        encode_rank_cursor(rows[-1]["rank"], rows[-1]["id"])
+        if has_next
+        else None
+    )
+
+    serialize = RowSerializer()
+    results = []
+    for row in rows:
+        item = serialize(row)
+        item["rank"] = row["rank"]
+        results.append(item)
+    return KeysetPage(results, has_next, next_cursor)
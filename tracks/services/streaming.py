@@ -0,0 +1,249 @@
+import fcntl
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.utils.http import parse_etags
+
+from .background import submit
+
+# Bytes per read when copying from storage and when streaming responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested byte range lies outside the file."""
+
+
+def audio_etag(name):
+    """
+    Strong ETag for a stored audio file.
+
+    Uploads are stored under their SHA-256 (ContentAddressedFileField);
+    direct uploads and older files keep a unique ULID name. Neither is
+    ever rewritten with other bytes, so the name alone identifies the
+    content and no storage request is needed.
+    """
+    digest = hashlib.sha256(name.encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(header, etag):
+    """
+    True if an If-None-Match header lists `etag` or is "*".
+
+    Tags are compared exactly, with the weak comparison RFC 9110 uses
+    for If-None-Match (a W/ prefix is ignored).
+    """
+    tags = parse_etags(header or "")
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def hls_url_path(manifest):
+    """
+    Path of a stored HLS master playlist below its track's hls/ URL:
+    the rendition run directory and the file, e.g. "<ULID>/master.m3u8".
+
+    Playlists reference renditions and segments by relative URI, so
+    they all resolve below the same members-only URL prefix.
+    """
+    run = posixpath.dirname(manifest)
+    return posixpath.relpath(manifest, posixpath.dirname(run))
+
+
+def hls_storage_name(manifest, path):
+    """
+    Storage name for `path` requested below a track's hls/ URL.
+
+    Returns:
+        str: The name, or None if `path` is outside the rendition run
+        of `manifest` (or the track has no renditions)
+    """
+    if not manifest:
+        return None
+    run = posixpath.dirname(manifest)
+    name = posixpath.normpath(posixpath.join(posixpath.dirname(run), path))
+    if not name.startswith(f"{run}/"):
+        return None
+    return name
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header.
+
+    Args:
+        header (str): Range header value, or None
+        size (int): Length of the file
+
+    Returns:
+        tuple: (start, end) inclusive byte offsets, or None to send the
+        whole file (no header, or a form this endpoint does not serve,
+        such as multiple ranges)
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the file, or
+        the file is empty (no byte range of it can be satisfied)
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def iter_file_range(f, start, end):
+    """
+    Yield bytes start..end (inclusive) of an open file in
+    STREAM_CHUNK_SIZE pieces, closing the file when done.
+    """
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def iter_storage_range(storage, name, start, end):
+    """
+    Yield bytes start..end (inclusive) of a stored file in
+    STREAM_CHUNK_SIZE pieces, without fetching the rest of it.
+
+    S3 objects are read with a ranged GET: reading the storage's S3
+    file object would download the whole object into a temporary file
+    before returning the first byte. Other backends (local storage in
+    development and tests) are read through storage.open().
+    """
+    if end < start:
+        return
+    bucket = getattr(storage, "bucket", None)
+    if bucket is None:
+        yield from iter_file_range(storage.open(name, "rb"), start, end)
+        return
+    body = bucket.Object(storage._normalize_name(name)).get(
+        Range=f"bytes={start}-{end}"
+    )["Body"]
+    try:
+        yield from body.iter_chunks(STREAM_CHUNK_SIZE)
+    finally:
+        body.close()
+
+
+class AudioCache:
+    """
+    Bounded least-recently-used disk cache in front of media storage.
+
+    A miss is served straight from storage (only the requested range)
+    while the whole file is copied into the cache on the background
+    pool, in STREAM_CHUNK_SIZE pieces. Later requests, including every
+    Range request of a seeking player, read the local copy. A per-entry
+    file lock stops concurrent misses from downloading the same object
+    twice. When the cache grows past `max_bytes` the least recently
+    served entries are removed; entries being streamed stay readable
+    until closed.
+
+    Files larger than a quarter of the cache are not cached, so one
+    upload cannot evict everything else.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, name):
+        digest = hashlib.sha256(name.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.audio")
+
+    def cacheable(self, size):
+        return 0 < size <= self.max_bytes // 4
+
+    def open(self, name):
+        """
+        Open the cached copy of `name`.
+
+        Returns:
+            tuple: (binary file object, size in bytes), or None on a miss
+        """
+        path = self.path(name)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # Mark as recently used
+        return f, os.fstat(f.fileno()).st_size
+
+    def fill_later(self, storage, name, size):
+        """Copy `name` into the cache on the background pool, if it fits."""
+        if self.cacheable(size):
+            submit(self.fill, storage, name)
+
+    def fill(self, storage, name):
+        """
+        Copy `name` from storage into the cache, unless it is already
+        cached or another thread or process is copying it.
+        """
+        path = self.path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{path}.lock", "wb") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            if os.path.exists(path):
+                return
+            self._fill(storage, name, path)
+        self.evict()
+
+    def _fill(self, storage, name, path):
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as dst, storage.open(name, "rb") as src:
+                shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+            os.replace(partial, path)
+        except BaseException:
+            os.remove(partial)
+            raise
+
+    def evict(self):
+        """Remove least recently used entries until under max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".audio"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                os.remove(f"{path}.lock")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def get_audio_cache():
+    return AudioCache(settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_BYTES)
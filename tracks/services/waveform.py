@@ -0,0 +1,110 @@
+import base64
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from .ffmpeg import iter_pcm
+
+logger = logging.getLogger(__name__)
+
+# Min/max pairs stored per track, whatever its length
+WAVEFORM_BUCKETS = 400
+# Audio is decoded to mono 16-bit PCM at this rate; far more than the
+# waveform resolution needs, and cheap to decode
+DECODE_SAMPLE_RATE = 8000
+# Samples reduced to one min/max pair as the decoder output streams in
+BLOCK_SAMPLES = 256
+# Blocks read from the decoder per pipe read (~2 MB of PCM)
+READ_BLOCKS = 4096
+
+
+def _block_peaks(samples):
+    """Min and max of each BLOCK_SAMPLES run; the last may be shorter."""
+    full = len(samples) // BLOCK_SAMPLES * BLOCK_SAMPLES
+    blocks = samples[:full].reshape(-1, BLOCK_SAMPLES)
+    mins, maxs = blocks.min(axis=1), blocks.max(axis=1)
+    if full < len(samples):
+        tail = samples[full:]
+        mins = np.append(mins, tail.min())
+        maxs = np.append(maxs, tail.max())
+    return mins, maxs
+
+
+def decode_block_peaks(path):
+    """
+    Decode `path` with ffmpeg and reduce it to per-block peaks.
+
+    PCM is read from the decoder in fixed-size slices and reduced with
+    NumPy as it arrives, so memory stays bounded for long tracks.
+
+    Returns:
+        tuple: (mins, maxs) int16 arrays, one entry per block
+
+    Raises:
+        FileNotFoundError: If the ffmpeg binary is not installed
+        DecodeError: If ffmpeg cannot decode the file
+    """
+    read_size = READ_BLOCKS * BLOCK_SAMPLES * 2
+    mins, maxs = [], []
+    for data in iter_pcm(path, DECODE_SAMPLE_RATE, 1, "s16le", read_size):
+        # A trailing odd byte cannot form a sample
+        end = len(data) - len(data) % 2
+        block_mins, block_maxs = _block_peaks(
+            np.frombuffer(data[:end], dtype="<i2")
+        )
+        mins.append(block_mins)
+        maxs.append(block_maxs)
+
+    if not mins:
+        return np.zeros(0, np.int16), np.zeros(0, np.int16)
+    return np.concatenate(mins), np.concatenate(maxs)
+
+
+def compute_peaks(mins, maxs, buckets=WAVEFORM_BUCKETS):
+    """
+    Reduce block peaks to `buckets` min/max pairs.
+
+    Returns:
+        bytes: Interleaved int8 pairs (min0, max0, min1, max1, ...)
+        scaled from full-scale 16-bit audio, or None if no audio was
+        decoded
+    """
+    if len(mins) == 0:
+        return None
+    # Bucket start offsets; short tracks repeat blocks rather than
+    # producing fewer than `buckets` pairs
+    edges = np.linspace(0, len(mins), buckets, endpoint=False).astype(np.intp)
+    bucket_mins = np.minimum.reduceat(mins, edges)
+    bucket_maxs = np.maximum.reduceat(maxs, edges)
+    pairs = np.column_stack((bucket_mins, bucket_maxs)).astype(np.float32)
+    scaled = np.round(pairs * (127 / 32768)).astype(np.int8)
+    return scaled.tobytes()
+
+
+def encode_peaks(data):
+    """Base64 text of a stored waveform blob for JSON, or None."""
+    if not data:
+        return None
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+def extract_waveform(track, path):
+    """
+    Processing stage: store min/max peaks for drawing the waveform.
+
+    A missing ffmpeg binary is logged and skipped, so the rest of the
+    processing still succeeds; undecodable audio fails the run.
+
+    Returns:
+        dict: Field updates for the track
+    """
+    try:
+        mins, maxs = decode_block_peaks(path)
+    except FileNotFoundError:
+        logger.warning(
+            "ffmpeg not found (FFMPEG_BINARY=%s); skipping waveform",
+            settings.FFMPEG_BINARY,
+        )
+        return {}
+    return {"waveform": compute_peaks(mins, maxs)}
@@ -0,0 +1,97 @@
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from core.images import compute_blurhash
+
+from .models import Track
+from .services.feed_cache import bump_feed_version
+from .services.images import schedule_image_variants
+from .services.moderation import schedule_moderation
+
+# Image field whose responsive derivatives each model keeps in
+# image_variants
+IMAGE_FIELDS = {Track: "track_image", Profile: "profile_picture"}
+
+
+def _profile_feed_fields(profile):
+    """Profile values that appear in serialized feed pages."""
+    return (
+        profile.username,
+        profile.display_name,
+        profile.profile_picture.name if profile.profile_picture else None,
+        profile.moderation_status,
+    )
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+def invalidate_feed_on_track_change(sender, instance, **kwargs):
+    """
+    Bump the feed cache version when a track is saved or deleted.
+
+    Covers uploads, edits and moderation status changes (including the
+    admin re-scan action, which saves with update_fields).
+    """
+    bump_feed_version()
+
+
+@receiver(post_init, sender=Profile)
+def remember_profile_feed_fields(sender, instance, **kwargs):
+    """Snapshot feed-visible profile fields as loaded from the database."""
+    instance._feed_fields = _profile_feed_fields(instance)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_feed_on_profile_change(sender, instance, **kwargs):
+    """
+    Bump the feed cache version only when the avatar, display name,
+    username or moderation status actually changed, so bio or pronoun
+    edits leave cached pages intact.
+    """
+    current = _profile_feed_fields(instance)
+    if current != getattr(instance, "_feed_fields", None):
+        bump_feed_version()
+    instance._feed_fields = current
+
+
+@receiver(pre_save, sender=Track)
+@receiver(pre_save, sender=Profile)
+def refresh_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """
+    Update what is derived from a replaced or cleared image before
+    saving. The blurhash placeholder is computed from the upload in
+    hand, so it is available from the first page view. The old
+    derivatives are dropped, so pages never pair the new image with
+    the old srcset.
+
+    A file that is not yet committed is a fresh upload, the same test
+    FileField.pre_save uses to decide whether to store it.
+    """
+    field_name = IMAGE_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    image = getattr(instance, field_name)
+    instance._image_replaced = bool(image) and not image._committed
+    if instance._image_replaced or not image:
+        instance.image_variants = {}
+        instance.image_blurhash = compute_blurhash(image.file) if image else ""
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Profile)
+def process_new_image(sender, instance, **kwargs):
+    """
+    Build derivatives for a newly uploaded image after commit, and
+    queue its moderation scan if it was saved PENDING.
+    """
+    if getattr(instance, "_image_replaced", False):
+        instance._image_replaced = False
+        schedule_image_variants(instance, IMAGE_FIELDS[sender])
+        if instance.moderation_status == "PENDING":
+            schedule_moderation(instance, IMAGE_FIELDS[sender])
@@ -1 +1,1083 @@
-# Create your tests here.
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+import boto3
+import requests
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from moto.server import ThreadedMotoServer
+from PIL import Image
+
+from accounts.models import CustomUser, Profile
+from comments.models import Comment
+
+from .management.commands.check_query_plans import hot_queries
+from .models import MediaBlob, ModerationVerdict, Track, UploadSession
+from .services.feed import get_feed_payload
+from .services.feed_cache import bump_feed_version, get_feed_version
+from .services.loudness import loudness_updates
+from .services.moderation import (
+    moderate_image,
+    scan_image_bytes,
+    scan_stored_image,
+)
+from .services.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    offset_page,
+)
+from .services.processing import process_track
+from .services.search import search_tracks
+from .services.streaming import (
+    RangeNotSatisfiable,
+    etag_matches,
+    get_audio_cache,
+    iter_storage_range,
+    parse_range,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name="cover.png", color="red"):
+    """A small PNG upload."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), color).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+# Media is written to a temp dir instead of S3, and uploads skip AWS
+media_settings = override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage."
+            "StaticFilesStorage"
+        },
+    },
+    MEDIA_ROOT=MEDIA_ROOT,
+    AUDIO_CACHE_DIR=f"{MEDIA_ROOT}/.audio-cache",
+    IMAGE_MODERATION_ENABLED=False,
+)
+
+
+def create_artist(email="artist@example.com", username="artist"):
+    """A user with a profile, as every track owner has."""
+    user = CustomUser.objects.create_user(email, "pw")
+    Profile.objects.create(user=user, username=username, display_name="A")
+    return user
+
+
+class TrackFactoryMixin:
+    def create_track(self, title="Song", **kwargs):
+        kwargs.setdefault("audio_file", "tracks/song.mp3")
+        # As the upload form does for tracks without artwork
+        kwargs.setdefault("moderation_status", "APPROVED")
+        return Track.objects.create(title=title, user=self.user, **kwargs)
+
+
+@media_settings
+class TrackTestCase(TrackFactoryMixin, TestCase):
+    """Base class: a track owner, media stored in a temp dir."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_artist()
+
+
+@media_settings
+class TrackTransactionTestCase(TrackFactoryMixin, TransactionTestCase):
+    """As TrackTestCase, for code that writes from worker threads."""
+
+    def setUp(self):
+        self.user = create_artist()
+
+
+class MediaBlobTests(TrackTestCase):
+    def test_identical_uploads_share_one_blob(self):
+        first = self.create_track(track_image=image_upload())
+        second = self.create_track(track_image=image_upload())
+
+        self.assertEqual(first.track_image.name, second.track_image.name)
+        blob = MediaBlob.objects.get(name=first.track_image.name)
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_release_deletes_file_with_last_reference(self):
+        first = self.create_track(track_image=image_upload())
+        self.create_track(track_image=image_upload())
+        name = first.track_image.name
+        storage = first.track_image.storage
+
+        self.assertFalse(MediaBlob.objects.release(storage, name))
+        self.assertTrue(storage.exists(name))
+        self.assertTrue(MediaBlob.objects.release(storage, name))
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_slug_retry_keeps_blob_reference(self):
+        first = self.create_track(title="Song", track_image=image_upload())
+
+        # The first slug allocated collides, as if a concurrent upload
+        # had claimed it, so the INSERT is retried with a fresh slug
+        with mock.patch.object(
+            Track, "_allocate_slug", side_effect=[first.slug, "song-fresh"]
+        ):
+            second = self.create_track(
+                title="Song", track_image=image_upload()
+            )
+
+        self.assertEqual(second.slug, "song-fresh")
+        blob = MediaBlob.objects.get(name=second.track_image.name)
+        self.assertEqual(blob.ref_count, 2)
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_satisfiable_ranges(self):
+        cases = [
+            ("bytes=0-99", (0, 99)),
+            ("bytes=100-", (100, 999)),
+            ("bytes=900-5000", (900, 999)),
+            ("bytes=-100", (900, 999)),
+            ("bytes=-5000", (0, 999)),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+
+    def test_whole_file_for_missing_or_unsupported_header(self):
+        for header in (None, "", "bytes=-", "bytes=0-1,5-9", "items=0-1"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        cases = [
+            ("bytes=1000-", 1000),
+            ("bytes=5-2", 1000),
+            ("bytes=-0", 1000),
+            ("bytes=0-", 0),
+            ("bytes=-100", 0),
+        ]
+        for header, size in cases:
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, size)
+
+
+# Cache fills run in the test's thread, not on the background pool
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class PlaybackTests(TrackTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        audio_cache_dir = get_audio_cache().directory
+        self.addCleanup(shutil.rmtree, audio_cache_dir, ignore_errors=True)
+        self.storage = Track._meta.get_field("audio_file").storage
+        self.track = self.create_track(
+            audio_file=self.store("tracks/song.mp3", b"0123456789")
+        )
+        run = f"tracks/hls/{self.track.pk}/RUN2"
+        self.store(f"tracks/hls/{self.track.pk}/RUN1/master.m3u8", b"old")
+        self.store(f"{run}/128k/playlist.m3u8", b"#EXTM3U\nsegment_000.ts")
+        self.track.hls_manifest = self.store(f"{run}/master.m3u8", b"#EXTM3U")
+        self.track.save(update_fields=["hls_manifest"])
+
+    def store(self, name, content):
+        name = self.storage.save(name, ContentFile(content))
+        self.addCleanup(self.storage.delete, name)
+        return name
+
+    def hls(self, path):
+        return self.client.get(
+            reverse("track_hls", args=[self.track.slug, path])
+        )
+
+    def test_playback_needs_login(self):
+        for url in (
+            reverse("track_feed_api"),
+            reverse("track_stream", args=[self.track.slug]),
+            self.track.hls_url,
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_payloads_carry_no_storage_urls(self):
+        self.client.force_login(self.user)
+        feed_item = self.client.get(reverse("track_feed_api")).json()[
+            "tracks"
+        ][0]
+        audio = self.client.get(
+            reverse("track_audio_api", args=[self.track.slug])
+        ).json()
+
+        hls_url = reverse(
+            "track_hls", args=[self.track.slug, "RUN2/master.m3u8"]
+        )
+        for payload in (feed_item, audio):
+            with self.subTest(payload=payload["id"]):
+                self.assertNotIn("audio_url", payload)
+                self.assertEqual(payload["hls_url"], hls_url)
+                self.assertEqual(payload["playback_url"], hls_url)
+
+    def test_hls_serves_only_the_current_run(self):
+        self.client.force_login(self.user)
+
+        response = self.hls("RUN2/128k/playlist.m3u8")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.apple.mpegurl"
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            b"#EXTM3U\nsegment_000.ts",
+        )
+        for path in (
+            "RUN1/master.m3u8",
+            "RUN2/../RUN1/master.m3u8",
+            "RUN2/../../../song.mp3",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.hls(path).status_code, 404)
+
+    def test_stream_serves_byte_ranges(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("track_stream", args=[self.track.slug]),
+            HTTP_RANGE="bytes=2-4",
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+    def test_miss_streams_from_storage_and_fills_cache(self):
+        self.client.force_login(self.user)
+        url = reverse("track_stream", args=[self.track.slug])
+
+        with mock.patch(
+            "tracks.views.iter_storage_range", wraps=iter_storage_range
+        ) as from_storage:
+            miss = self.client.get(url, HTTP_RANGE="bytes=0-3")
+            self.assertEqual(b"".join(miss.streaming_content), b"0123")
+            hit = self.client.get(url, HTTP_RANGE="bytes=6-")
+            self.assertEqual(b"".join(hit.streaming_content), b"6789")
+
+        from_storage.assert_called_once()
+        cached, size = get_audio_cache().open(self.track.audio_file.name)
+        cached.close()
+        self.assertEqual(size, 10)
+
+    def test_if_none_match_compares_whole_tags(self):
+        self.client.force_login(self.user)
+        url = reverse("track_stream", args=[self.track.slug])
+        etag = self.client.head(url)["ETag"]
+
+        for header, status in (
+            (etag, 304),
+            (f'"other", W/{etag}', 304),
+            ("*", 304),
+            (f'"x{etag[1:]}', 200),
+            (etag[:-2] + '"', 200),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, status)
+
+
+class StorageRangeTests(SimpleTestCase):
+    def test_s3_objects_are_read_with_a_ranged_get(self):
+        storage = mock.MagicMock()
+        storage._normalize_name.side_effect = lambda name: f"media/{name}"
+        body = storage.bucket.Object.return_value.get.return_value["Body"]
+        body.iter_chunks.return_value = iter([b"23", b"4"])
+
+        data = b"".join(iter_storage_range(storage, "a.mp3", 2, 4))
+
+        self.assertEqual(data, b"234")
+        storage.bucket.Object.assert_called_once_with("media/a.mp3")
+        storage.bucket.Object.return_value.get.assert_called_once_with(
+            Range="bytes=2-4"
+        )
+        body.close.assert_called_once()
+
+    def test_empty_file_reads_nothing(self):
+        storage = mock.Mock()
+        self.assertEqual(list(iter_storage_range(storage, "a.mp3", 0, -1)), [])
+        storage.bucket.Object.assert_not_called()
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertFalse(etag_matches('"ab"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+class BackfillLoudnessTests(TrackTestCase):
+    def test_unmeasurable_tracks_are_not_measured_again(self):
+        silent = self.create_track(title="Silent")
+        Track.objects.filter(pk=silent.pk).update(
+            **loudness_updates(None, None)
+        )
+        self.create_track(title="Old", loudness_lufs=-9.0)
+        out = io.StringIO()
+
+        call_command("backfill_loudness", stdout=out)
+
+        self.assertIn("No tracks to measure.", out.getvalue())
+
+    def test_models_do_not_import_scipy(self):
+        # scipy.signal costs over a second at startup in every process
+        code = (
+            "import django, sys; django.setup(); import tracks.models; "
+            "sys.exit('scipy' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code])
+        self.assertEqual(result.returncode, 0)
+
+
+class ReprocessPendingTracksTests(TrackTransactionTestCase):
+    def test_requeues_only_stale_unfinished_tracks(self):
+        stale = self.create_track(title="Stale")
+        stuck = self.create_track(
+            title="Stuck", processing_status="PROCESSING"
+        )
+        fresh = self.create_track(title="Fresh")
+        done = self.create_track(title="Done", processing_status="READY")
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Track.objects.exclude(pk=fresh.pk).update(updated_at=an_hour_ago)
+
+        processed = []
+
+        def fake_process(track_id):
+            processed.append(track_id)
+            Track.objects.filter(pk=track_id).update(processing_status="READY")
+
+        with mock.patch(
+            "tracks.management.commands.reprocess_pending_tracks."
+            "process_track",
+            side_effect=fake_process,
+        ):
+            call_command("reprocess_pending_tracks", stdout=io.StringIO())
+
+        self.assertCountEqual(processed, [stale.pk, stuck.pk])
+        self.assertNotIn(fresh.pk, processed)
+        self.assertNotIn(done.pk, processed)
+
+    def test_running_track_is_not_picked_up_again(self):
+        track = self.create_track()
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Track.objects.filter(pk=track.pk).update(updated_at=an_hour_ago)
+        requeued = []
+
+        def stage(track, path):
+            # The command runs while this track is mid-processing
+            with mock.patch(
+                "tracks.management.commands.reprocess_pending_tracks."
+                "process_track",
+                side_effect=requeued.append,
+            ):
+                call_command("reprocess_pending_tracks", stdout=io.StringIO())
+            return {}
+
+        with (
+            mock.patch(
+                "tracks.services.processing.download_audio",
+                return_value="song.mp3",
+            ),
+            mock.patch(
+                "tracks.services.processing.PROCESSING_STAGES", [stage]
+            ),
+        ):
+            process_track(track.pk)
+
+        self.assertEqual(requeued, [])
+        track.refresh_from_db()
+        self.assertEqual(track.processing_status, "READY")
+        self.assertGreater(track.updated_at, an_hour_ago)
+
+
+class DirectUploadTests(TrackTestCase):
+    def start(self, filename, **post):
+        client = mock.Mock()
+        client.create_multipart_upload.return_value = {"UploadId": "u1"}
+        client.generate_presigned_url.return_value = "https://s3/part"
+        storage = mock.Mock(bucket_name="media")
+        storage._normalize_name.side_effect = lambda name: name
+        self.client.force_login(self.user)
+        with (
+            mock.patch(
+                "tracks.services.direct_upload._storage", return_value=storage
+            ),
+            mock.patch(
+                "tracks.services.direct_upload._client", return_value=client
+            ),
+        ):
+            response = self.client.post(
+                reverse("track_upload_direct_start"),
+                {"filename": filename, "size": 1024, **post},
+            )
+        return response, client
+
+    def test_content_type_comes_from_extension_not_client(self):
+        response, client = self.start("song.mp3", content_type="text/html")
+
+        self.assertEqual(response.status_code, 200)
+        kwargs = client.create_multipart_upload.call_args.kwargs
+        self.assertEqual(kwargs["ContentType"], "audio/mpeg")
+
+    def test_rejects_non_audio_extension(self):
+        response, client = self.start("page.html")
+
+        self.assertEqual(response.status_code, 400)
+        client.create_multipart_upload.assert_not_called()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+MOTO_PORT = free_port()
+
+
+# Real S3 API calls, against a local moto server instead of AWS
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "storages.backends.s3.S3Storage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage."
+            "StaticFilesStorage"
+        },
+    },
+    AWS_S3_ENDPOINT_URL=f"http://127.0.0.1:{MOTO_PORT}",
+    AWS_ACCESS_KEY_ID="testing",
+    AWS_SECRET_ACCESS_KEY="testing",
+    UPLOAD_MAX_SIZES={
+        "audio_file": 4096,
+        "track_image": 10 * 1024 * 1024,
+        "profile_picture": 10 * 1024 * 1024,
+    },
+)
+class DirectUploadS3Tests(TrackTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Keep the server's per-request access log out of test output
+        cls.werkzeug_level = logging.getLogger("werkzeug").level
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        cls.server = ThreadedMotoServer(ip_address="127.0.0.1", port=MOTO_PORT)
+        cls.server.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.server.stop()
+        logging.getLogger("werkzeug").setLevel(cls.werkzeug_level)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # Title moderation calls an external API; treat titles as clean
+        patcher = mock.patch(
+            "tracks.forms.get_toxicity_score", return_value=0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.s3 = boto3.client(
+            "s3",
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            region_name=settings.AWS_S3_REGION_NAME,
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        )
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.s3.create_bucket(
+            Bucket=self.bucket,
+            CreateBucketConfiguration={
+                "LocationConstraint": settings.AWS_S3_REGION_NAME
+            },
+        )
+        self.addCleanup(
+            requests.post, f"{settings.AWS_S3_ENDPOINT_URL}/moto-api/reset"
+        )
+
+    def upload(self, content):
+        """Start an upload, PUT its part and complete it."""
+        started = self.client.post(
+            reverse("track_upload_direct_start"),
+            {"filename": "song.mp3", "size": len(content)},
+        ).json()
+        [part] = started["parts"]
+        put = requests.put(part["url"], data=content)
+        put.raise_for_status()
+        parts = [{"part_number": 1, "etag": put.headers["ETag"]}]
+        return self.client.post(
+            reverse("track_upload_direct_complete"),
+            {
+                "upload_id": started["upload_id"],
+                "parts": json.dumps(parts),
+                "title": "Direct",
+                "track_image": image_upload(),
+            },
+        )
+
+    def stored_keys(self):
+        listing = self.s3.list_objects_v2(Bucket=self.bucket, Prefix="tracks/")
+        return [item["Key"] for item in listing.get("Contents", [])]
+
+    def test_upload_is_assembled_and_registered(self):
+        content = b"ID3" + bytes(1021)
+
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        track = Track.objects.get(title="Direct")
+        self.assertEqual(
+            response.json()["redirect"],
+            reverse("track_detail", args=[track.slug]),
+        )
+        stored = self.s3.get_object(
+            Bucket=self.bucket, Key=track.audio_file.name
+        )
+        self.assertEqual(stored["Body"].read(), content)
+        self.assertEqual(stored["ContentType"], "audio/mpeg")
+
+    def test_oversized_parts_are_aborted_before_assembly(self):
+        # The client declares a small file, then PUTs more than the limit
+        started = self.client.post(
+            reverse("track_upload_direct_start"),
+            {"filename": "song.mp3", "size": 1024},
+        ).json()
+        put = requests.put(
+            started["parts"][0]["url"], data=b"ID3" + bytes(8192)
+        )
+        put.raise_for_status()
+
+        response = self.client.post(
+            reverse("track_upload_direct_complete"),
+            {
+                "upload_id": started["upload_id"],
+                "parts": json.dumps(
+                    [{"part_number": 1, "etag": put.headers["ETag"]}]
+                ),
+                "title": "Too big",
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["error"], "File size exceeds 100MB limit."
+        )
+        self.assertEqual(self.stored_keys(), [])
+        uploads = self.s3.list_multipart_uploads(Bucket=self.bucket)
+        self.assertNotIn("Uploads", uploads)
+        self.assertFalse(Track.objects.exists())
+
+
+def encode_image(image, fmt="PNG", **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_MODERATION_ENABLED=True, IMAGE_MODERATION_CACHE=True)
+class ModerationVerdictCacheTests(TrackTestCase):
+    VIOLENCE = [{"Name": "Violence", "Confidence": 97.0}]
+
+    def setUp(self):
+        # A pattern with plenty of detail, so its dHash is comparable
+        self.image = Image.new("L", (90, 80))
+        self.image.putdata(
+            [
+                (x * 37 + y * 91) * (x ^ y) % 256
+                for y in range(80)
+                for x in range(90)
+            ]
+        )
+        patcher = mock.patch(
+            "tracks.services.moderation._rekognition_scan",
+            return_value=(True, [], False),
+        )
+        self.rekognition = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_bytes_reuse_the_verdict(self):
+        data = encode_image(self.image)
+
+        first = scan_image_bytes(data)
+        second = scan_image_bytes(data)
+
+        self.assertEqual(first, (True, [], False))
+        self.assertEqual(second, first)
+        self.assertEqual(self.rekognition.call_count, 1)
+        self.assertEqual(ModerationVerdict.objects.get().hit_count, 1)
+
+    def test_near_duplicate_of_blocked_image_is_blocked(self):
+        self.rekognition.return_value = (False, self.VIOLENCE, False)
+        scan_image_bytes(encode_image(self.image))
+        look_alike = encode_image(
+            self.image.resize((180, 160)).convert("RGB"), "JPEG", quality=85
+        )
+
+        result = scan_image_bytes(look_alike)
+
+        self.assertEqual(result, (False, self.VIOLENCE, False))
+        self.assertEqual(self.rekognition.call_count, 1)
+
+    def test_near_duplicate_of_approved_image_is_scanned(self):
+        scan_image_bytes(encode_image(self.image))
+        look_alike = encode_image(
+            self.image.resize((180, 160)).convert("RGB"), "JPEG", quality=85
+        )
+
+        scan_image_bytes(look_alike)
+
+        self.assertEqual(self.rekognition.call_count, 2)
+
+    def test_threshold_change_invalidates_cached_verdicts(self):
+        data = encode_image(self.image)
+        scan_image_bytes(data)
+
+        with self.settings(REKOG_MIN_CONFIDENCE=95):
+            scan_image_bytes(data)
+            scan_image_bytes(data)
+
+        self.assertEqual(self.rekognition.call_count, 2)
+        self.assertEqual(
+            ModerationVerdict.objects.values("config_version")
+            .distinct()
+            .count(),
+            2,
+        )
+
+    def test_failed_scans_are_not_cached(self):
+        self.rekognition.return_value = (True, [], True)
+        data = encode_image(self.image)
+
+        scan_image_bytes(data)
+        scan_image_bytes(data)
+
+        self.assertEqual(self.rekognition.call_count, 2)
+        self.assertFalse(ModerationVerdict.objects.exists())
+
+    def test_stored_blob_is_answered_without_download(self):
+        data = encode_image(self.image)
+        scan_image_bytes(data)
+        storage = mock.Mock()
+        MediaBlob.objects.create(
+            name="tracks/images/cover.png",
+            sha256=hashlib.sha256(data).hexdigest(),
+            size=len(data),
+        )
+
+        result = scan_stored_image(storage, "tracks/images/cover.png")
+
+        self.assertEqual(result, (True, [], False))
+        storage.open.assert_not_called()
+        self.assertEqual(self.rekognition.call_count, 1)
+
+
+@override_settings(UPLOAD_SESSION_DIR=f"{MEDIA_ROOT}/.upload-sessions")
+class ResumableUploadTests(TrackTestCase):
+    content = b"ID3" + bytes(2045)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        patcher = mock.patch(
+            "tracks.forms.get_toxicity_score", return_value=0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self, size=None):
+        response = self.client.post(
+            reverse("track_upload_resumable_create"),
+            {
+                "filename": "song.mp3",
+                "size": len(self.content) if size is None else size,
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["url"]
+
+    def patch(self, url, offset, data):
+        return self.client.patch(
+            url,
+            data,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    def finish(self, url):
+        return self.client.post(
+            f"{url}finish/",
+            {"title": "Resumed", "track_image": image_upload()},
+        )
+
+    def test_upload_resumes_from_the_persisted_offset(self):
+        url = self.start()
+        half = len(self.content) // 2
+
+        response = self.patch(url, 0, self.content[:half])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], str(half))
+
+        # A client that lost the response asks where to resume from
+        response = self.client.head(url)
+        self.assertEqual(response["Upload-Offset"], str(half))
+        self.assertEqual(self.client.get(url).json()["offset"], half)
+
+        response = self.patch(url, half, self.content[half:])
+        self.assertEqual(response["Upload-Offset"], str(len(self.content)))
+        part = UploadSession.objects.get().path
+
+        response = self.finish(url)
+        self.assertEqual(response.status_code, 200)
+        track = Track.objects.get(title="Resumed")
+        self.assertEqual(
+            response.json()["redirect"],
+            reverse("track_detail", args=[track.slug]),
+        )
+        with track.audio_file.open("rb") as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(part))
+
+    def test_mismatched_offset_is_rejected_with_the_current_one(self):
+        url = self.start()
+        self.patch(url, 0, self.content[:100])
+
+        for offset in (0, 50, 200):
+            with self.subTest(offset=offset):
+                response = self.patch(url, offset, self.content[:10])
+
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response["Upload-Offset"], "100")
+        session = UploadSession.objects.get()
+        with open(session.path, "rb") as f:
+            self.assertEqual(f.read(), self.content[:100])
+
+    def test_chunk_past_the_declared_size_is_rejected(self):
+        url = self.start(size=10)
+
+        response = self.patch(url, 0, self.content[:11])
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response["Upload-Offset"], "0")
+
+    def test_incomplete_upload_cannot_be_finished(self):
+        url = self.start()
+        self.patch(url, 0, self.content[:100])
+
+        response = self.finish(url)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Track.objects.exists())
+        self.assertTrue(UploadSession.objects.exists())
+
+    def test_sessions_are_private_to_their_owner(self):
+        url = self.start()
+        self.client.force_login(create_artist("other@example.com", "other"))
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.patch(url, 0, b"ID3").status_code, 404)
+
+
+class SlugTests(TrackTestCase):
+    def test_lowest_free_suffix_is_used(self):
+        self.assertEqual(self.create_track("A").slug, "a")
+        self.assertEqual(self.create_track("A").slug, "a-1")
+        Track.objects.filter(slug="a-1").update(slug="a-5")
+        self.assertEqual(self.create_track("A").slug, "a-1")
+
+    def test_only_base_and_numbered_slugs_count_as_taken(self):
+        for title in ("A", "Abc", "A-Side", "A 2 B", "A 1x", "Ab 1"):
+            self.create_track(title)
+
+        with CaptureQueriesContext(connection) as queries:
+            slug = Track(title="A", user=self.user)._allocate_slug()
+
+        # "a-side", "a-2-b" and "a-1x" share the prefix but are not
+        # "a-<n>" slugs, so "a-1" is still free
+        self.assertEqual(slug, "a-1")
+        self.assertEqual(len(queries), 1)
+
+
+class KeysetPaginationTests(TrackTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tracks = [
+            Track.objects.create(
+                title=f"Song {i}", user=cls.user, audio_file="tracks/a.mp3"
+            )
+            for i in range(7)
+        ]
+        # Several tracks share a timestamp, so the id breaks the tie
+        moment = timezone.now()
+        Track.objects.filter(pk__in=[t.pk for t in cls.tracks[2:5]]).update(
+            created_at=moment
+        )
+
+    def walk(self, queryset, page_size):
+        pages, cursor = [], None
+        while True:
+            page = keyset_page(queryset, cursor=cursor, page_size=page_size)
+            pages.append([track.pk for track in page])
+            if not page.has_next():
+                self.assertIsNone(page.next_cursor)
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_track_once_newest_first(self):
+        expected = list(
+            Track.objects.order_by("-created_at", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+        for page_size in (1, 2, 3, 7, 10):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(Track.objects.all(), page_size)
+                self.assertEqual(sum(pages, []), expected)
+                self.assertTrue(all(len(p) <= page_size for p in pages))
+
+    def test_offset_page_hands_over_to_keyset(self):
+        first = offset_page(Track.objects.all(), "2", page_size=3)
+        following = keyset_page(
+            Track.objects.all(), cursor=first.next_cursor, page_size=3
+        )
+        expected = list(
+            Track.objects.order_by("-created_at", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+
+        self.assertEqual(first.number, 2)
+        self.assertEqual([t.pk for t in first], expected[3:6])
+        self.assertEqual([t.pk for t in following], expected[6:])
+
+    def test_cursor_round_trip(self):
+        track = self.tracks[0]
+        cursor = encode_cursor(track.created_at, track.pk)
+        self.assertEqual(decode_cursor(cursor), (track.created_at, track.pk))
+
+    def test_malformed_cursor_is_rejected(self):
+        # Not base64, not JSON, and JSON without a valid timestamp
+        for cursor in ("!!!", "bm90IGpzb24", "WyJ4IiwxXQ"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    keyset_page(Track.objects.all(), cursor=cursor)
+
+
+class FeedCacheTests(TrackTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_legacy_page_spellings_share_one_cache_entry(self):
+        self.create_track()
+        get_feed_payload(page="1")
+
+        for page in ("01", "0", "-3", "abc", 1):
+            # The only query is the fresh comment count lookup
+            with self.subTest(page=page), self.assertNumQueries(1):
+                payload = get_feed_payload(page=page)
+            self.assertEqual(payload["page"], 1)
+
+    def test_version_is_bumped_on_commit(self):
+        version = get_feed_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_feed_version()
+            self.assertEqual(get_feed_version(), version)
+
+        self.assertEqual(get_feed_version(), version + 1)
+
+    def test_comment_counts_are_fresh_without_invalidation(self):
+        track = self.create_track()
+        get_feed_payload()
+        version = get_feed_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            track.adjust_visible_comment_count(2)
+
+        self.assertEqual(get_feed_version(), version)
+        item = get_feed_payload()["tracks"][0]
+        self.assertEqual(item["comment_count"], 2)
+        sparse = get_feed_payload(fields=frozenset({"id", "comment_count"}))
+        self.assertEqual(
+            sparse["tracks"][0], {"id": track.pk, "comment_count": 2}
+        )
+
+
+class CommentCountTests(TrackTestCase):
+    def count(self, track):
+        track.refresh_from_db(fields=["visible_comment_count"])
+        return track.visible_comment_count
+
+    def test_adjustments_from_stale_instances_add_up(self):
+        track = self.create_track()
+        first = Track.objects.get(pk=track.pk)
+        second = Track.objects.get(pk=track.pk)
+
+        # Each copy still holds 0; the F() update must not overwrite
+        first.adjust_visible_comment_count(1)
+        second.adjust_visible_comment_count(1)
+
+        self.assertEqual(self.count(track), 2)
+
+    def test_count_never_goes_below_zero(self):
+        track = self.create_track()
+        track.adjust_visible_comment_count(1)
+
+        track.adjust_visible_comment_count(-3)
+
+        self.assertEqual(self.count(track), 0)
+
+    @mock.patch("comments.forms.get_toxicity_score", return_value=0.0)
+    def test_comment_views_keep_the_count(self, _score):
+        track = self.create_track()
+        self.client.force_login(self.user)
+
+        self.client.post(
+            reverse("comments:post_comment"),
+            {"track": track.pk, "content": "Nice"},
+        )
+        parent = Comment.objects.get()
+        self.client.post(
+            reverse("comments:post_comment"),
+            {"track": track.pk, "content": "Agreed", "parent": parent.pk},
+        )
+        reply = Comment.objects.exclude(pk=parent.pk).get()
+        self.assertEqual(self.count(track), 2)
+
+        # Soft delete: the parent has a reply, so only its visibility goes
+        self.client.post(reverse("comments:comment_delete", args=[parent.pk]))
+        self.assertEqual(self.count(track), 1)
+        # Deleting the reply also removes the soft-deleted parent, which
+        # was already uncounted
+        self.client.post(reverse("comments:comment_delete", args=[reply.pk]))
+        self.assertEqual(self.count(track), 0)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_rebuild_matches_visible_comments(self):
+        track = self.create_track()
+        Comment.objects.create(track=track, user=self.user, content="a")
+        Comment.objects.create(
+            track=track, user=self.user, content="b", deleted=True
+        )
+        Track.objects.filter(pk=track.pk).update(visible_comment_count=7)
+
+        call_command("rebuild_comment_counts", stdout=io.StringIO())
+
+        self.assertEqual(self.count(track), 1)
+
+
+class ArtworkModerationVisibilityTests(TrackTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_unapproved_artwork_hides_track(self):
+        self.create_track(title="Song APPROVED")
+        for status, color in (("PENDING", "red"), ("REJECTED", "blue")):
+            self.create_track(
+                title=f"Song {status}",
+                track_image=image_upload(color=color),
+                moderation_status=status,
+            )
+
+        feed = get_feed_payload()["tracks"]
+        results = search_tracks("Song").object_list
+
+        for items in (feed, results):
+            with self.subTest(items=items):
+                self.assertEqual(
+                    [item["title"] for item in items], ["Song APPROVED"]
+                )
+
+    def test_owner_sees_rejected_artwork_notice(self):
+        track = self.create_track(moderation_status="REJECTED")
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("track_detail", args=[track.slug]))
+
+        self.assertContains(response, "hidden from the feed and search")
+        self.assertContains(response, reverse("track_edit", args=[track.slug]))
+
+    def test_owner_is_emailed_when_artwork_is_rejected(self):
+        track = self.create_track(
+            title="Flagged",
+            track_image=image_upload(),
+            moderation_status="PENDING",
+        )
+
+        with mock.patch(
+            "tracks.services.moderation.scan_stored_image",
+            return_value=(False, ["Violence"], False),
+        ):
+            status = moderate_image(Track, track.pk, "track_image")
+
+        self.assertEqual(status, "REJECTED")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertIn("Flagged", mail.outbox[0].body)
+
+    def test_approved_artwork_sends_no_email(self):
+        track = self.create_track(
+            track_image=image_upload(), moderation_status="PENDING"
+        )
+
+        with mock.patch(
+            "tracks.services.moderation.scan_stored_image",
+            return_value=(True, [], False),
+        ):
+            moderate_image(Track, track.pk, "track_image")
+
+        self.assertEqual(mail.outbox, [])
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "EXPLAIN checks need PostgreSQL"
+)
+class QueryPlanTests(TrackTestCase):
+    def test_hot_queries_use_their_indexes(self):
+        self.create_track()
+        with transaction.atomic():
+            # As in check_query_plans: without sequential scans the plan
+            # does not depend on how few rows the test database holds
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for label, queryset, index in hot_queries():
+                with self.subTest(label):
+                    self.assertIsNotNone(index)
+                    self.assertIn(index, queryset.explain())
@@ -6,14 +6,51 @@ from . import views
 urlpatterns = [
     path("", views.track_feed, name="track_feed"),  # Main track feed
     path("upload/", views.track_upload, name="track_upload"),
+    # Direct-to-storage multipart uploads for large audio files
+    path(
+        "upload/direct/start/",
+        views.track_upload_direct_start,
+        name="track_upload_direct_start",
+    ),
+    path(
+        "upload/direct/complete/",
+        views.track_upload_direct_complete,
+        name="track_upload_direct_complete",
+    ),
+    path(
+        "upload/direct/abort/",
+        views.track_upload_direct_abort,
+        name="track_upload_direct_abort",
+    ),
+    # Resumable chunked uploads
+    path(
+        "upload/resumable/",
+        views.track_upload_resumable_create,
+        name="track_upload_resumable_create",
+    ),
+    path(
+        "upload/resumable/<uuid:session_id>/",
+        views.track_upload_resumable,
+        name="track_upload_resumable",
+    ),
+    path(
+        "upload/resumable/<uuid:session_id>/finish/",
+        views.track_upload_resumable_finish,
+        name="track_upload_resumable_finish",
+    ),
     # API endpoints - must come before slug patterns
     path(
         "feed-api/", views.track_feed_api, name="track_feed_api"
     ),  # API endpoint for track feed
+    path(
+        "search/", views.track_search_api, name="track_search_api"
+    ),  # Ranked full-text search
     path(
         "api/<slug:slug>/audio/", views.track_audio_api, name="track_audio_api"
     ),
     # Slug patterns - must come last
+    path("<slug:slug>/stream/", views.track_stream, name="track_stream"),
+    path("<slug:slug>/hls/<path:path>", views.track_hls, name="track_hls"),
     path("<slug:slug>/edit/", views.track_edit, name="track_edit"),
     path("<slug:slug>/delete/", views.track_delete, name="track_delete"),
     path("<slug:slug>/", views.track_detail, name="track_detail"),
@@ -1,16 +1,60 @@
+import json
+import mimetypes
+import os
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Prefetch
-from django.http import Http404, JsonResponse
+from django.db import transaction
+from django.http import (
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import (
+    require_http_methods,
+    require_POST,
+)
 
 from comments.forms import CommentForm
 from comments.models import Comment
+from core.images import delete_variants
 
 from .forms import TrackUploadForm
-from .models import Track
+from .models import MediaBlob, Track, UploadSession
+from .services.direct_upload import (
+    DirectUploadError,
+    abort_upload,
+    complete_upload,
+    discard_upload,
+    start_upload,
+)
+from .services.feed import get_feed_page, get_feed_payload, parse_fields
+from .services.hls import CONTENT_TYPES as HLS_CONTENT_TYPES
+from .services.hls import delete_renditions
+from .services.pagination import InvalidCursor
+from .services.processing import schedule_processing
+from .services.resumable import (
+    ResumableUploadError,
+    append_chunk,
+    assembled_file,
+    create_session,
+    current_offset,
+)
+from .services.search import search_tracks
+from .services.streaming import (
+    RangeNotSatisfiable,
+    audio_etag,
+    etag_matches,
+    get_audio_cache,
+    hls_storage_name,
+    iter_file_range,
+    iter_storage_range,
+    parse_range,
+)
 
 
 # Create your views here.
@@ -19,28 +63,12 @@ def track_feed(request):
     """
     Server-render (SSR) the first page (5 newest tracks).
     Only show APPROVED tracks to maintain community standards.
-    """
-    # Query set for approved tracks (qs)
-    tracks_qs = (
-        Track.objects.filter(moderation_status="APPROVED")
-        .select_related("user__profile")
-        .prefetch_related(
-            Prefetch(
-                "comments", queryset=Comment.objects.filter(deleted=False)
-            )
-        )
-        .order_by("-created_at")
-    )
 
-    # Paginate first page to match AJAX API
-    paginator = Paginator(tracks_qs, 5)
-    page_obj = paginator.get_page(1)  # Always get page 1 for server render
-
-    # Add visible comment count to each track for template rendering
-    for track in page_obj:
-        track.visible_comment_count = track.comments.filter(
-            deleted=False
-        ).count()
+    Uses the shared feed query in tracks.services.feed, so the page
+    matches what track_feed_api returns for the following cursors.
+    """
+    # First keyset page; the API continues from page_obj.next_cursor
+    page_obj = get_feed_page()
 
     upload_form = TrackUploadForm()
     # Check for ?share=1 in the URL
@@ -52,6 +80,8 @@ def track_feed(request):
             "tracks": page_obj,
             "upload_form": upload_form,
             "show_upload_modal": show_upload_modal,
+            "direct_upload_threshold": settings.DIRECT_UPLOAD_THRESHOLD,
+            "large_upload_method": settings.LARGE_UPLOAD_METHOD,
         },
     )
 
@@ -113,9 +143,6 @@ def track_detail(request, slug):
         .order_by("created_at")
     )
 
-    # Only count non-deleted comments
-    visible_comment_count = comments.filter(deleted=False).count()
-
     # Handle comment submission with content moderation
     if request.method == "POST":
         form = CommentForm(request.POST)
@@ -124,7 +151,9 @@ def track_detail(request, slug):
             comment = form.save(commit=False)
             comment.user = request.user
             comment.track = track
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                track.adjust_visible_comment_count(1)
             messages.success(request, "Comment added successfully!")
             return redirect("track_detail", slug=track.slug)
         else:
@@ -140,12 +169,34 @@ def track_detail(request, slug):
         {
             "track": track,
             "comments": comments,
-            "visible_comment_count": visible_comment_count,
+            "visible_comment_count": track.visible_comment_count,
             "form": form,
         },
     )
 
 
+def add_upload_messages(request, track):
+    """Flash the upload result, reflecting the artwork moderation status."""
+    if track.moderation_status == "PENDING":
+        messages.warning(
+            request,
+            f'Track "{track.title}" uploaded successfully! '
+            "Your artwork is pending moderation; the track will be "
+            "listed once it is approved.",
+        )
+    elif track.moderation_status == "REJECTED":
+        messages.error(
+            request,
+            f'Track "{track.title}" was uploaded but the artwork '
+            "was flagged during moderation, so the track is hidden. "
+            "Replace the artwork to have it listed.",
+        )
+    else:
+        messages.success(
+            request, f'Track "{track.title}" uploaded successfully!'
+        )
+
+
 @login_required
 def track_upload(request):
     """
@@ -163,7 +214,7 @@ def track_upload(request):
         - MIME type verification
         - Filename sanitization
         - User authentication verification
-        - AWS Rekognition image moderation with fail-open policy
+        - AWS Rekognition image moderation, in the background
 
     User Experience:
         - Modal state preservation on validation errors
@@ -194,26 +245,10 @@ def track_upload(request):
             track = form.save(commit=False)
             track.user = request.user
             track.save()
+            # Duration and metadata are filled in after the response
+            schedule_processing(track)
 
-            # Check moderation status and provide appropriate feedback
-            if track.moderation_status == "PENDING":
-                messages.warning(
-                    request,
-                    f'Track "{track.title}" uploaded successfully! '
-                    "Your artwork is pending moderation "
-                    "and will be reviewed shortly.",
-                )
-            elif track.moderation_status == "REJECTED":
-                messages.error(
-                    request,
-                    f'Track "{track.title}" was uploaded but the artwork '
-                    "was flagged during moderation.",
-                )
-            else:
-                messages.success(
-                    request, f'Track "{track.title}" uploaded successfully!'
-                )
-
+            add_upload_messages(request, track)
             return redirect("track_detail", slug=track.slug)
         else:
             # Handle validation errors with user-friendly messaging
@@ -235,14 +270,17 @@ def track_upload(request):
                     messages.error(request, f"{field_name}: {error}")
 
             # Render feed with modal state preserved for error correction
-            tracks = Track.objects.all()[:5]
             return render(
                 request,
                 "tracks/feed.html",
                 {
-                    "tracks": tracks,
+                    "tracks": get_feed_page(),
                     "upload_form": form,
                     "show_upload_modal": True,
+                    "direct_upload_threshold": (
+                        settings.DIRECT_UPLOAD_THRESHOLD
+                    ),
+                    "large_upload_method": settings.LARGE_UPLOAD_METHOD,
                 },
             )
 
@@ -250,6 +288,260 @@ def track_upload(request):
     return redirect("track_feed")
 
 
+# Session key holding {upload_id: storage name} for direct uploads
+DIRECT_UPLOADS_SESSION_KEY = "direct_uploads"
+
+
+@login_required
+@require_POST
+def track_upload_direct_start(request):
+    """
+    Start a direct-to-storage multipart upload for a large audio file.
+
+    The browser then PUTs each part straight to the bucket using the
+    presigned URLs, so the audio never passes through a web worker.
+    The upload is recorded in the session so only this user can
+    complete or abort it.
+
+    POST parameters:
+        filename (str): Original filename
+        size (int): File size in bytes
+
+    Returns:
+        JsonResponse: upload_id, part_size and presigned part URLs,
+        or {"error": ...} with status 400
+    """
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return JsonResponse({"error": "Invalid file size."}, status=400)
+
+    try:
+        upload = start_upload(request.POST.get("filename", ""), size)
+    except DirectUploadError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    pending = request.session.get(DIRECT_UPLOADS_SESSION_KEY, {})
+    pending[upload["upload_id"]] = upload["name"]
+    request.session[DIRECT_UPLOADS_SESSION_KEY] = pending
+    return JsonResponse(
+        {
+            "upload_id": upload["upload_id"],
+            "part_size": upload["part_size"],
+            "parts": upload["parts"],
+        }
+    )
+
+
+@login_required
+@require_POST
+def track_upload_direct_complete(request):
+    """
+    Finalize a direct upload and register the Track.
+
+    Assembles the uploaded parts, then runs the regular TrackUploadForm
+    validation (title, description, artwork moderation, audio size and
+    magic-byte format) against the stored object. Audio that fails
+    validation is deleted from the bucket.
+
+    POST parameters:
+        upload_id (str): Id returned by track_upload_direct_start
+        parts (str): JSON list of {"part_number", "etag"}
+        title, description, track_image: As for track_upload
+
+    Returns:
+        JsonResponse: {"redirect": detail URL} on success, or
+        {"error"/"errors": ...} with status 400
+    """
+    upload_id = request.POST.get("upload_id", "")
+    pending = request.session.get(DIRECT_UPLOADS_SESSION_KEY, {})
+    name = pending.pop(upload_id, None)
+    if name is None:
+        return JsonResponse({"error": "Unknown upload."}, status=400)
+    request.session[DIRECT_UPLOADS_SESSION_KEY] = pending
+
+    try:
+        parts = json.loads(request.POST.get("parts", ""))
+        stored = complete_upload(name, upload_id, parts)
+    except ValueError as e:
+        # json.JSONDecodeError and DirectUploadError are ValueErrors
+        abort_upload(name, upload_id)
+        message = (
+            str(e) if isinstance(e, DirectUploadError) else "Invalid parts."
+        )
+        return JsonResponse({"error": message}, status=400)
+
+    form = TrackUploadForm(request.POST, request.FILES, stored_audio=stored)
+    if not form.is_valid():
+        discard_upload(name)
+        return JsonResponse({"errors": form.errors}, status=400)
+
+    track = form.save(commit=False)
+    track.user = request.user
+    track.save()
+    schedule_processing(track)
+
+    add_upload_messages(request, track)
+    return JsonResponse(
+        {"redirect": reverse("track_detail", args=[track.slug])}
+    )
+
+
+@login_required
+@require_POST
+def track_upload_direct_abort(request):
+    """Abort an unfinished direct upload started by this session."""
+    upload_id = request.POST.get("upload_id", "")
+    pending = request.session.get(DIRECT_UPLOADS_SESSION_KEY, {})
+    name = pending.pop(upload_id, None)
+    if name is not None:
+        request.session[DIRECT_UPLOADS_SESSION_KEY] = pending
+        abort_upload(name, upload_id)
+    return JsonResponse({"aborted": name is not None})
+
+
+def _upload_session_headers(response, session, offset):
+    response["Upload-Offset"] = str(offset)
+    response["Upload-Length"] = str(session.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@login_required
+@require_POST
+def track_upload_resumable_create(request):
+    """
+    Start a resumable (tus-style) chunked audio upload.
+
+    POST parameters:
+        filename (str): Original filename
+        size (int): File size in bytes
+
+    Returns:
+        JsonResponse: 201 with the session id, its URL, the starting
+        offset and a suggested chunk size, or {"error": ...}
+    """
+    try:
+        size = int(request.POST.get("size", ""))
+        session = create_session(
+            request.user, request.POST.get("filename", ""), size
+        )
+    except ValueError as e:
+        # ResumableUploadError is a ValueError too
+        status = getattr(e, "status", 400)
+        message = (
+            str(e) if isinstance(e, ResumableUploadError) else "Invalid size."
+        )
+        return JsonResponse({"error": message}, status=status)
+
+    url = reverse("track_upload_resumable", args=[session.id])
+    response = JsonResponse(
+        {
+            "id": str(session.id),
+            "url": url,
+            "offset": 0,
+            "chunk_size": settings.RESUMABLE_CHUNK_SIZE,
+        },
+        status=201,
+    )
+    response["Location"] = url
+    return _upload_session_headers(response, session, 0)
+
+
+@login_required
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+def track_upload_resumable(request, session_id):
+    """
+    Query, append to or cancel a resumable upload session.
+
+    - GET/HEAD: report the persisted offset (Upload-Offset header and
+      JSON body) so a client can resume after a disconnect.
+    - PATCH: append the request body at the Upload-Offset header. The
+      body is streamed to disk in small blocks; a mismatched offset
+      returns 409 with the current offset.
+    - DELETE: discard the session and its partial file.
+    """
+    session = get_object_or_404(
+        UploadSession, pk=session_id, user=request.user
+    )
+
+    if request.method == "DELETE":
+        session.discard()
+        return HttpResponse(status=204)
+
+    if request.method == "PATCH":
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return JsonResponse(
+                {"error": "Upload-Offset and Content-Length are required."},
+                status=400,
+            )
+        try:
+            offset = append_chunk(session, offset, request, length)
+        except ResumableUploadError as e:
+            response = JsonResponse({"error": str(e)}, status=e.status)
+            return _upload_session_headers(
+                response, session, current_offset(session)
+            )
+        response = HttpResponse(status=204)
+        return _upload_session_headers(response, session, offset)
+
+    offset = current_offset(session)
+    response = JsonResponse(
+        {"id": str(session.id), "offset": offset, "size": session.size}
+    )
+    return _upload_session_headers(response, session, offset)
+
+
+@login_required
+@require_POST
+def track_upload_resumable_finish(request, session_id):
+    """
+    Register a Track from a completed resumable upload.
+
+    The assembled file goes through TrackUploadForm exactly like a
+    regular upload: size and magic-byte format validation, ULID filename
+    sanitization in clean_audio_file, artwork moderation and background
+    processing. If the form is invalid the session is kept, so the
+    client can correct the title or artwork and finish again without
+    re-sending the audio.
+
+    POST parameters:
+        title, description, track_image: As for track_upload
+
+    Returns:
+        JsonResponse: {"redirect": detail URL} on success, or
+        {"error"/"errors": ...} with status 400
+    """
+    session = get_object_or_404(
+        UploadSession, pk=session_id, user=request.user
+    )
+    if current_offset(session) != session.size:
+        return JsonResponse({"error": "Upload is incomplete."}, status=400)
+
+    files = request.FILES.copy()
+    audio = assembled_file(session)
+    files["audio_file"] = audio
+    try:
+        form = TrackUploadForm(request.POST, files)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        track = form.save(commit=False)
+        track.user = request.user
+        track.save()
+    finally:
+        audio.close()
+
+    session.discard()
+    schedule_processing(track)
+    add_upload_messages(request, track)
+    return JsonResponse(
+        {"redirect": reverse("track_detail", args=[track.slug])}
+    )
+
+
 @login_required
 def track_edit(request, slug):
     """
@@ -298,23 +590,35 @@ def track_edit(request, slug):
         # Store references to old files before form processing
         old_audio_file = track.audio_file if track.audio_file else None
         old_image_file = track.track_image if track.track_image else None
+        old_hls_manifest = track.hls_manifest
 
         # Process edit form with existing track instance
         form = TrackUploadForm(request.POST, request.FILES, instance=track)
 
         if form.is_valid():
             # Save the updated track
-            updated_track = form.save()
+            form.save()
 
-            # Delete old audio file if a new one was uploaded
+            # Release the old audio file if a new one was uploaded. The
+            # new upload took its own blob reference even when the
+            # content (and so the name) is unchanged
             if "audio_file" in form.changed_data and old_audio_file:
-                if old_audio_file != updated_track.audio_file:
-                    old_audio_file.delete(save=False)
-
-            # Delete old image file if a new one was uploaded
-            if "track_image" in form.changed_data and old_image_file:
-                if old_image_file != updated_track.track_image:
-                    old_image_file.delete(save=False)
+                MediaBlob.objects.release(
+                    old_audio_file.storage, old_audio_file.name
+                )
+                # The form cleared hls_manifest; processing transcodes again
+                delete_renditions(old_hls_manifest)
+
+            # Release the old image file if a new one was uploaded, with
+            # its derivatives once no other track shares it
+            if (
+                "track_image" in form.changed_data
+                and old_image_file
+                and MediaBlob.objects.release(
+                    old_image_file.storage, old_image_file.name
+                )
+            ):
+                delete_variants(old_image_file.storage, old_image_file.name)
 
             messages.success(
                 request, f'Track "{track.title}" updated successfully!'
@@ -402,87 +706,209 @@ def upload_track(request):
     return redirect("feed")
 
 
+@login_required
 def track_feed_api(request):
     """
     JSON API endpoint for infinite scroll track feed pagination.
 
-    Returns paginated track data with moderation-aware media URLs.
+    Returns paginated APPROVED track data with moderation-aware media
+    URLs, built by the shared feed service used by track_feed.
     Used by frontend JavaScript for seamless content loading.
 
+    Pagination is keyset-based on (created_at, id): each response carries
+    an opaque `next_cursor` to pass back as `?cursor=`, so every page is a
+    single index range scan regardless of depth. The legacy `?page=N`
+    form is still accepted for older clients.
+
+    Clients on slow connections can pass a sparse fieldset, e.g.
+    `?fields=title,stream_url,detail_url`, to receive only those keys.
+
     Args:
-        request: HTTP request with optional 'page' parameter
+        request: HTTP request with optional 'cursor', 'page' and
+        'fields' parameters
 
     Returns:
         JsonResponse: Paginated tracks with metadata and navigation info
     """
-    from django.core.paginator import Paginator
-    from django.db.models import Count
-    from django.utils.timesince import timesince
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        payload = get_feed_payload(
+            cursor=request.GET.get("cursor"),
+            page=request.GET.get("page"),
+            fields=fields,
+        )
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+    return JsonResponse(payload)
 
-    # Get all tracks with related data
-    # QuerySet - qs (lazy, not executed yet)
-    tracks_qs = (
-        Track.objects.select_related("user", "user__profile")
-        .annotate(comment_count=Count("comments"))
-        .order_by("-created_at")
-    )
 
-    # Paginate (5 items per page for infinite scroll)
-    paginator = Paginator(tracks_qs, 5)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
-
-    # Build JSON data for each track
-    items = []
-    for t in page_obj:
-        items.append(
-            {
-                "id": t.id,
-                "title": t.title,
-                "slug": t.slug,
-                "description": t.description or "",
-                "audio_url": t.audio_file.url,
-                "image_url": (
-                    t.track_image.url
-                    if (t.track_image and t.moderation_status == "APPROVED")
-                    else None
-                ),
-                "detail_url": reverse("track_detail", args=[t.slug]),
-                "created_ago": timesince(t.created_at) + " ago",
-                "comment_count": t.comment_count,
-                "duration": getattr(t, "duration", None),
-                "duration_display": (
-                    t.get_duration_display()
-                    if hasattr(t, "get_duration_display") and t.duration
-                    else None
-                ),
-                "profile": {
-                    "username": t.user.profile.username,
-                    "display_name": t.user.profile.display_name
-                    or t.user.profile.username,
-                    "url": reverse("profile", args=[t.user.profile.username]),
-                    "avatar": (
-                        t.user.profile.profile_picture.url
-                        if (
-                            t.user.profile.profile_picture
-                            and t.user.profile.moderation_status == "APPROVED"
-                        )
-                        else None
-                    ),
-                },
-            }
+@login_required
+def track_search_api(request):
+    """
+    JSON API endpoint for ranked full-text track search.
+
+    Matches `?q=` against track titles and descriptions (web search
+    syntax: "quoted phrases", -exclusions, or) and returns APPROVED
+    tracks only, most relevant first, serialized like feed items.
+
+    Pagination is keyset-based on (rank, id): pass the returned
+    `next_cursor` back as `?cursor=` with the same `q` for more results.
+
+    Args:
+        request: HTTP request with 'q' and optional 'cursor' parameters
+
+    Returns:
+        JsonResponse: Matching tracks with navigation info
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse(
+            {"query": "", "tracks": [], "has_next": False, "next_cursor": None}
         )
 
+    try:
+        page = search_tracks(query, cursor=request.GET.get("cursor"))
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
     return JsonResponse(
         {
-            "tracks": items,
-            "has_next": page_obj.has_next(),
-            "page": page_obj.number,
-            "total_pages": paginator.num_pages,
+            "query": query,
+            "tracks": page.object_list,
+            "has_next": page.has_next(),
+            "next_cursor": page.next_cursor,
         }
     )
 
 
+# Stored audio names are unique and never rewritten, so responses can be
+# cached by the browser for as long as the name is in use
+STREAM_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def track_stream(request, slug):
+    """
+    Stream a track's original audio to signed-in members.
+
+    Serves single byte ranges (206 with Content-Range) so players can
+    seek, answers If-None-Match with 304, and reads through a bounded
+    local disk cache so repeated and seeking requests do not hit the
+    storage backend. A cache miss streams only the requested range
+    from storage. The body is streamed in fixed chunks; whole files are
+    never held in memory. Each listener holds a worker thread for the
+    length of the response, so gunicorn runs threaded workers (see
+    gunicorn.conf.py).
+
+    Args:
+        request (HttpRequest): The HTTP request object
+        slug (str): Track slug identifier
+
+    Returns:
+        StreamingHttpResponse: 200 or 206 audio, 304 or 416
+    """
+    track = get_object_or_404(Track.objects.only("audio_file"), slug=slug)
+    if not track.audio_file:
+        raise Http404("Track has no audio")
+
+    name = track.audio_file.name
+    return stream_stored_file(
+        request,
+        track.audio_file.storage,
+        name,
+        mimetypes.guess_type(name)[0] or "application/octet-stream",
+    )
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def track_hls(request, slug, path):
+    """
+    Serve a track's HLS playlists and segments to signed-in members.
+
+    `path` is relative to the track's hls/ URL and must lie inside the
+    rendition run of its current master playlist, so older runs and
+    other tracks' files are never reachable. Responses are streamed
+    and cached exactly as track_stream's.
+
+    Args:
+        request (HttpRequest): The HTTP request object
+        slug (str): Track slug identifier
+        path (str): Rendition run, rendition and file name
+
+    Returns:
+        StreamingHttpResponse: 200 or 206 playlist or segment, 304 or 416
+    """
+    track = get_object_or_404(Track.objects.only("hls_manifest"), slug=slug)
+    name = hls_storage_name(track.hls_manifest, path)
+    content_type = HLS_CONTENT_TYPES.get(os.path.splitext(path)[1])
+    if name is None or content_type is None:
+        raise Http404("No such rendition file")
+    return stream_stored_file(
+        request, track.audio_file.storage, name, content_type
+    )
+
+
+def stream_stored_file(request, storage, name, content_type):
+    """
+    Stream a stored media file with Range, ETag and cache headers.
+
+    Shared by track_stream and track_hls. Stored names are never
+    rewritten, so the name alone is the ETag.
+    """
+    etag = audio_etag(name)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        response["Cache-Control"] = STREAM_CACHE_CONTROL
+        return response
+
+    audio_cache = get_audio_cache()
+    f, size = audio_cache.open(name) or (None, storage.size(name))
+    byte_range = None
+    if request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            if f is not None:
+                f.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    if request.method == "HEAD":
+        if f is not None:
+            f.close()
+        response = HttpResponse(status=206 if byte_range else 200)
+    elif f is not None:
+        response = StreamingHttpResponse(
+            iter_file_range(f, start, end),
+            status=206 if byte_range else 200,
+        )
+    else:
+        # Miss: send just this range from storage, cache the whole file
+        # in the background for the requests that follow
+        audio_cache.fill_later(storage, name, size)
+        response = StreamingHttpResponse(
+            iter_storage_range(storage, name, start, end),
+            status=206 if byte_range else 200,
+        )
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Type"] = content_type
+    response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Cache-Control"] = STREAM_CACHE_CONTROL
+    return response
+
+
 @login_required
 def track_audio_api(request, slug):
     """
@@ -507,7 +933,11 @@ def track_audio_api(request, slug):
             "id": track.id,
             "title": track.title,
             "slug": track.slug,
-            "audio_url": track.audio_file.url,
+            # Members-only HLS master playlist once transcoded; the
+            # original is served by stream_url
+            "hls_url": track.hls_url,
+            "stream_url": track.stream_url,
+            "playback_url": track.playback_url,
             "image_url": (
                 track.track_image.url
                 if (
@@ -515,7 +945,29 @@ def track_audio_api(request, slug):
                 )
                 else None
             ),
+            "image_sources": (
+                track.image_sources
+                if (
+                    track.track_image and track.moderation_status == "APPROVED"
+                )
+                else []
+            ),
+            "image_blurhash": (
+                track.image_blurhash
+                if (
+                    track.track_image and track.moderation_status == "APPROVED"
+                )
+                else ""
+            ),
             "duration": track.duration,
+            # Base64 int8 min/max pairs, drawn before any audio loads
+            "waveform": track.waveform_base64,
+            # Loudness normalization: linear volume for the player, plus
+            # the measurements it was derived from
+            "gain": track.playback_gain,
+            "gain_db": track.gain_db,
+            "loudness_lufs": track.loudness_lufs,
+            "true_peak_dbtp": track.true_peak_dbtp,
             "artist": {
                 "username": track.user.profile.username,
                 "display_name": track.user.profile.display_name
@@ -531,6 +983,22 @@ def track_audio_api(request, slug):
                     )
                     else None
                 ),
+                "avatar_sources": (
+                    track.user.profile.image_sources
+                    if (
+                        track.user.profile.profile_picture
+                        and track.user.profile.moderation_status == "APPROVED"
+                    )
+                    else []
+                ),
+                "avatar_blurhash": (
+                    track.user.profile.image_blurhash
+                    if (
+                        track.user.profile.profile_picture
+                        and track.user.profile.moderation_status == "APPROVED"
+                    )
+                    else ""
+                ),
             },
         }
     )